@@ -0,0 +1,70 @@
+"""
+自动模式单步开销基准：GameBridge.get_next_action_in_game 从收到状态到返回动作的耗时
+(解析、评分、数据采集、选择动作)，不含游戏本身的动画时间。
+
+用法:
+    python scripts/bench_autopilot.py --states 5000
+    python scripts/bench_autopilot.py --states 5000 --collect   # 同时开启数据采集 (写入临时目录)
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+sys.path.append(os.path.join(root_path, 'external', 'spirecomm'))
+
+from src.connector.game_bridge import GameBridge
+from src.core.state_view import LazyGameState
+from tests.game_states import random_combat_message
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--states", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=9995)
+    parser.add_argument("--collect", action="store_true", help="enable data collection")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # 保存原始 JSON 文本，计时包含与 Coordinator 相同的 json.loads + 惰性视图构造
+    raw = [json.dumps(random_combat_message(rng, turn=rng.randint(1, 5))) for _ in range(args.states)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bridge = GameBridge(port=args.port, deferred_init=True)
+        bridge.collect_data = args.collect
+        bridge.data_dir = tmp_dir
+        bridge.data_file = os.path.join(tmp_dir, "training_data.csv")
+        bridge.log_file = os.path.join(tmp_dir, "collection_debug.log")
+        bridge.history_file = os.path.join(tmp_dir, "run_history.sqlite3")
+        bridge.labels_file = os.path.join(tmp_dir, "action_labels.csv")
+        bridge.outcomes_file = os.path.join(tmp_dir, "combat_outcomes.csv")
+        bridge.cache_file = os.path.join(tmp_dir, "eval_cache.sqlite3")
+        bridge.ensure_initialized()
+        bridge.auto_play = True
+
+        latencies = []
+        start = time.perf_counter()
+        for text in raw:
+            step_start = time.perf_counter()
+            message = json.loads(text)
+            bridge.get_next_action_in_game(LazyGameState(message["game_state"], message["available_commands"]))
+            latencies.append(time.perf_counter() - step_start)
+        total = time.perf_counter() - start
+        bridge.shutdown()
+
+    latencies.sort()
+    print(f"states:        {args.states} (data collection {'on' if args.collect else 'off'})")
+    print(f"throughput:    {args.states / total:,.0f} actions/s")
+    print(f"latency p50:   {latencies[len(latencies) // 2] * 1000:.3f} ms")
+    print(f"latency p99:   {latencies[int(len(latencies) * 0.99)] * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+批量评分基准：对比逐状态调用 score_hand 与 encode_states + score_batch 的耗时。
+端到端 (编码 + 打分) 才是批量评分的实际收益，score_batch 单独的倍数只反映打分部分。
+每个阶段计时前先做一次完整垃圾回收，避免构造 Game 对象留下的回收开销算到随后的阶段上。
+
+用法:
+    python scripts/bench_batch_scoring.py --states 20000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+sys.path.append(os.path.join(root_path, 'external', 'spirecomm'))
+
+from spirecomm.spire.game import Game
+
+from src.agents.batch_scorer import encode_states, score_batch
+from src.agents.heuristic import score_hand
+from tests.game_states import random_combat_message
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--states", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    games = []
+    for _ in range(args.states):
+        message = random_combat_message(rng)
+        games.append(Game.from_json(message["game_state"], message["available_commands"]))
+
+    gc.collect()
+    start = time.perf_counter()
+    for game in games:
+        score_hand(game)
+    scalar_time = time.perf_counter() - start
+
+    gc.collect()
+    start = time.perf_counter()
+    batch = encode_states(games)
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score_batch(batch)
+    batch_time = time.perf_counter() - start
+    total_time = encode_time + batch_time
+
+    print(f"states:               {args.states}")
+    print(f"scalar:               {scalar_time * 1000:.1f} ms ({args.states / scalar_time:,.0f} states/s)")
+    print(f"encode:               {encode_time * 1000:.1f} ms")
+    print(f"score_batch:          {batch_time * 1000:.1f} ms ({args.states / batch_time:,.0f} states/s)")
+    print(f"encode + score:       {total_time * 1000:.1f} ms ({args.states / total_time:,.0f} states/s)")
+    print(f"speedup (score):      {scalar_time / batch_time:.1f}x")
+    print(f"speedup (end-to-end): {scalar_time / total_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
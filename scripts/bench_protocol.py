@@ -0,0 +1,54 @@
+"""
+协议处理吞吐量基准：通过进程内测试工具 (tests/protocol_harness.py) 把随机战斗消息交给 Bridge，
+测量 JSON 解析 + 评分 + 广播 + 自动出牌的端到端速度，不经过 stdin / Socket，也没有 sleep。
+
+用法:
+    python scripts/bench_protocol.py --sessions 500
+    python scripts/bench_protocol.py --sessions 500 --collect   # 同时写采集文件 (临时目录)
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+sys.path.append(os.path.join(root_path, 'external', 'spirecomm'))
+
+from tests.game_states import random_turn_session
+from tests.protocol_harness import ProtocolHarness
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--collect", action="store_true", help="write training data / run history as well")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    rng = random.Random(args.seed)
+    # 预先序列化，只测量 Bridge 端的处理
+    messages = [json.dumps(m) for _ in range(args.sessions) for m in random_turn_session(rng)]
+
+    with ProtocolHarness(auto_play=True, collect_data=args.collect) as harness:
+        start = time.perf_counter()
+        for message in messages:
+            harness.feed(message)
+        elapsed = time.perf_counter() - start
+        commands = len(harness.sent)
+        broadcasts = len(harness.broadcasts)
+
+    print(f"messages:   {len(messages)}")
+    print(f"elapsed:    {elapsed * 1000:.1f} ms ({len(messages) / elapsed:,.0f} messages/s, "
+          f"{elapsed / len(messages) * 1e6:.0f} us/message)")
+    print(f"commands:   {commands}")
+    print(f"broadcasts: {broadcasts}")
+
+
+if __name__ == "__main__":
+    main()
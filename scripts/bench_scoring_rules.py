@@ -0,0 +1,56 @@
+"""
+规则引擎基准：对比 heuristic.score_hand 的 if/elif 分支链与编译后的声明式规则 (RulesEngine)。
+
+用法:
+    python scripts/bench_scoring_rules.py --states 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+sys.path.append(os.path.join(root_path, 'external', 'spirecomm'))
+
+from spirecomm.spire.game import Game
+
+from src.agents.heuristic import score_hand
+from src.agents.scoring_rules import RulesEngine
+from tests.game_states import random_combat_message
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--states", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    games = []
+    for _ in range(args.states):
+        message = random_combat_message(rng)
+        games.append(Game.from_json(message["game_state"], message["available_commands"]))
+
+    start = time.perf_counter()
+    for game in games:
+        score_hand(game)
+    chain_time = time.perf_counter() - start
+
+    # 不存在的规则文件 -> 默认规则；热加载检查按默认间隔进行
+    engine = RulesEngine(os.path.join(root_path, "data", "__bench_missing_rules__.json"))
+    start = time.perf_counter()
+    for game in games:
+        engine.score_hand(game)
+    rules_time = time.perf_counter() - start
+
+    print(f"states:     {args.states}")
+    print(f"if/elif:    {chain_time * 1000:.1f} ms ({args.states / chain_time:,.0f} states/s)")
+    print(f"rules:      {rules_time * 1000:.1f} ms ({args.states / rules_time:,.0f} states/s)")
+    print(f"speedup:    {chain_time / rules_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+启动耗时基准：测量后端 (src/main.py) 和 Overlay UI 从进程创建到可用的时间。
+  后端: ready   = stdout 输出 "ready" (游戏只等待这一步)
+        engines = 评分引擎、数据采集、怪物行动表加载完成
+  UI:   shown   = 窗口显示 (需要 PySide6，无显示器时使用 offscreen 平台)
+
+用法:
+    python scripts/bench_startup.py --runs 5
+    python scripts/bench_startup.py --runs 5 --imports      # 同时输出导入耗时排行
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+
+from src.utils.startup import import_time_report, format_report
+
+BACKEND_MARKERS = {
+    "ready": ("stdout", "ready"),
+    "engines": ("stderr", "Engine initialization finished"),
+}
+OVERLAY_MARKERS = {
+    "shown": ("stderr", "Window shown"),
+}
+
+
+def time_markers(cmd, markers, env, timeout=30.0):
+    """启动 cmd，返回每个输出标记第一次出现时距进程创建的毫秒数"""
+    found = {}
+    done = threading.Event()
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=root_path, env=env, stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8")
+
+    def watch(stream, stream_name):
+        for line in stream:
+            elapsed = (time.perf_counter() - start) * 1000
+            for name, (target, text) in markers.items():
+                if target == stream_name and name not in found and text in line:
+                    found[name] = elapsed
+            if len(found) == len(markers):
+                done.set()
+
+    watchers = [threading.Thread(target=watch, args=(proc.stdout, "stdout"), daemon=True),
+                threading.Thread(target=watch, args=(proc.stderr, "stderr"), daemon=True)]
+    for t in watchers:
+        t.start()
+    done.wait(timeout)
+    proc.kill()
+    proc.wait()
+    return found
+
+
+def run_series(label, cmd, markers, env, runs):
+    results = {name: [] for name in markers}
+    for _ in range(runs):
+        found = time_markers(cmd, markers, env)
+        for name in markers:
+            if name in found:
+                results[name].append(found[name])
+    for name, values in results.items():
+        if values:
+            print(f"{label:<18} {name:<8} median={statistics.median(values):>8.1f} ms  "
+                  f"min={min(values):>8.1f} ms  (n={len(values)})")
+        else:
+            print(f"{label:<18} {name:<8} not reached")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--imports", action="store_true", help="输出导入耗时排行")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    backend = [sys.executable, os.path.join("src", "main.py")]
+    run_series("backend (fast)", backend, BACKEND_MARKERS, env, args.runs)
+    run_series("backend (eager)", backend + ["--eager-start"], BACKEND_MARKERS, env, args.runs)
+
+    has_qt = importlib.util.find_spec("PySide6") is not None
+    if has_qt:
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+        overlay = [sys.executable, os.path.join("src", "ui", "overlay_ui.py")]
+        run_series("overlay", overlay, OVERLAY_MARKERS, env, args.runs)
+    else:
+        print("overlay            skipped (PySide6 not installed)")
+
+    if args.imports:
+        print("\n== src.main ==")
+        print(format_report(import_time_report("src.main", env=env), top=15))
+        if has_qt:
+            print("\n== src.ui.overlay_ui ==")
+            print(format_report(import_time_report("src.ui.overlay_ui", env=env), top=15))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+状态解析基准：对比每条消息构造完整 Game 对象与使用 LazyGameState 的开销。
+每种界面只访问 GameBridge 在该界面实际读取的字段。
+
+用法:
+    python scripts/bench_state_parse.py --iterations 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+sys.path.append(os.path.join(root_path, 'external', 'spirecomm'))
+
+from spirecomm.spire.game import Game
+
+from src.core.state_view import LazyGameState
+from tests.game_states import combat_message, map_message, card_reward_message, map_node, STARTER_DECK
+
+
+def full_act_map_message():
+    """接近真实规模的一幕地图 (15 层 x 7 列)"""
+    rng = random.Random(0)
+    message = map_message()
+    nodes = []
+    for y in range(15):
+        for x in range(7):
+            children = [(cx, y + 1) for cx in (x - 1, x, x + 1) if 0 <= cx < 7 and y < 14 and rng.random() < 0.5]
+            nodes.append(map_node(x, y, rng.choice("MMM?$ER"), children))
+    message["game_state"]["map"] = nodes
+    message["game_state"]["deck"] = STARTER_DECK * 3
+    return message
+
+
+def read_combat(game):
+    return (game.floor, game.player.energy, [m.current_hp for m in game.monsters],
+            [c.uuid for c in game.hand], len(game.draw_pile), len(game.discard_pile))
+
+
+def read_map(game):
+    return (game.screen_type, game.map.nodes, game.screen.next_nodes, game.current_hp, game.deck)
+
+
+def read_reward(game):
+    return (game.screen_type, game.screen.cards)
+
+
+def read_status(game):
+    return (game.screen_type, game.in_combat)
+
+
+SCENARIOS = [
+    ("combat", combat_message(), read_combat),
+    ("map", full_act_map_message(), read_map),
+    ("card_reward", card_reward_message(), read_reward),
+    ("map (status only)", full_act_map_message(), read_status),
+]
+
+
+def bench(raw, reader, factory, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        message = json.loads(raw)
+        reader(factory(message["game_state"], message["available_commands"]))
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'screen':<20}{'Game.from_json':>16}{'LazyGameState':>16}{'speedup':>10}")
+    for name, message, reader in SCENARIOS:
+        raw = json.dumps(message)
+        full = bench(raw, reader, Game.from_json, args.iterations)
+        lazy = bench(raw, reader, LazyGameState, args.iterations)
+        print(f"{name:<20}{full:>13.1f} us{lazy:>13.1f} us{full / lazy:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+传输延迟基准：对比 TCP 回环 (JSON + 换行分帧) 与共享内存 (seqlock) 两种传输。
+写入端在主进程中按固定间隔发布带时间戳的快照，读取端在独立的子进程中接收并统计端到端延迟
+(与真实的后端/UI 一样是两个互不相关的进程)。
+
+用法:
+    python scripts/bench_transport.py --messages 2000 --interval 0.002
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+
+from src.connector.shm_transport import SharedStateWriter, SharedStateReader
+
+SHM_NAME = "spire_ai_bench"
+
+
+def make_snapshot(i):
+    """与 GameBridge 广播大小相近的快照"""
+    return {
+        "status": "Combat",
+        "seq": i,
+        "sent_ns": time.perf_counter_ns(),
+        "hand": [{"uuid": f"card-{k}", "name": "Strike", "cost": 1, "type": "CardType.ATTACK",
+                  "recommendation_score": 60} for k in range(5)],
+        "player": {"energy": 3, "block": 0, "hp": 80, "max_hp": 80},
+        "monsters": [{"name": "Cultist", "hp": 48, "max_hp": 48, "intent": "Intent.ATTACK", "damage": 6}],
+    }
+
+
+def tcp_reader(port, count):
+    s = socket.create_connection(("127.0.0.1", port))
+    buffer = b""
+    latencies = []
+    while len(latencies) < count:
+        data = s.recv(65536)
+        if not data:
+            break
+        buffer += data
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            snapshot = json.loads(line)
+            latencies.append(time.perf_counter_ns() - snapshot["sent_ns"])
+    s.close()
+    return latencies
+
+
+def shm_reader(count):
+    reader = SharedStateReader(SHM_NAME)
+    latencies = []
+    last = -1
+    while len(latencies) < count:
+        payload = reader.read_latest()
+        if payload is None:
+            continue  # 忙等：测量传输本身的延迟
+        snapshot = json.loads(payload)
+        latencies.append(time.perf_counter_ns() - snapshot["sent_ns"])
+        last = snapshot["seq"]
+        if last >= count - 1:
+            break
+    reader.close()
+    return latencies
+
+
+def report(name, latencies):
+    us = sorted(l / 1000 for l in latencies)
+    print(f"{name:<6} n={len(us):<6} median={statistics.median(us):8.1f} us  "
+          f"p99={us[int(len(us) * 0.99) - 1]:8.1f} us  max={us[-1]:8.1f} us")
+
+
+def spawn_reader(role, count, port=0):
+    return subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--role", role, "--messages", str(count), "--port", str(port)],
+        stdout=subprocess.PIPE
+    )
+
+
+def bench_tcp(count, interval):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    proc = spawn_reader("tcp-reader", count, server.getsockname()[1])
+    client, _ = server.accept()
+    for i in range(count):
+        client.sendall((json.dumps(make_snapshot(i)) + "\n").encode("utf-8"))
+        time.sleep(interval)
+    latencies = json.loads(proc.communicate()[0])
+    client.close()
+    server.close()
+    return latencies
+
+
+def bench_shm(count, interval):
+    writer = SharedStateWriter(SHM_NAME)
+    proc = spawn_reader("shm-reader", count)
+    time.sleep(1.0)  # 等待读取端启动并 attach
+    for i in range(count):
+        writer.write(json.dumps(make_snapshot(i)).encode("utf-8"))
+        time.sleep(interval)
+    latencies = json.loads(proc.communicate()[0])
+    writer.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--interval", type=float, default=0.002, help="seconds between snapshots")
+    parser.add_argument("--role", choices=["bench", "tcp-reader", "shm-reader"], default="bench")
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.role == "tcp-reader":
+        print(json.dumps(tcp_reader(args.port, args.messages)))
+    elif args.role == "shm-reader":
+        print(json.dumps(shm_reader(args.messages)))
+    else:
+        report("tcp", bench_tcp(args.messages, args.interval))
+        report("shm", bench_shm(args.messages, args.interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+向运行中的 GameBridge 发送性能分析指令。
+结果文件写在后端的 data/profiles/ 下：*.collapsed 可交给 flamegraph.pl 或 https://www.speedscope.app 查看。
+
+用法:
+    python scripts/profile_bridge.py profile --seconds 10
+    python scripts/profile_bridge.py mem_snapshot --top 30
+    python scripts/profile_bridge.py mem_stop
+    python scripts/profile_bridge.py flight_dump    # 转储飞行记录器 (最近的调试事件)
+"""
+import argparse
+import json
+import socket
+
+
+def send_command(command, host="127.0.0.1", port=9999, timeout=5.0):
+    """发送一条控制指令并等待回复 (忽略期间收到的状态广播)"""
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall(json.dumps(command).encode("utf-8") + b"\n")
+        buffer = b""
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("Bridge closed the connection before replying")
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                message = json.loads(line)
+                if "control" in message:
+                    return message["control"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cmd", choices=["profile", "profile_stop", "mem_snapshot", "mem_stop", "flight_dump"])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--interval-ms", type=float, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    args = parser.parse_args()
+
+    command = {"cmd": args.cmd}
+    if args.cmd == "profile":
+        command.update(seconds=args.seconds, interval_ms=args.interval_ms)
+    elif args.cmd == "mem_snapshot":
+        command["top"] = args.top
+    print(json.dumps(send_command(command, args.host, args.port), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
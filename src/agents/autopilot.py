@@ -0,0 +1,149 @@
+import logging
+
+from spirecomm.spire.screen import RestOption, RewardType
+from spirecomm.communication.action import (
+    PlayCardAction, EndTurnAction, ProceedAction, CancelAction, CardRewardAction, CombatRewardAction,
+    ChooseMapNodeAction, ChooseMapBossAction, RestAction, EventOptionAction,
+    BuyCardAction, BuyRelicAction, BuyPurgeAction, CardSelectAction,
+)
+
+logger = logging.getLogger(__name__)
+
+# 低于该血量比例时在篝火休息，否则升级
+REST_HP_RATIO = 0.5
+
+
+def estimate_damage(card, strength=0):
+    """与 heuristic 相同的粗略伤害估计 (痛击 8，其余攻击牌 6，加上力量)"""
+    base = 8 if "bash" in card.card_id.lower() else 6
+    return base + strength
+
+
+def choose_target(game, card):
+    """
+    为需要目标的牌选择怪物：优先能被这张牌击杀的 (剩余生命最高的那个，避免浪费斩杀)，
+    否则打生命 + 格挡最低的怪物。返回 monster_index，没有可选目标时返回 None。
+    """
+    monsters = [m for m in game.monsters if not m.is_gone and not m.half_dead]
+    if not monsters:
+        return None
+    strength = next((p.amount for p in game.player.powers if p.power_id == "Strength"), 0)
+    damage = estimate_damage(card, strength)
+    killable = [m for m in monsters if m.current_hp + m.block <= damage]
+    if killable:
+        return max(killable, key=lambda m: m.current_hp + m.block).monster_index
+    return min(monsters, key=lambda m: (m.current_hp + m.block, m.monster_index)).monster_index
+
+
+def choose_combat_action(game, scores):
+    """打出得分最高且可打出的牌；没有正分的牌时结束回合"""
+    if game.play_available:
+        energy = game.player.energy
+        playable = [c for c in game.hand
+                    if c.is_playable and scores.get(c.uuid, 0) > 0 and (c.cost == -1 or c.cost <= energy)]
+        if playable:
+            card = max(playable, key=lambda c: scores[c.uuid])
+            if card.has_target:
+                target = choose_target(game, card)
+                if target is None:
+                    return EndTurnAction() if game.end_available else None
+                return PlayCardAction(card=card, target_index=target)
+            return PlayCardAction(card=card)
+    if game.end_available:
+        return EndTurnAction()
+    return None
+
+
+def choose_reward_action(game, scores):
+    """拿取选牌界面中得分最高的卡"""
+    cards = game.screen.cards
+    if not cards:
+        return ProceedAction() if game.proceed_available else None
+    return CardRewardAction(max(cards, key=lambda c: scores.get(c.card_id, 0)))
+
+
+def choose_combat_reward_action(game):
+    """
+    战斗奖励：按顺序领取金币、遗物、卡牌 (打开选牌界面) 和药水；药水栏已满时跳过药水，
+    蓝宝石钥匙会放弃同组遗物，也跳过。没有可领取的奖励时继续前进
+    """
+    for reward in game.screen.rewards:
+        if reward.reward_type == RewardType.POTION and game.are_potions_full():
+            continue
+        if reward.reward_type == RewardType.SAPPHIRE_KEY:
+            continue
+        return CombatRewardAction(reward)
+    return ProceedAction() if game.proceed_available else None
+
+
+def choose_map_action(game, scores):
+    """按 MapPlanner 的推荐选择下一个节点 (推荐的 key 为 "x,y" 或 "boss")"""
+    screen = game.screen
+    if getattr(screen, "boss_available", False):
+        return ChooseMapBossAction()
+    nodes = {f"{n.x},{n.y}": n for n in screen.next_nodes}
+    candidates = [key for key in nodes if key in scores]
+    if not candidates:
+        return None
+    return ChooseMapNodeAction(nodes[max(candidates, key=scores.get)])
+
+
+def choose_rest_action(game, scores=None):
+    """
+    篝火：按推荐分 (key 为选项名小写，见 value_tables.ScreenAdvisor) 选择；
+    没有推荐时血量低于 REST_HP_RATIO 休息，否则升级；已经休息过则继续前进
+    """
+    screen = game.screen
+    options = screen.rest_options
+    if screen.has_rested or not options:
+        return ProceedAction() if game.proceed_available else None
+    if scores:
+        return RestAction(max(options, key=lambda o: scores.get(o.name.lower(), 0)))
+    low_hp = game.current_hp < game.max_hp * REST_HP_RATIO
+    for option in ((RestOption.REST, RestOption.SMITH) if low_hp else (RestOption.SMITH, RestOption.REST)):
+        if option in options:
+            return RestAction(option)
+    return RestAction(options[0])
+
+
+def choose_shop_action(game, scores):
+    """
+    商店：购买推荐分最高且买得起的商品 (推荐分已扣除价格，见 value_tables.ScreenAdvisor.shop)；
+    "leave" 最高时离开。药水只推荐、不自动购买 (药水栏是否已满交给玩家判断)
+    """
+    screen = game.screen
+    items = {card.uuid: card for card in screen.cards}
+    items.update((f"relic:{relic.relic_id}", relic) for relic in screen.relics)
+    if screen.purge_available:
+        items["purge"] = None
+    candidates = [key for key in items if scores.get(key, 0) > 0]
+    if not candidates or scores.get("leave", 0) >= max(scores[key] for key in candidates):
+        return CancelAction() if game.cancel_available else None
+    best = max(candidates, key=scores.get)
+    if best == "purge":
+        return BuyPurgeAction()
+    if best.startswith("relic:"):
+        return BuyRelicAction(items[best])
+    return BuyCardAction(items[best])
+
+
+def choose_event_action(game, scores):
+    """事件：选择推荐分最高的可选项 (key 为 "event:<选项序号>")，事件不在价值表中时返回 None"""
+    options = [(i, option) for i, option in enumerate(game.screen.options)
+               if not option.disabled and f"event:{i}" in scores]
+    if not options:
+        return None
+    return EventOptionAction(max(options, key=lambda item: scores[f"event:{item[0]}"])[1])
+
+
+def choose_grid_action(game, scores):
+    """升级 / 删除选牌界面：选择推荐分最高的一张；其他选牌界面返回 None"""
+    screen = game.screen
+    if not (getattr(screen, "for_upgrade", False) or getattr(screen, "for_purge", False)):
+        return None
+    if getattr(screen, "num_cards", 1) != 1 or getattr(screen, "selected_cards", None):
+        return None
+    cards = [card for card in screen.cards if card.uuid in scores]
+    if not cards:
+        return None
+    return CardSelectAction([max(cards, key=lambda card: scores[card.uuid])])
@@ -0,0 +1,266 @@
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from src.agents.heuristic import DEFAULT_WEIGHTS
+
+logger = logging.getLogger(__name__)
+
+# 与 heuristic.score_hand 保持一致的关键词
+VULNERABLE_KEYWORDS = ["bash", "terror", "shockwave", "uppercut", "thunderclap", "beam cell"]
+
+TYPE_OTHER, TYPE_ATTACK, TYPE_SKILL, TYPE_POWER = 0, 1, 2, 3
+
+# 一批编码后的战斗状态。
+# 状态级字段形状为 [B]，手牌字段为 [B, H]，怪物字段为 [B, M]；超出实际数量的位置由 *_mask 标记。
+EncodedBatch = namedtuple("EncodedBatch", [
+    "uuids",            # list[list[str]]，用于把分数映射回卡牌
+    "energy", "block", "hp", "strength", "incoming", "is_attacked", "curl_up",
+    "race_enabled", "forecast_damage", "forecast_block", "next_turn_damage",
+    "card_mask", "cost", "card_type", "is_strike_id", "is_strike", "is_bash", "is_vulnerable", "is_block",
+    "monster_mask", "monster_hp",
+])
+
+
+def _card_type_code(card_type):
+    name = str(card_type).split(".")[-1]
+    return {"ATTACK": TYPE_ATTACK, "SKILL": TYPE_SKILL, "POWER": TYPE_POWER}.get(name, TYPE_OTHER)
+
+
+# 每种卡牌 (card_id, name, type) 的静态特征只计算一次：
+# 编码时手牌只记录其在 _card_codes 中的编号，特征列由 _card_features[编号] 一次性取出。
+# _card_codes 按 card_id -> name -> type 嵌套，查表时不为每张牌创建元组键
+# (大批量编码时容器分配会频繁触发垃圾回收，其耗时与存活的 Game 对象数成正比)
+_card_codes = {}
+_card_features = []  # [(card_type, is_strike_id, is_strike, is_bash, is_vulnerable, is_block)]
+_NO_CODES = {}
+
+
+def _card_code(card):
+    by_type = _card_codes.get(card.card_id, _NO_CODES).get(card.name, _NO_CODES)
+    code = by_type.get(card.type)
+    if code is None:
+        by_type = _card_codes.setdefault(card.card_id, {}).setdefault(card.name, {})
+        lower_id = card.card_id.lower()
+        _card_features.append((
+            _card_type_code(card.type),
+            "strike" in lower_id,
+            "strike" in lower_id or "打击" in card.name.lower(),
+            "bash" in lower_id,
+            any(k in lower_id for k in VULNERABLE_KEYWORDS),
+            "Defend" in card.card_id or "Block" in card.name or "Wall" in card.name or "防御" in card.name,
+        ))
+        code = by_type[card.type] = len(_card_features) - 1
+    return code
+
+
+def encode_states(games, forecasts=None, move_predictor=None):
+    """
+    将一组 spirecomm Game 对象编码为定长 numpy 数组。
+    forecasts (与 games 等长的 TurnForecast 列表) 和 move_predictor 同时给出时启用"抢攻"判断，
+    与 score_hand 的参数含义一致。
+    逐状态的循环只收集 Python 列表，数组在最后一次性构造；卡牌的字符串特征按卡牌种类查表。
+    """
+    n = len(games)
+    race = forecasts is not None and move_predictor is not None
+    # 状态级字段：每个状态一行
+    # (energy, block, hp, strength, incoming, curl_up, is_attacked, forecast_damage, forecast_block, next_turn_damage)
+    state_rows = [(0, 0, 0, 0, 0, 0, False, 0.0, 0.0, 0.0)] * n
+    race_enabled = np.zeros(n, dtype=bool)
+    # 手牌 / 怪物：展平后的 (行, 列) 坐标与取值
+    card_rows, card_cols, card_costs, codes = [], [], [], []
+    monster_rows, monster_cols, monster_hps = [], [], []
+    uuids = []
+    max_hand = max_monsters = 1
+
+    for i, game in enumerate(games):
+        hand = game.hand or []
+        uuids.append([c.uuid for c in hand])
+        if not hand:
+            continue
+        player = game.player
+        strength = next((p.amount for p in player.powers if p.power_id == "Strength"), 0)
+
+        monsters = [m for m in game.monsters if not m.is_gone and not m.half_dead]
+        incoming = curl_up = 0
+        is_attacked = False
+        for j, m in enumerate(monsters):
+            monster_rows.append(i)
+            monster_cols.append(j)
+            monster_hps.append(m.current_hp)
+            if m.intent.is_attack():
+                is_attacked = True
+                incoming += (m.move_adjusted_damage or 0) * (m.move_hits or 1)
+            for p in m.powers:
+                if p.power_id == "Curl Up":
+                    curl_up += p.amount
+        max_monsters = max(max_monsters, len(monsters))
+
+        forecast_damage = forecast_block = next_turn_damage = 0.0
+        if race and forecasts[i]:
+            race_enabled[i] = True
+            forecast_damage = forecasts[i].expected_damage
+            forecast_block = forecasts[i].expected_block
+            if monsters:
+                next_turn_damage = move_predictor.expected_incoming(monsters, turns=2)[1]
+
+        state_rows[i] = (player.energy, player.block, player.current_hp, strength, incoming, curl_up,
+                         is_attacked, forecast_damage, forecast_block, next_turn_damage)
+
+        card_rows.extend([i] * len(hand))
+        card_cols.extend(range(len(hand)))
+        for card in hand:
+            card_costs.append(card.cost)
+            codes.append(_card_code(card))
+        max_hand = max(max_hand, len(hand))
+
+    states = np.array(state_rows, dtype=np.float64).reshape(n, 10)
+    energy, block, hp, strength, incoming, curl_up = (states[:, k].astype(np.int64) for k in range(6))
+    is_attacked = states[:, 6].astype(bool)
+    forecast_damage, forecast_block, next_turn_damage = (states[:, k].copy() for k in range(7, 10))
+
+    # 手牌：按卡牌编号取出特征表的行，再按 (行, 列) 坐标一次性写入 [B, H]
+    h = lambda dtype: np.zeros((n, max_hand), dtype=dtype)
+    card_mask, cost, card_type = h(bool), h(np.int64), h(np.int64)
+    flags = [h(bool) for _ in range(5)]
+    if codes:
+        where = (np.array(card_rows), np.array(card_cols))
+        card_mask[where] = True
+        cost[where] = card_costs
+        features = np.array(_card_features, dtype=np.int64)[np.array(codes)]
+        card_type[where] = features[:, 0]
+        for k, flag in enumerate(flags):
+            flag[where] = features[:, k + 1]
+    is_strike_id, is_strike, is_bash, is_vulnerable, is_block = flags
+
+    monster_mask = np.zeros((n, max_monsters), dtype=bool)
+    monster_hp = np.zeros((n, max_monsters), dtype=np.int64)
+    if monster_rows:
+        where = (np.array(monster_rows), np.array(monster_cols))
+        monster_mask[where] = True
+        monster_hp[where] = monster_hps
+
+    return EncodedBatch(
+        uuids, energy, block, hp, strength, incoming, is_attacked, curl_up,
+        race_enabled, forecast_damage, forecast_block, next_turn_damage,
+        card_mask, cost, card_type, is_strike_id, is_strike, is_bash, is_vulnerable, is_block,
+        monster_mask, monster_hp,
+    )
+
+
+def _greedy_fill(order, include, damage, cost, energy):
+    """
+    按 order 给出的顺序贪心打出 include 中的牌 (能量足够就打)，返回 (总伤害, 剩余能量)。
+    循环只在手牌维度 (<=10) 上进行，批维度全部向量化。
+    """
+    rows = np.arange(order.shape[0])
+    total = np.zeros(order.shape[0], dtype=np.int64)
+    energy = energy.copy()
+    for k in range(order.shape[1]):
+        j = order[:, k]
+        c = cost[rows, j]
+        play = include[rows, j] & (energy >= c)
+        total += np.where(play, damage[rows, j], 0)
+        energy -= np.where(play, c, 0)
+    return total, energy
+
+
+def score_batch(batch, weights=None):
+    """
+    向量化计算整批状态的卡牌评分，返回形状 [B, H] 的 int 数组 (无效位置为 0)。
+    结果与逐个调用 heuristic.score_hand 完全一致 (见 tests/test_batch_scorer.py)。
+    """
+    w = weights or DEFAULT_WEIGHTS
+    b = batch
+    n, max_hand = b.card_mask.shape
+    rows = np.arange(n)
+    strength = b.strength[:, None]
+
+    # --- 战场形势 ---
+    needed_block = np.maximum(0, b.incoming - b.block)
+    in_danger = needed_block > 0
+    critical = b.hp <= b.incoming
+
+    is_attack = b.card_mask & (b.card_type == TYPE_ATTACK)
+    attack_count = is_attack.sum(axis=1)
+
+    # --- 方案 A: 先打第一张易伤牌，再按伤害排序填充其他攻击牌 ---
+    vuln_attack = is_attack & b.is_vulnerable
+    has_vuln_card = vuln_attack.any(axis=1)
+    first_vuln = np.argmax(vuln_attack, axis=1)
+    first_vuln_cost = b.cost[rows, first_vuln]
+    play_vuln = has_vuln_card & (b.energy >= first_vuln_cost)
+    vuln_damage = np.where(b.is_bash[rows, first_vuln], 8, 6) + b.strength
+    damage_a = np.where(play_vuln, vuln_damage, 0)
+    energy_a = b.energy - np.where(play_vuln, first_vuln_cost, 0)
+
+    others = is_attack & ~b.is_vulnerable
+    other_damage = np.broadcast_to(6 + strength, b.cost.shape)
+    other_damage = np.where(play_vuln[:, None], np.trunc(other_damage * 1.5).astype(np.int64), other_damage)
+    order_a = np.argsort(-np.where(b.is_strike_id, 6, 5), axis=1, kind="stable")
+    filled_a, _ = _greedy_fill(order_a, others, other_damage, b.cost, energy_a)
+    damage_a = damage_a + filled_a
+
+    # --- 方案 B: 按伤害排序贪心 ---
+    base_b = np.where(b.is_bash, 8, 6)
+    order_b = np.argsort(-base_b, axis=1, kind="stable")
+    damage_b, _ = _greedy_fill(order_b, is_attack, base_b + strength, b.cost, b.energy)
+
+    total_damage = np.maximum(damage_a, damage_b) - b.curl_up
+
+    # --- 斩杀 ---
+    monster_hp = np.where(b.monster_mask, b.monster_hp, np.iinfo(np.int64).max)
+    combo_lethal = (monster_hp <= total_damage[:, None]).any(axis=1)
+
+    estimated = np.where(b.is_strike, 6 + strength, np.where(b.is_bash, 8 + strength, 6))
+    min_hp = monster_hp.min(axis=1)
+    single_lethal = min_hp[:, None] <= estimated
+
+    # --- 防守还是抢攻 ---
+    has_monsters = b.monster_mask.any(axis=1)
+    total_monster_hp = np.where(b.monster_mask, b.monster_hp, 0).sum(axis=1)
+    can_race = (b.race_enabled & in_danger & ~critical & has_monsters & (b.forecast_damage > 0)
+                & (total_damage + b.forecast_damage >= total_monster_hp)
+                & (b.hp - needed_block + b.forecast_block > b.next_turn_damage))
+
+    # --- 逐牌打分 ---
+    score = np.full(b.cost.shape, w["base"], dtype=np.int64)
+    score += np.where(b.cost == 0, w["zero_cost"], np.where(b.cost >= 2, w["high_cost"], 0))
+
+    multi_attack = (attack_count > 1)[:, None]
+    vuln_bonus = b.is_vulnerable & multi_attack
+    attack_bonus = np.where(
+        single_lethal, w["single_lethal"],
+        np.where(
+            combo_lethal[:, None],
+            w["combo_lethal"]
+            + np.where(vuln_bonus, w["combo_vulnerable"] + np.where(b.cost >= 2, w["combo_vulnerable_cost_refund"], 0), 0),
+            w["attack"] + np.where(vuln_bonus, w["vulnerable"], 0) + np.where(can_race[:, None], w["race_attack"], 0)
+        )
+    )
+    score = np.where(b.card_type == TYPE_ATTACK, score + attack_bonus, score)
+
+    defend_bonus = np.where(
+        in_danger[:, None],
+        np.where(can_race, w["defend_race"], w["defend_danger"])[:, None]
+        + np.where(critical, w["defend_critical"], 0)[:, None],
+        w["defend_safe"]
+    )
+    block_card = (b.card_type == TYPE_SKILL) & b.is_block
+    score = np.where(block_card, score + defend_bonus, score)
+    score = np.where(block_card & ~b.is_attacked[:, None], 0, score)
+
+    score = np.where(b.card_type == TYPE_POWER, score + w["power"], score)
+
+    score = np.clip(score, 0, 100)
+    score = np.where(b.cost > b.energy[:, None], 0, score)
+    return np.where(b.card_mask, score, 0)
+
+
+def scores_to_dicts(batch, scores):
+    """把 score_batch 的结果转换回 score_hand 的 {uuid: score} 格式"""
+    results = []
+    for i, uuids in enumerate(batch.uuids):
+        results.append({uuid: int(scores[i, j]) for j, uuid in enumerate(uuids)})
+    return results
@@ -0,0 +1,330 @@
+import json
+import logging
+import os
+from collections import namedtuple
+from typing import Dict
+
+from spirecomm.spire.card import CardType
+
+logger = logging.getLogger(__name__)
+
+# 启发式评分权重。
+# 这些常量最初是针对斩杀/防御两个单元测试手工调出来的，
+# 现在可以由 src/agents/weight_tuner.py 在录制的决策语料上自动搜索。
+DEFAULT_WEIGHTS = {
+    "base": 50,                         # 基础分
+    "zero_cost": 10,                    # 0 费牌
+    "high_cost": -5,                    # 2 费及以上
+    "aoe_per_monster": 20,              # AOE，每个怪物
+    "multi_hit_strength": 10,           # 力量 + 多段攻击
+    "single_lethal": 50,                # 单卡斩杀
+    "combo_lethal": 40,                 # 组合斩杀组件
+    "combo_vulnerable": 25,             # 组合斩杀时的易伤源
+    "combo_vulnerable_cost_refund": 5,  # 抵消易伤源的高费惩罚
+    "attack": 10,                       # 普通攻击
+    "vulnerable": 15,                   # 非斩杀时的易伤源
+    "race_attack": 15,                  # 抢攻时的攻击牌
+    "defend_danger": 30,                # 需要防御时的防御牌
+    "defend_race": 10,                  # 抢攻时的防御牌
+    "defend_critical": 100,             # 可能被击杀时的防御牌
+    "defend_safe": -10,                 # 格挡已足够时的防御牌
+    "power": 20,                        # 能力牌
+}
+
+
+def load_weights(path):
+    """
+    读取权重文件，缺失的项使用默认值。
+    文件不存在或损坏时返回默认权重。
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    if not path or not os.path.exists(path):
+        return weights
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        # 兼容调参工具输出的 {"weights": {...}, "score": ...} 格式
+        data = data.get("weights", data)
+        for key, value in data.items():
+            if key in weights:
+                weights[key] = value
+        logger.info(f"Heuristic weights loaded: {path}")
+    except Exception as e:
+        logger.error(f"Failed to load weights from {path}: {e}")
+    return weights
+
+
+def save_weights(weights, path, **meta):
+    """保存权重 (附带调参得分等元数据)"""
+    data = {"weights": weights}
+    data.update(meta)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+# 战场形势分析结果 (analyze_battle 的返回值)
+BattleAnalysis = namedtuple("BattleAnalysis", [
+    "monsters", "monster_count", "incoming_damage", "is_attacked", "is_in_danger", "is_critical",
+    "has_strength", "strength_amt", "attack_cards", "total_hand_damage", "can_kill_monster_map", "can_race",
+])
+
+
+def max_hand_damage(attack_cards, energy, strength_amt):
+    """
+    考虑能量限制和卡牌组合，计算当前回合攻击牌能造成的最大伤害 (未扣除 Curl Up)。
+    只依赖攻击牌的 card_id / cost、能量和力量，规则引擎按这些值缓存结果。
+    """
+    # 简单的背包问题解法 (Greedy approach for max damage)
+    # 方案 A: 优先打出易伤牌 (Vulnerable Priority)
+    damage_a = 0
+    energy_a = energy
+    has_vulnerable = False
+
+    # 寻找易伤源
+    vulnerable_cards = [c for c in attack_cards if "bash" in c.card_id.lower() or "terror" in c.card_id.lower() or "shockwave" in c.card_id.lower() or "uppercut" in c.card_id.lower() or "thunderclap" in c.card_id.lower() or "beam cell" in c.card_id.lower()]
+    other_attacks = [c for c in attack_cards if c not in vulnerable_cards]
+
+    if vulnerable_cards and energy_a >= vulnerable_cards[0].cost:
+        vuln_card = vulnerable_cards[0]
+        # 计算易伤牌伤害
+        base_dmg = 6
+        if "bash" in vuln_card.card_id.lower(): base_dmg = 8
+        damage_a += base_dmg + strength_amt
+        energy_a -= vuln_card.cost
+        has_vulnerable = True
+
+    # 填充剩余能量
+    sorted_others = sorted(other_attacks, key=lambda c: 6 if "strike" in c.card_id.lower() else 5, reverse=True) # 简单按伤害排序
+    for card in sorted_others:
+        if energy_a >= card.cost:
+            base_dmg = 6
+            if "strike" in card.card_id.lower(): base_dmg = 6
+            final_dmg = base_dmg + strength_amt
+            if has_vulnerable:
+                final_dmg = int(final_dmg * 1.5)
+            damage_a += final_dmg
+            energy_a -= card.cost
+
+    # 方案 B: 纯伤害最大化 (Pure Damage)
+    # 简单按 D/C (Damage Per Cost) 排序? 或者直接按伤害高低填入
+    # 这里简化为按伤害排序
+    damage_b = 0
+    energy_b = energy
+    all_sorted = sorted(attack_cards, key=lambda c: 8 if "bash" in c.card_id.lower() else 6, reverse=True)
+    for card in all_sorted:
+        if energy_b >= card.cost:
+            base_dmg = 6
+            if "bash" in card.card_id.lower(): base_dmg = 8
+            damage_b += base_dmg + strength_amt
+            energy_b -= card.cost
+
+    return max(damage_a, damage_b)
+
+
+def race_possible(player, monsters, needed_block, total_hand_damage, forecast, move_predictor):
+    """本回合 + 下回合预计伤害足以清场，且本回合漏伤后下回合仍能扛住"""
+    two_turn_damage = total_hand_damage + forecast.expected_damage
+    hp_after_turn = player.current_hp - needed_block
+    next_turn_damage = move_predictor.expected_incoming(monsters, turns=2)[1]
+    return (two_turn_damage >= sum(m.current_hp for m in monsters)
+            and hp_after_turn + forecast.expected_block > next_turn_damage)
+
+
+def analyze_battle(game, forecast=None, move_predictor=None):
+    """
+    分析战场形势 (与具体卡牌无关的部分)：预计伤害、危险程度、本回合最大伤害、斩杀与抢攻判断。
+    score_hand 和规则引擎 (src/agents/scoring_rules.py) 共用。
+    """
+    # --- 1. 分析战场形势 (Analyze Battle State) ---
+    player = game.player
+    monsters = [m for m in game.monsters if not m.is_gone and not m.half_dead]
+    monster_count = len(monsters)
+
+    # 计算即将受到的总伤害
+    incoming_damage = 0
+    is_attacked = False
+    for m in monsters:
+        if m.intent.is_attack():
+            is_attacked = True
+            # 注意：move_adjusted_damage 是单次伤害，如果有多次攻击(move_hits)，需要乘算
+            damage = m.move_adjusted_damage or 0
+            hits = m.move_hits or 1
+            incoming_damage += damage * hits
+
+    # 计算需要的格挡
+    needed_block = max(0, incoming_damage - player.block)
+    is_in_danger = needed_block > 0
+    is_critical = player.current_hp <= incoming_damage # 可能会死
+
+    # 检查自身 Buff
+    has_strength = False
+    strength_amt = 0
+    for p in player.powers:
+        if p.power_id == "Strength":
+            has_strength = True
+            strength_amt = p.amount
+            break
+
+    # --- 2. 预计算：最大可造成伤害 (Pre-calculate Max Possible Damage) ---
+    attack_cards = [c for c in game.hand if c.type == CardType.ATTACK]
+    total_hand_damage = max_hand_damage(attack_cards, player.energy, strength_amt)
+
+    # 修正：考虑怪物格挡/蜷身 (Curl Up Adjustment)
+    # 如果怪物有 Curl Up，总伤害需要减去 3 (假设我们会触发它)
+    # 这里简单对所有怪物做保守估计
+    for m in monsters:
+         for p in m.powers:
+             if p.power_id == "Curl Up":
+                 total_hand_damage -= p.amount
+
+    # 检查是否对某个怪物有斩杀能力 (Total Lethal Check)
+    # 如果总伤害足以杀死某个怪物，那么所有攻击牌的价值都应提升
+    can_kill_monster_map = {} # monster_index -> boolean
+    for m in monsters:
+        if m.current_hp <= total_hand_damage:
+            can_kill_monster_map[m.monster_index] = True
+
+    # 防守还是抢攻 (Defend or Race)
+    # 本回合 + 下回合预计伤害足以清场，且本回合漏伤后下回合仍能扛住，则优先抢攻
+    can_race = False
+    if forecast and move_predictor and is_in_danger and not is_critical and monsters and forecast.expected_damage > 0:
+        can_race = race_possible(player, monsters, needed_block, total_hand_damage, forecast, move_predictor)
+
+    return BattleAnalysis(monsters, monster_count, incoming_damage, is_attacked, is_in_danger, is_critical,
+                          has_strength, strength_amt, attack_cards, total_hand_damage, can_kill_monster_map, can_race)
+
+
+def score_hand(game, weights=None, forecast=None, move_predictor=None) -> Dict[str, int]:
+    """
+    基于 Bottled AI 逻辑的启发式推荐引擎。
+    优先逻辑：
+    1. 斩杀 (Lethal)
+    2. 保命 (Survival)
+    3. 高效 (Efficiency)
+    4. AOE 识别 (AOE Check)
+    5. 力量加成 (Strength Scaling)
+
+    weights 为各项加减分权重 (默认 DEFAULT_WEIGHTS)；
+    forecast / move_predictor 用于"防守还是抢攻"判断，缺省时不启用该判断。
+    """
+    w = weights or DEFAULT_WEIGHTS
+    recommendations = {}
+    if not game or not game.hand:
+        return recommendations
+
+    # --- 1. 分析战场形势 / 2. 预计算最大可造成伤害 (见 analyze_battle) ---
+    player = game.player
+    (monsters, monster_count, incoming_damage, is_attacked, is_in_danger, is_critical,
+     has_strength, strength_amt, attack_cards, total_hand_damage, can_kill_monster_map,
+     can_race) = analyze_battle(game, forecast, move_predictor)
+
+    # --- 3. 遍历手牌打分 ---
+    for card in game.hand:
+        score = w["base"] # 基础分
+
+        # --- 基础属性修正 ---
+        # 0费牌通常是好的润滑剂
+        if card.cost == 0:
+            score += w["zero_cost"]
+        # 费用过高惩罚
+        elif card.cost >= 2:
+            score += w["high_cost"]
+
+        # 能量不足直接 0 分
+        if card.cost > player.energy:
+            recommendations[card.uuid] = 0
+            continue
+
+        # --- 核心逻辑 ---
+
+        # A. 攻击牌逻辑
+        if card.type == CardType.ATTACK:
+            estimated_damage = 6 # 默认值
+            is_aoe = False
+            is_multi_hit = False
+
+            # 关键词检测
+            lower_name = card.name.lower()
+            lower_id = card.card_id.lower()
+
+            # 易伤源识别 (Vulnerable Source)
+            is_vulnerable_source = False
+            vulnerable_keywords = ["bash", "terror", "shockwave", "uppercut", "thunderclap", "beam cell"]
+            if any(k in lower_id for k in vulnerable_keywords):
+                is_vulnerable_source = True
+
+            # AOE 加分
+            if is_aoe and monster_count > 1:
+                score += w["aoe_per_monster"] * monster_count # 怪物越多越强
+
+            # 力量加成对多段攻击的加分
+            if has_strength and is_multi_hit:
+                score += w["multi_hit_strength"] + (strength_amt * 2) # 力量越高，多段攻击价值越高
+
+            # 斩杀判断 (Lethal Logic)
+            is_lethal_contributor = False
+
+            # A. 单卡斩杀 (Single Card Lethal)
+            estimated_damage = 6 # 默认值
+            if "strike" in lower_id or "打击" in lower_name: estimated_damage = 6 + strength_amt
+            elif "bash" in lower_id: estimated_damage = 8 + strength_amt
+
+            single_card_lethal = False
+            for m in monsters:
+                if m.current_hp <= estimated_damage:
+                    single_card_lethal = True
+                    break
+
+            # B. 组合斩杀 (Combo Lethal)
+            # 如果这张卡是攻击牌，且全队总伤害能造成击杀，这张卡就是斩杀组件
+            combo_lethal = False
+            for m in monsters:
+                if can_kill_monster_map.get(m.monster_index, False):
+                    combo_lethal = True
+                    break
+
+            if single_card_lethal:
+                score += w["single_lethal"] # 单卡直接斩杀，极高优先级
+            elif combo_lethal:
+                score += w["combo_lethal"] # 组合斩杀组件，高优先级
+
+                # 关键修正：如果是易伤源，且有后续伤害，给予额外加分以确保先手打出
+                if is_vulnerable_source and len(attack_cards) > 1:
+                     score += w["combo_vulnerable"] # 确保超过普通打击 (40 vs 40+25)
+                     # 抵消高费用的惩罚
+                     if card.cost >= 2:
+                         score += w["combo_vulnerable_cost_refund"]
+            else:
+                score += w["attack"] # 普通攻击加分
+
+                # 非斩杀情况下的易伤也很重要
+                if is_vulnerable_source and len(attack_cards) > 1:
+                    score += w["vulnerable"]
+
+                # 抢攻：两回合内可清场，攻击优先
+                if can_race:
+                    score += w["race_attack"]
+
+        # B. 防御牌逻辑
+        elif card.type == CardType.SKILL:
+            # 假设是防御牌 (包含 Defend, Block 等关键词)
+            is_block_card = "Defend" in card.card_id or "Block" in card.name or "Wall" in card.name or "防御" in card.name
+            if is_block_card:
+                if not is_attacked:
+                    # 负面状态：如果敌人不攻击，防御牌分数归零
+                    score = 0
+                elif is_in_danger:
+                    # 需要防御时，防御牌很重要；抢攻时降低防御优先级
+                    score += w["defend_race"] if can_race else w["defend_danger"]
+                    if is_critical:
+                        score += w["defend_critical"] # 快死了，必须防御
+                else:
+                    score += w["defend_safe"] # 不需要防御时，防御牌价值降低
+
+        # C. 能力牌逻辑
+        elif card.type == CardType.POWER:
+            score += w["power"] # 能力牌通常越早打越好
+
+        recommendations[card.uuid] = min(100, max(0, score)) # 限制在 0-100
+
+    return recommendations
@@ -0,0 +1,219 @@
+import logging
+from typing import Dict, List, Tuple
+
+from src.core.choices import ScreenChoice, scale_scores
+from src.core.eval_cache import fingerprint
+from src.core.mailbox import EvaluationCancelled
+
+logger = logging.getLogger(__name__)
+
+# 路线估值逻辑 (node_weight / 分桶方式) 变化时递增，使持久化缓存中的旧结果失效
+PLANNER_VERSION = "map-1"
+
+NODE_LABELS = {
+    "M": "Monster",
+    "E": "Elite",
+    "R": "Rest",
+    "$": "Shop",
+    "?": "Event",
+    "T": "Treasure",
+}
+
+
+def node_weight(symbol, hp_ratio, deck_strength, gold=0):
+    """
+    单个节点的即时价值。
+    - 精英: 奖励 (遗物) 高，但血量低、卡组弱时风险极大
+    - 篝火: 血量越低价值越高，满血时仍有升级卡牌的价值
+    - 商店: 金币越多价值越高
+    """
+    risk = 1.0 - hp_ratio
+    if symbol == "E":
+        return 6.0 * deck_strength * hp_ratio - 5.0 * risk
+    if symbol == "M":
+        return 1.5 - 2.0 * risk
+    if symbol == "R":
+        return 1.0 + 6.0 * risk
+    if symbol == "$":
+        return min(3.0, gold / 100.0)
+    if symbol == "?":
+        return 1.2
+    if symbol == "T":
+        return 2.5
+    return 0.0
+
+
+def estimate_deck_strength(deck):
+    """
+    粗略估计卡组强度 (0~1)：非初始卡和升级卡占比越高越强。
+    初始卡组 (打击/防御/痛击) 约为 0.3。
+    """
+    if not deck:
+        return 0.3
+    improved = 0
+    for card in deck:
+        rarity = getattr(getattr(card, "rarity", None), "name", "")
+        if rarity != "BASIC":
+            improved += 1
+        if getattr(card, "upgrades", 0) > 0:
+            improved += 1
+    return min(1.0, 0.3 + 0.7 * improved / len(deck))
+
+
+class MapPlanner:
+    """
+    地图路线规划器。
+    在节点 DAG 上做动态规划：V(n) = w(n) + max(V(child))，
+    每张地图只做一次全量计算；玩家前进时只要血量/卡组强度分桶不变就直接复用，
+    分桶变化时只重算当前节点可达的子图。
+    传入 cache (EvalCache) 时，整张地图在某一分桶下的全量结果会持久化，跨会话直接复用。
+    每个 MAP 状态只计算廉价的进程内地图键 (hash)；跨进程稳定的指纹 (含连边的 SHA1) 只在
+    地图或分桶变化、需要读写缓存时计算，每张地图一次。
+    各方法的 cancel 参数为取消令牌 (如 StateMailbox)：计算途中 cancel.cancelled 变为 True 时
+    放弃本次计算并抛出 EvaluationCancelled，未完成的结果不会被当作有效结果复用。
+    """
+
+    def __init__(self, hp_buckets=10, strength_buckets=5, cache=None):
+        self.hp_buckets = hp_buckets
+        self.strength_buckets = strength_buckets
+        self.cache = cache
+        self._map_key = None
+        self._fingerprint = None  # (map_key, 持久化指纹)
+        self._context = None
+        self._values: Dict[Tuple[int, int], float] = {}
+        self.full_computations = 0
+        self.partial_computations = 0
+        self.cache_hits = 0
+
+    def _get_map_key(self, game):
+        nodes = []
+        for row in game.map.nodes.values():
+            for node in row.values():
+                nodes.append((node.x, node.y, node.symbol))
+        nodes.sort()
+        return (game.act, hash(tuple(nodes)))
+
+    def _cache_key(self, game, map_key, context):
+        """持久化缓存的键：地图指纹按 map_key 记住，同一张地图只计算一次"""
+        if self._fingerprint is None or self._fingerprint[0] != map_key:
+            nodes = []
+            for row in game.map.nodes.values():
+                for node in row.values():
+                    children = sorted((c.x, c.y) for c in node.children)
+                    nodes.append((node.x, node.y, node.symbol, children))
+            nodes.sort()
+            self._fingerprint = (map_key, fingerprint(game.act, self.hp_buckets, self.strength_buckets, nodes))
+        return fingerprint(self._fingerprint[1], context)
+
+    def _get_context(self, game):
+        max_hp = getattr(game, "max_hp", 0) or 0
+        hp_ratio = (game.current_hp / max_hp) if max_hp > 0 else 1.0
+        hp_bucket = int(round(hp_ratio * self.hp_buckets))
+        strength = estimate_deck_strength(getattr(game, "deck", []))
+        strength_bucket = int(round(strength * self.strength_buckets))
+        return (hp_bucket, strength_bucket, getattr(game, "gold", 0) // 50)
+
+    def _compute(self, game, nodes, cancel=None):
+        """按 y 从高到低 (靠近 Boss 的一侧先算) 计算给定节点集合的价值，每行检查一次取消令牌"""
+        hp_bucket, strength_bucket, gold_bucket = self._context
+        hp_ratio = hp_bucket / self.hp_buckets
+        deck_strength = strength_bucket / self.strength_buckets
+        gold = gold_bucket * 50
+        current_y = None
+        for node in sorted(nodes, key=lambda n: n.y, reverse=True):
+            if cancel is not None and node.y != current_y:
+                current_y = node.y
+                if cancel.cancelled:
+                    raise EvaluationCancelled()
+            best_child = max((self._values.get((c.x, c.y), 0.0) for c in node.children), default=0.0)
+            self._values[(node.x, node.y)] = node_weight(node.symbol, hp_ratio, deck_strength, gold) + best_child
+
+    def _reachable_from(self, game, start_nodes):
+        seen = {}
+        stack = list(start_nodes)
+        while stack:
+            node = stack.pop()
+            key = (node.x, node.y)
+            if key in seen:
+                continue
+            seen[key] = node
+            stack.extend(node.children)
+        return list(seen.values())
+
+    def _resolve(self, game, node):
+        """Screen 中的节点不带 children，需要映射回地图中的节点"""
+        return game.map.get_node(node.x, node.y) or node
+
+    def update(self, game, cancel=None):
+        """根据当前状态刷新 DP 表，返回 (x, y) -> 路线价值"""
+        if not game.map or not getattr(game.map, "nodes", None):
+            return {}
+
+        map_key = self._get_map_key(game)
+        context = self._get_context(game)
+
+        if map_key == self._map_key and context == self._context:
+            return self._values
+
+        cache_key = self._cache_key(game, map_key, context) if self.cache else None
+        cached = self.cache.get("map_plan", PLANNER_VERSION, cache_key) if self.cache else None
+        if cached is not None:
+            # 以前的会话 (或其他进程) 已经算过这张地图在当前分桶下的全量结果
+            self._map_key = map_key
+            self._context = context
+            self._values = {tuple(map(int, k.split(","))): v for k, v in cached.items()}
+            self.cache_hits += 1
+        elif map_key != self._map_key:
+            # 新地图：全量预计算
+            self._map_key = map_key
+            self._context = context
+            self._values = {}
+            all_nodes = [n for row in game.map.nodes.values() for n in row.values()]
+            try:
+                self._compute(game, all_nodes, cancel)
+            except EvaluationCancelled:
+                self._map_key = None
+                raise
+            self.full_computations += 1
+            if self.cache:
+                self.cache.put("map_plan", PLANNER_VERSION, cache_key,
+                               {f"{x},{y}": v for (x, y), v in self._values.items()})
+        else:
+            # 同一张地图但血量/卡组分桶变化：只重算可达子图
+            self._context = context
+            next_nodes = [self._resolve(game, n) for n in getattr(game.screen, "next_nodes", [])]
+            try:
+                self._compute(game, self._reachable_from(game, next_nodes), cancel)
+            except EvaluationCancelled:
+                self._context = None
+                raise
+            self.partial_computations += 1
+
+        return self._values
+
+    def rank_next_nodes(self, game, cancel=None) -> List[Tuple[object, float]]:
+        """对下一步可选节点按路线价值排序"""
+        values = self.update(game, cancel)
+        ranked = []
+        for node in getattr(game.screen, "next_nodes", []):
+            ranked.append((node, values.get((node.x, node.y), 0.0)))
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return ranked
+
+    def get_recommendations(self, game, cancel=None):
+        """
+        生成可直接广播给 UI 的选项和推荐分。
+        返回 (choices, recommendations)。
+        """
+        if getattr(game.screen, "boss_available", False):
+            choice = ScreenChoice(uuid="boss", name="Boss", cost=0, type="MAP_NODE")
+            return [choice], {"boss": 100}
+
+        choices = []
+        values = {}
+        for node, value in self.rank_next_nodes(game, cancel):
+            uuid = f"{node.x},{node.y}"
+            label = NODE_LABELS.get(node.symbol, node.symbol)
+            choices.append(ScreenChoice(uuid=uuid, name=f"{label} ({node.x},{node.y})", cost=0, type="MAP_NODE"))
+            values[uuid] = value
+        return choices, scale_scores(values)
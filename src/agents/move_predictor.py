@@ -0,0 +1,271 @@
+"""
+怪物行动预测：按 monster_id 的马尔可夫转移表估计未来几回合的期望伤害。
+
+手工表 (DEFAULT_MOVE_TABLES) 之外，可以从 --record-raw 录制的原始消息中学习转移概率和各行动的基础伤害，
+写入 data/monster_moves.json，GameBridge 启动时与手工表合并加载 (文件优先)。
+
+用法:
+    python -m src.main --record-raw data/raw_messages.jsonl
+    python -m src.agents.move_predictor data/raw_messages.jsonl                  # 写入 data/monster_moves.json
+    python -m src.agents.move_predictor raw/*.jsonl --prior-weight 10 --output /tmp/moves.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+# 与 main.py 相同：确保可以导入 src
+root_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(root_path, "data")
+
+# 手工指定的怪物行动模式 (基于游戏源码的一阶近似)
+# monster_id -> {"damage": {move_id: 单回合总基础伤害}, "transitions": {move_id: {next_move_id: 概率}}}
+# 转移表中的 None 表示战斗开始时 (尚无上一个行动)
+DEFAULT_MOVE_TABLES = {
+    "Cultist": {
+        # 3: 咒语 (Incantation), 1: 暗黑打击 (Dark Strike)
+        "damage": {3: 0, 1: 6},
+        "transitions": {None: {3: 1.0}, 3: {1: 1.0}, 1: {1: 1.0}},
+    },
+    "JawWorm": {
+        # 1: 撕咬 (Chomp), 2: 痛殴 (Thrash), 3: 咆哮 (Bellow)
+        "damage": {1: 11, 2: 7, 3: 0},
+        "transitions": {
+            None: {1: 1.0},
+            1: {2: 0.4, 3: 0.6},
+            2: {1: 0.25, 2: 0.3, 3: 0.45},
+            3: {1: 0.45, 2: 0.55},
+        },
+    },
+    "FuzzyLouseNormal": {
+        # 3: 啃咬 (Bite), 4: 成长 (Grow)
+        "damage": {3: 6, 4: 0},
+        "transitions": {None: {3: 0.75, 4: 0.25}, 3: {3: 0.75, 4: 0.25}, 4: {3: 0.75, 4: 0.25}},
+    },
+    "FuzzyLouseDefensive": {
+        # 3: 啃咬 (Bite), 4: 吐网 (Spit Web)
+        "damage": {3: 6, 4: 0},
+        "transitions": {None: {3: 0.75, 4: 0.25}, 3: {3: 0.75, 4: 0.25}, 4: {3: 0.75, 4: 0.25}},
+    },
+}
+
+
+class CompiledMoveTable:
+    """
+    单个怪物的紧凑预计算表。
+    row_index: move_id -> 行号 (最后一行对应 "未知/开局")
+    expected_damage[k, row]: 当前行动为 row 时，第 k 回合之后的期望伤害 (k=0 为本回合)
+    """
+    __slots__ = ("row_index", "expected_damage")
+
+    def __init__(self, table, horizon):
+        move_ids = sorted(table["damage"])
+        n = len(move_ids)
+        self.row_index = {m: i for i, m in enumerate(move_ids)}
+        self.row_index[None] = n
+
+        damage = np.array([table["damage"][m] for m in move_ids] + [0.0], dtype=np.float64)
+        transitions = np.zeros((n + 1, n + 1), dtype=np.float64)
+        for src, dist in table["transitions"].items():
+            row = self.row_index.get(src)
+            if row is None:
+                continue
+            total = sum(dist.values())
+            for dst, p in dist.items():
+                if dst in self.row_index and total > 0:
+                    transitions[row, self.row_index[dst]] = p / total
+
+        # 预计算 T^k @ damage，查询时只需一次索引
+        self.expected_damage = np.zeros((horizon + 1, n + 1), dtype=np.float64)
+        vec = damage
+        self.expected_damage[0] = vec
+        for k in range(1, horizon + 1):
+            vec = transitions @ vec
+            self.expected_damage[k] = vec
+
+
+class MovePredictor:
+    """
+    怪物行动预测器。
+    按 monster_id 维护马尔可夫转移表 (手工指定 + 从录制对局中学习)，
+    编译成 numpy 数组后以 O(1) 查询多回合期望伤害。
+    """
+
+    def __init__(self, tables=None, horizon=3):
+        self.horizon = horizon
+        self.tables = dict(tables or {})
+        self._compiled = {}
+        self.compile()
+
+    @classmethod
+    def default(cls, horizon=3):
+        return cls(DEFAULT_MOVE_TABLES, horizon=horizon)
+
+    def compile(self):
+        self._compiled = {mid: CompiledMoveTable(t, self.horizon) for mid, t in self.tables.items()}
+
+    def expected_damage(self, monster, turns_ahead=1):
+        """
+        monster 在 turns_ahead 回合后的期望伤害。
+        本回合 (turns_ahead=0) 直接使用游戏给出的意图伤害；未知怪物假设保持当前行动。
+        """
+        current = 0
+        if monster.intent.is_attack():
+            current = (monster.move_adjusted_damage or 0) * (monster.move_hits or 1)
+        if turns_ahead <= 0:
+            return current
+
+        compiled = self._compiled.get(monster.monster_id)
+        move_id = getattr(monster, "move_id", None)
+        if compiled is None or move_id is None or move_id not in compiled.row_index:
+            return current
+        k = min(turns_ahead, self.horizon)
+        expected = float(compiled.expected_damage[k, compiled.row_index[move_id]])
+
+        # 力量/虚弱等修正：按当前行动的 实际伤害/基础伤害 比例缩放
+        base = getattr(monster, "move_base_damage", 0) or 0
+        adjusted = monster.move_adjusted_damage or 0
+        if base > 0 and adjusted > 0:
+            expected *= adjusted / base
+        return expected
+
+    def expected_incoming(self, monsters, turns=2):
+        """未来若干回合 (含本回合) 的总期望伤害列表，供评分和推演使用"""
+        alive = [m for m in monsters if not m.is_gone and not m.half_dead]
+        return [sum(self.expected_damage(m, k) for m in alive) for k in range(turns)]
+
+    def fit_sessions(self, paths, prior_weight=5.0):
+        """
+        从录制的 CommunicationMod 消息 (JSONL，每行一条) 中学习转移表。
+        同一战斗、同一回合、同一怪物只计数一次；
+        手工表作为先验，按 prior_weight 次伪观测与学到的计数混合。
+        伤害学习 move_base_damage (不含力量 / 虚弱)，修正在 expected_damage 中按当前意图统一缩放。
+        返回学到的怪物数。
+        """
+        counts = defaultdict(lambda: defaultdict(lambda: defaultdict(float)))
+        damage_sum = defaultdict(lambda: defaultdict(float))
+        damage_n = defaultdict(lambda: defaultdict(int))
+        seen = set()
+
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        message = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    game_state = message.get("game_state") or {}
+                    combat = game_state.get("combat_state")
+                    if not combat:
+                        continue
+                    for index, m in enumerate(combat.get("monsters", [])):
+                        key = (path, game_state.get("floor"), combat.get("turn"), index)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        monster_id = m.get("id")
+                        move_id = m.get("move_id")
+                        if monster_id is None or move_id is None:
+                            continue
+                        counts[monster_id][m.get("last_move_id")][move_id] += 1
+                        hits = m.get("move_hits") or 1
+                        damage = max(0, m.get("move_base_damage") or 0) * hits
+                        damage_sum[monster_id][move_id] += damage
+                        damage_n[monster_id][move_id] += 1
+
+        for monster_id, by_src in counts.items():
+            prior = self.tables.get(monster_id, {"damage": {}, "transitions": {}})
+            damage = dict(prior["damage"])
+            for move_id, n in damage_n[monster_id].items():
+                damage[move_id] = damage_sum[monster_id][move_id] / n
+            transitions = {}
+            for src in set(by_src) | set(prior["transitions"]):
+                merged = defaultdict(float)
+                for dst, p in prior["transitions"].get(src, {}).items():
+                    merged[dst] += p * prior_weight
+                for dst, c in by_src.get(src, {}).items():
+                    merged[dst] += c
+                transitions[src] = dict(merged)
+            self.tables[monster_id] = {"damage": damage, "transitions": transitions}
+
+        self.compile()
+        logger.info(f"Move tables fitted for {len(counts)} monsters")
+        return len(counts)
+
+    def save(self, path):
+        """以 JSON 保存转移表 (None 键存为 "start")"""
+        data = {}
+        for monster_id, table in self.tables.items():
+            data[monster_id] = {
+                "damage": {str(k): v for k, v in table["damage"].items()},
+                "transitions": {
+                    ("start" if src is None else str(src)): {str(k): v for k, v in dist.items()}
+                    for src, dist in table["transitions"].items()
+                },
+            }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+
+    @classmethod
+    def load(cls, path, horizon=3):
+        """加载已保存的转移表，与手工表合并 (文件优先)；文件损坏时只使用手工表"""
+        tables = dict(DEFAULT_MOVE_TABLES)
+        if not path or not os.path.exists(path):
+            return cls(tables, horizon=horizon)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            learned = {}
+            for monster_id, table in data.items():
+                learned[monster_id] = {
+                    "damage": {int(k): float(v) for k, v in table["damage"].items()},
+                    "transitions": {
+                        (None if src == "start" else int(src)): {int(k): float(v) for k, v in dist.items()}
+                        for src, dist in table["transitions"].items()
+                    },
+                }
+            predictor = cls(dict(tables, **learned), horizon=horizon)
+            logger.info(f"Monster move tables loaded: {path} ({len(learned)} monsters)")
+            return predictor
+        except Exception as e:
+            logger.error(f"Failed to load monster move tables {path}: {e}")
+            return cls(tables, horizon=horizon)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="raw message recordings (--record-raw)")
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "monster_moves.json"))
+    parser.add_argument("--prior-weight", type=float, default=5.0,
+                        help="pseudo-observations given to the hand-written tables")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    start = time.perf_counter()
+    predictor = MovePredictor.default()
+    try:
+        monsters = predictor.fit_sessions(args.inputs, prior_weight=args.prior_weight)
+    except OSError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    predictor.save(args.output)
+    logger.info(f"{monsters} monsters learned, {len(predictor.tables)} tables "
+                f"[{time.perf_counter() - start:.1f}s] -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
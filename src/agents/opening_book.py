@@ -0,0 +1,245 @@
+"""
+开局库：铁甲战士初始卡组 (Strike_R / Defend_R / Bash) 单怪物战斗的预计算最优出牌。
+
+第一幕前几场战斗的局面很有限：手牌是初始卡组的一个多重集合，能量 0~3，面对一个怪物。
+离线枚举全部局面 (手牌多重集合 x 能量 x 怪物血量 x 需要格挡的伤害 x 怪物是否易伤)，
+对每个局面穷举本回合所有出牌顺序 (记忆化搜索)，记录以每种牌开头的最优路线价值，
+换算为 0~100 推荐分后写入一个紧凑的稠密数组 (data/opening_book.npz)。
+查询时由局面直接算出数组下标，O(1) 读取；不在库内的局面 (其他卡牌、多个怪物、影响伤害的 Buff 等)
+返回 None，由实时评分引擎处理。
+
+分桶：
+- 怪物血量 >= HP_CAP 时本回合不可能击杀 (初始卡组 3 能量最多 27 点伤害)，合并为一档
+- 需要格挡的伤害 >= NEED_CAP 时本回合无法完全格挡，价值随伤害线性变化，不影响最优选择，合并为一档
+
+用法:
+    python -m src.agents.opening_book                       # 生成 data/opening_book.npz
+    python -m src.agents.opening_book --output /tmp/book.npz
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+
+# 与 main.py 相同：确保可以导入 src 和 external/spirecomm
+root_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+sys.path.append(os.path.join(root_path, 'external', 'spirecomm'))
+
+from src.core.choices import scale_scores
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(root_path, "data")
+
+# 局面编码或价值模型变化时递增，旧的开局库文件会被忽略
+BOOK_VERSION = 1
+
+# 初始卡组：card_id -> (费用, 卡组中的张数)
+STARTER_CARDS = {"Strike_R": (1, 5), "Defend_R": (1, 4), "Bash": (2, 1)}
+CARD_ORDER = ("Strike_R", "Defend_R", "Bash")
+CARD_SLOT = {card_id: i for i, card_id in enumerate(CARD_ORDER)}
+
+MAX_HAND = 5
+MAX_ENERGY = 3
+HP_CAP = 28
+NEED_CAP = 16
+
+# 不影响本回合伤害计算的 Buff (怪物力量已计入 move_adjusted_damage)
+IGNORED_MONSTER_POWERS = {"Ritual", "Strength"}
+IGNORED_PLAYER_POWERS = {"Vulnerable"}
+
+# 价值模型：击杀结束战斗 (剩余能量越多越好，即优先直接斩杀)；
+# 否则按造成的伤害减去承受的伤害 (承受伤害权重更高，与启发式"保命优先"一致)
+KILL_VALUE = 100.0
+DAMAGE_WEIGHT = 1.0
+UNBLOCKED_WEIGHT = 1.5
+VULNERABLE_BONUS = 4.0  # 易伤持续到下回合的额外价值
+
+STRIKE_DAMAGE = 6
+BASH_DAMAGE = 8
+DEFEND_BLOCK = 5
+
+# 库中不可打出 (不在手牌或能量不足) 的标记
+UNPLAYABLE = 255
+
+# 全部手牌多重集合 (Strike 数, Defend 数, Bash 数)，下标即库中的手牌编号
+HANDS = [(s, d, b)
+         for s in range(STARTER_CARDS["Strike_R"][1] + 1)
+         for d in range(STARTER_CARDS["Defend_R"][1] + 1)
+         for b in range(STARTER_CARDS["Bash"][1] + 1)
+         if 1 <= s + d + b <= MAX_HAND]
+HAND_INDEX = {hand: i for i, hand in enumerate(HANDS)}
+BOOK_SHAPE = (len(HANDS), MAX_ENERGY + 1, HP_CAP, NEED_CAP + 1, 2, len(CARD_ORDER))
+
+
+def _damage(base, vulnerable):
+    return int(base * 1.5) if vulnerable else base
+
+
+def _after_damage(hp, damage):
+    # HP_CAP 档本回合不可能被击杀，保持在该档
+    return hp if hp >= HP_CAP else hp - damage
+
+
+@lru_cache(maxsize=None)
+def position_value(strikes, defends, bashes, energy, hp, need, vulnerable):
+    """局面价值：结束回合与打出每种牌之后的最优价值中的最大者"""
+    return max(action_values(strikes, defends, bashes, energy, hp, need, vulnerable).values())
+
+
+@lru_cache(maxsize=None)
+def action_values(strikes, defends, bashes, energy, hp, need, vulnerable):
+    """
+    {动作: 价值}，动作为 "end" 或可打出的 card_id。
+    打出一张牌的价值 = 即时收益 + 之后局面的最优价值 (穷举后续所有出牌顺序)。
+    """
+    values = {"end": -UNBLOCKED_WEIGHT * need}
+    if strikes and energy >= 1:
+        damage = _damage(STRIKE_DAMAGE, vulnerable)
+        next_hp = _after_damage(hp, damage)
+        values["Strike_R"] = KILL_VALUE + energy - 1 if next_hp <= 0 else DAMAGE_WEIGHT * damage + position_value(
+            strikes - 1, defends, bashes, energy - 1, next_hp, need, vulnerable)
+    if defends and energy >= 1:
+        values["Defend_R"] = position_value(
+            strikes, defends - 1, bashes, energy - 1, hp, max(0, need - DEFEND_BLOCK), vulnerable)
+    if bashes and energy >= 2:
+        damage = _damage(BASH_DAMAGE, vulnerable)
+        next_hp = _after_damage(hp, damage)
+        bonus = 0.0 if vulnerable else VULNERABLE_BONUS
+        values["Bash"] = KILL_VALUE + energy - 2 if next_hp <= 0 else DAMAGE_WEIGHT * damage + bonus + position_value(
+            strikes, defends, bashes - 1, energy - 2, next_hp, need, True)
+    return values
+
+
+def position_scores(hand, energy, hp, need, vulnerable):
+    """局面中每种牌的推荐分 (按 CARD_ORDER)，不可打出为 UNPLAYABLE"""
+    values = action_values(*hand, energy, hp, need, vulnerable)
+    scores = scale_scores({k: v for k, v in values.items() if k != "end"})
+    return [scores.get(card_id, UNPLAYABLE) for card_id in CARD_ORDER]
+
+
+def build_book():
+    """枚举并求解全部局面，返回 uint8 数组 BOOK_SHAPE"""
+    book = np.full(BOOK_SHAPE, UNPLAYABLE, dtype=np.uint8)
+    for h, hand in enumerate(HANDS):
+        for energy in range(MAX_ENERGY + 1):
+            for hp in range(1, HP_CAP + 1):
+                for need in range(NEED_CAP + 1):
+                    for vulnerable in (0, 1):
+                        book[h, energy, hp - 1, need, vulnerable] = position_scores(
+                            hand, energy, hp, need, bool(vulnerable))
+    return book
+
+
+class OpeningBook:
+    """已生成的开局库；lookup 对库内局面返回 {uuid: 0~100}，其余返回 None"""
+
+    def __init__(self, scores):
+        self.scores = scores
+        # 查询时按下标直接读取字节，避免逐次 numpy 标量索引的开销
+        self._data = np.ascontiguousarray(scores, dtype=np.uint8).tobytes()
+        self.hits = 0
+        self.misses = 0
+
+    def save(self, path):
+        np.savez_compressed(path, scores=self.scores, book_version=BOOK_VERSION)
+
+    @classmethod
+    def load(cls, path):
+        """读取开局库；不存在或版本 / 形状不一致时返回 None"""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if int(data["book_version"]) != BOOK_VERSION or data["scores"].shape != BOOK_SHAPE:
+                    logger.warning(f"Opening book {path} was built by an older version, ignored")
+                    return None
+                book = cls(data["scores"])
+            logger.info(f"Opening book loaded: {path}")
+            return book
+        except Exception as e:
+            logger.error(f"Failed to load opening book {path}: {e}")
+            return None
+
+    @staticmethod
+    def position_key(game):
+        """局面在库中的下标 (hand, energy, hp, need, vulnerable)，不在库内时返回 None"""
+        player = game.player
+        energy = player.energy
+        if not 0 <= energy <= MAX_ENERGY:
+            return None
+        if any(p.power_id not in IGNORED_PLAYER_POWERS for p in player.powers):
+            return None
+
+        counts = [0, 0, 0]
+        for card in game.hand:
+            spec = STARTER_CARDS.get(card.card_id)
+            if spec is None or card.upgrades or card.cost != spec[0]:
+                return None
+            counts[CARD_SLOT[card.card_id]] += 1
+        hand = HAND_INDEX.get(tuple(counts))
+        if hand is None:
+            return None
+
+        monsters = [m for m in game.monsters if not m.is_gone and not m.half_dead]
+        if len(monsters) != 1:
+            return None
+        monster = monsters[0]
+        if monster.block:
+            return None
+        vulnerable = 0
+        for p in monster.powers:
+            if p.power_id == "Vulnerable":
+                vulnerable = 1
+            elif p.power_id not in IGNORED_MONSTER_POWERS:
+                return None
+
+        incoming = 0
+        if monster.intent.is_attack():
+            incoming = (monster.move_adjusted_damage or 0) * (monster.move_hits or 1)
+        need = min(NEED_CAP, max(0, incoming - player.block))
+        hp = min(HP_CAP, monster.current_hp)
+        if hp <= 0:
+            return None
+        return hand, energy, hp - 1, need, vulnerable
+
+    def lookup(self, game):
+        key = self.position_key(game) if game and game.hand else None
+        if key is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        hand, energy, hp, need, vulnerable = key
+        offset = ((((hand * BOOK_SHAPE[1] + energy) * BOOK_SHAPE[2] + hp) * BOOK_SHAPE[3] + need)
+                  * BOOK_SHAPE[4] + vulnerable) * BOOK_SHAPE[5]
+        data = self._data
+        recommendations = {}
+        for card in game.hand:
+            score = data[offset + CARD_SLOT[card.card_id]]
+            recommendations[card.uuid] = 0 if score == UNPLAYABLE else score
+        return recommendations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "opening_book.npz"))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    start = time.perf_counter()
+    book = OpeningBook(build_book())
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    book.save(args.output)
+    positions = int(np.prod(BOOK_SHAPE[:-1]))
+    logger.info(f"Opening book: {positions} positions solved in {time.perf_counter() - start:.1f}s, "
+                f"{os.path.getsize(args.output) / 1024:.0f} KiB -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import logging
+import os
+
+import numpy as np
+
+from src.agents.batch_scorer import VULNERABLE_KEYWORDS, TYPE_ATTACK, TYPE_SKILL, TYPE_POWER, _card_type_code
+
+logger = logging.getLogger(__name__)
+
+# 特征定义变化时递增，旧模型文件会被拒绝加载
+FEATURE_VERSION = 1
+
+FEATURE_NAMES = [
+    # 战场形势
+    "hp_ratio", "energy", "block", "incoming", "in_danger", "critical",
+    "monsters_alive", "min_monster_hp", "total_monster_hp", "strength", "hand_size", "turn",
+    # 卡牌本身
+    "cost", "playable", "zero_cost", "is_attack", "is_skill", "is_power", "is_other",
+    "is_block", "is_strike", "is_vulnerable", "upgraded", "has_target",
+    # 交互项
+    "attack_in_danger", "block_in_danger", "block_critical", "attack_lethal",
+]
+NUM_FEATURES = len(FEATURE_NAMES)
+
+
+def hand_features(game):
+    """
+    为手牌中的每张牌生成一行特征 (float32，形状 [手牌数, NUM_FEATURES])，数值大致落在 0~1。
+    训练 (policy_trainer 的工作进程) 和 Bridge 在线推理使用同一个函数。
+    """
+    hand = game.hand or []
+    features = np.zeros((len(hand), NUM_FEATURES), dtype=np.float32)
+    if not hand:
+        return features
+
+    player = game.player
+    strength = 0
+    for p in player.powers:
+        if p.power_id == "Strength":
+            strength = p.amount
+            break
+    monsters = [m for m in game.monsters if not m.is_gone and not m.half_dead]
+    incoming = sum((m.move_adjusted_damage or 0) * (m.move_hits or 1) for m in monsters if m.intent.is_attack())
+    needed_block = max(0, incoming - player.block)
+    in_danger = float(needed_block > 0)
+    critical = float(player.current_hp <= incoming)
+    min_hp = min((m.current_hp for m in monsters), default=0)
+    # 最弱的怪物能被一张打击 (6 伤害 + 力量) 击杀
+    lethal = float(bool(monsters) and min_hp <= 6 + strength)
+    max_hp = player.max_hp or 1
+
+    features[:, 0] = player.current_hp / max_hp
+    features[:, 1] = player.energy / 3
+    features[:, 2] = player.block / 20
+    features[:, 3] = incoming / 30
+    features[:, 4] = in_danger
+    features[:, 5] = critical
+    features[:, 6] = len(monsters) / 3
+    features[:, 7] = min_hp / 50
+    features[:, 8] = sum(m.current_hp for m in monsters) / 100
+    features[:, 9] = strength / 5
+    features[:, 10] = len(hand) / 10
+    features[:, 11] = min(getattr(game, "turn", 0) or 0, 10) / 10
+
+    for i, card in enumerate(hand):
+        lower_id = card.card_id.lower()
+        type_code = _card_type_code(card.type)
+        cost = player.energy if card.cost == -1 else card.cost
+        is_attack = float(type_code == TYPE_ATTACK)
+        is_block = float(type_code == TYPE_SKILL and ("Defend" in card.card_id or "Block" in card.name
+                                                      or "Wall" in card.name or "防御" in card.name))
+        row = features[i]
+        row[12] = max(cost, 0) / 3
+        row[13] = float(0 <= cost <= player.energy)
+        row[14] = float(cost == 0)
+        row[15] = is_attack
+        row[16] = float(type_code == TYPE_SKILL)
+        row[17] = float(type_code == TYPE_POWER)
+        row[18] = float(type_code not in (TYPE_ATTACK, TYPE_SKILL, TYPE_POWER))
+        row[19] = is_block
+        row[20] = float("strike" in lower_id or "打击" in card.name)
+        row[21] = float(any(k in lower_id for k in VULNERABLE_KEYWORDS))
+        row[22] = float((getattr(card, "upgrades", 0) or 0) > 0)
+        row[23] = float(bool(getattr(card, "has_target", False)))
+        row[24] = is_attack * in_danger
+        row[25] = is_block * in_danger
+        row[26] = is_block * critical
+        row[27] = is_attack * lethal
+    return features
+
+
+def group_softmax(scores, ptr):
+    """按组 (一手牌为一组，ptr 为各组起始偏移，长度 G+1) 计算 softmax"""
+    starts = ptr[:-1]
+    lengths = np.diff(ptr)
+    group_max = np.maximum.reduceat(scores, starts)
+    exp = np.exp(scores - np.repeat(group_max, lengths))
+    sums = np.add.reduceat(exp, starts)
+    return exp / np.repeat(sums, lengths)
+
+
+class PolicyModel:
+    """
+    行为克隆策略：对手牌中每张牌打分 (单隐层 MLP)，同一手牌内做 softmax，
+    概率最高的牌即预测玩家会打出的牌。权重以 .npz 保存，由 src/agents/policy_trainer.py 训练。
+    """
+
+    def __init__(self, w1, b1, w2):
+        self.w1 = w1
+        self.b1 = b1
+        self.w2 = w2
+
+    @classmethod
+    def initialize(cls, hidden=32, seed=0):
+        rng = np.random.default_rng(seed)
+        w1 = (rng.standard_normal((NUM_FEATURES, hidden)) * np.sqrt(2.0 / NUM_FEATURES)).astype(np.float32)
+        return cls(w1, np.zeros(hidden, dtype=np.float32), np.zeros(hidden, dtype=np.float32))
+
+    def forward(self, features):
+        """返回 (每张牌的分数, 隐层激活)"""
+        hidden = np.maximum(features @ self.w1 + self.b1, 0)
+        return hidden @ self.w2, hidden
+
+    def score_hand(self, game):
+        """与 heuristic.score_hand 相同的输出格式：{uuid: 0~100}，能量不足的牌为 0"""
+        hand = game.hand or []
+        if not hand:
+            return {}
+        features = hand_features(game)
+        scores, _ = self.forward(features)
+        probs = group_softmax(scores, np.array([0, len(hand)]))
+        probs = np.where(features[:, 13] > 0, probs, 0)
+        best = probs.max()
+        return {card.uuid: int(round(100 * p / best)) if best > 0 else 0 for card, p in zip(hand, probs)}
+
+    def save(self, path, **meta):
+        np.savez(path, w1=self.w1, b1=self.b1, w2=self.w2,
+                 feature_version=FEATURE_VERSION, feature_names=np.array(FEATURE_NAMES),
+                 **{f"meta_{k}": v for k, v in meta.items()})
+
+    @classmethod
+    def load(cls, path):
+        """读取模型文件；不存在或特征版本不一致时返回 None"""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if int(data["feature_version"]) != FEATURE_VERSION:
+                    logger.warning(f"Policy model {path} uses an old feature set, ignored")
+                    return None
+                model = cls(data["w1"], data["b1"], data["w2"])
+            logger.info(f"Policy model loaded: {path}")
+            return model
+        except Exception as e:
+            logger.error(f"Failed to load policy model from {path}: {e}")
+            return None
@@ -0,0 +1,268 @@
+"""
+行为克隆策略的流式训练工具 (纯 CPU / NumPy)。
+
+语料按块从磁盘流式读取 (不整体载入内存)，由工作进程解析并生成特征，
+主进程在训练当前块的同时，后台已经在处理后面的若干块 (预取)。
+模型是对每张手牌打分的单隐层 MLP，同一手牌内做 softmax，用 Adam 按小批量训练。
+结果写入 data/policy_model.npz，GameBridge 启动时若存在则用它代替启发式打分。
+
+语料格式与 weight_tuner 相同 (JSONL，每行一条)：
+    {"game_state": {...}, "available_commands": [...], "label": "<card uuid 或 card_id>"}
+语料由 src.core.export_decisions 从 --record-raw 录制的原始消息导出。
+
+用法:
+    python -m src.core.export_decisions data/raw_messages.jsonl --output data/decisions.jsonl
+    python -m src.agents.policy_trainer --corpus data/decisions.jsonl --epochs 5
+    python -m src.agents.policy_trainer --corpus a.jsonl b.jsonl --workers 8 --chunk-lines 4000
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+# 与 main.py 相同：确保可以导入 src 和 external/spirecomm
+root_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+sys.path.append(os.path.join(root_path, 'external', 'spirecomm'))
+
+from src.agents.policy_model import PolicyModel, NUM_FEATURES, hand_features, group_softmax
+from src.core.state_view import LazyGameState
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(root_path, "data")
+
+
+def iter_line_chunks(paths, chunk_lines):
+    """按固定行数分块读取一个或多个语料文件 (只保留非空行)"""
+    chunk = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    chunk.append(line)
+                    if len(chunk) >= chunk_lines:
+                        yield chunk
+                        chunk = []
+    if chunk:
+        yield chunk
+
+
+def featurize_lines(lines):
+    """
+    解析一块语料并生成特征 (在工作进程中执行)。
+    返回 (features[N, F], ptr[G+1], labels[G])：第 g 手牌的特征为 features[ptr[g]:ptr[g+1]]，
+    labels[g] 为被打出的牌在该手牌内的下标。无法解析、不在战斗中或找不到标注牌的记录会被跳过。
+    """
+    blocks = []
+    lengths = []
+    labels = []
+    for line in lines:
+        try:
+            message = json.loads(line)
+            label = message["label"]
+            game = LazyGameState(message["game_state"], message.get("available_commands", []))
+            if not game.in_combat:
+                continue
+            hand = game.hand
+        except Exception:
+            continue
+        # 与 weight_tuner 相同：优先匹配 uuid，其次匹配 card_id
+        index = next((i for i, c in enumerate(hand) if c.uuid == label), None)
+        if index is None:
+            index = next((i for i, c in enumerate(hand) if c.card_id == label), None)
+        if index is None:
+            continue
+        blocks.append(hand_features(game))
+        lengths.append(len(hand))
+        labels.append(index)
+
+    if not blocks:
+        return np.zeros((0, NUM_FEATURES), dtype=np.float32), np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    ptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=ptr[1:])
+    return np.concatenate(blocks), ptr, np.array(labels, dtype=np.int64)
+
+
+def featurized_chunks(paths, chunk_lines=2000, workers=1, prefetch=4):
+    """
+    依次产出 featurize_lines 的结果，顺序与语料一致。
+    workers > 1 时由进程池处理，最多同时有 workers * prefetch 块在处理中 (有界预取，内存占用固定)。
+    """
+    chunks = iter_line_chunks(paths, chunk_lines)
+    if workers <= 1:
+        for lines in chunks:
+            yield featurize_lines(lines)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        pending = deque()
+        for lines in chunks:
+            pending.append(pool.apply_async(featurize_lines, (lines,)))
+            if len(pending) >= workers * prefetch:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def shuffle_groups(features, ptr, labels, rng):
+    """在块内打乱手牌顺序 (整手移动，手牌内部顺序不变)"""
+    order = rng.permutation(len(labels))
+    lengths = np.diff(ptr)[order]
+    new_ptr = np.zeros(len(order) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_ptr[1:])
+    # 每张牌在原数组中的下标 = 所在手牌的原起点 + 手牌内偏移
+    offsets = np.arange(new_ptr[-1]) - np.repeat(new_ptr[:-1], lengths)
+    index = np.repeat(ptr[:-1][order], lengths) + offsets
+    return features[index], new_ptr, labels[order]
+
+
+class PolicyTrainer:
+    """小批量 Adam 训练 (交叉熵：被打出的牌在同一手牌 softmax 中的概率)"""
+
+    def __init__(self, model, lr=0.01, batch_size=256, l2=1e-4, seed=0):
+        self.model = model
+        self.lr = lr
+        self.batch_size = batch_size
+        self.l2 = l2
+        self.rng = np.random.default_rng(seed)
+        self.params = ("w1", "b1", "w2")
+        self.m = {k: np.zeros_like(getattr(model, k)) for k in self.params}
+        self.v = {k: np.zeros_like(getattr(model, k)) for k in self.params}
+        self.steps = 0
+
+    def _loss_and_grads(self, features, ptr, labels):
+        model = self.model
+        pre = features @ model.w1 + model.b1
+        hidden = np.maximum(pre, 0)
+        probs = group_softmax(hidden @ model.w2, ptr)
+        label_pos = ptr[:-1] + labels
+        groups = len(labels)
+        loss = -np.log(probs[label_pos] + 1e-12).mean()
+        correct = int((np.maximum.reduceat(probs, ptr[:-1]) <= probs[label_pos]).sum())
+
+        d_scores = probs.copy()
+        d_scores[label_pos] -= 1
+        d_scores /= groups
+        d_hidden = np.outer(d_scores, model.w2)
+        d_hidden[pre <= 0] = 0
+        grads = {
+            "w1": features.T @ d_hidden + self.l2 * model.w1,
+            "b1": d_hidden.sum(axis=0),
+            "w2": hidden.T @ d_scores + self.l2 * model.w2,
+        }
+        return loss, correct, grads
+
+    def _adam_step(self, grads, beta1=0.9, beta2=0.999, eps=1e-8):
+        self.steps += 1
+        for k in self.params:
+            self.m[k] = beta1 * self.m[k] + (1 - beta1) * grads[k]
+            self.v[k] = beta2 * self.v[k] + (1 - beta2) * grads[k] ** 2
+            m_hat = self.m[k] / (1 - beta1 ** self.steps)
+            v_hat = self.v[k] / (1 - beta2 ** self.steps)
+            setattr(self.model, k, (getattr(self.model, k) - self.lr * m_hat / (np.sqrt(v_hat) + eps)).astype(np.float32))
+
+    def train_chunk(self, features, ptr, labels):
+        """在一块数据上训练一遍，返回 (loss 之和, 命中数, 样本数)"""
+        if len(labels) == 0:
+            return 0.0, 0, 0
+        features, ptr, labels = shuffle_groups(features, ptr, labels, self.rng)
+        loss_sum, correct = 0.0, 0
+        for start in range(0, len(labels), self.batch_size):
+            end = min(start + self.batch_size, len(labels))
+            lo, hi = ptr[start], ptr[end]
+            loss, hits, grads = self._loss_and_grads(features[lo:hi], ptr[start:end + 1] - lo, labels[start:end])
+            self._adam_step(grads)
+            loss_sum += loss * (end - start)
+            correct += hits
+        return loss_sum, correct, len(labels)
+
+    def evaluate_chunk(self, features, ptr, labels):
+        """不更新参数，返回 (loss 之和, 命中数, 样本数)"""
+        if len(labels) == 0:
+            return 0.0, 0, 0
+        loss, correct, _ = self._loss_and_grads(features, ptr, labels)
+        return loss * len(labels), correct, len(labels)
+
+
+def train(paths, epochs=5, hidden=32, lr=0.01, batch_size=256, chunk_lines=2000,
+          workers=1, prefetch=4, validation_every=10, seed=0):
+    """
+    流式训练。每第 validation_every 块留作验证集 (按块下标划分，每轮一致)。
+    返回 (model, stats)，stats 为每轮的 loss / 准确率 / 吞吐量 (samples/s)。
+    """
+    model = PolicyModel.initialize(hidden=hidden, seed=seed)
+    trainer = PolicyTrainer(model, lr=lr, batch_size=batch_size, seed=seed)
+    stats = []
+    for epoch in range(1, epochs + 1):
+        start = time.perf_counter()
+        train_totals = [0.0, 0, 0]
+        val_totals = [0.0, 0, 0]
+        compute_time = 0.0
+        for index, chunk in enumerate(featurized_chunks(paths, chunk_lines, workers, prefetch)):
+            step_start = time.perf_counter()
+            is_validation = validation_every > 1 and index % validation_every == validation_every - 1
+            result = trainer.evaluate_chunk(*chunk) if is_validation else trainer.train_chunk(*chunk)
+            compute_time += time.perf_counter() - step_start
+            totals = val_totals if is_validation else train_totals
+            for i, value in enumerate(result):
+                totals[i] += value
+
+        elapsed = time.perf_counter() - start
+        samples = train_totals[2] + val_totals[2]
+        epoch_stats = {
+            "epoch": epoch,
+            "train_loss": train_totals[0] / max(train_totals[2], 1),
+            "train_accuracy": train_totals[1] / max(train_totals[2], 1),
+            "val_loss": val_totals[0] / val_totals[2] if val_totals[2] else None,
+            "val_accuracy": val_totals[1] / val_totals[2] if val_totals[2] else None,
+            "samples": samples,
+            "samples_per_sec": samples / elapsed if elapsed > 0 else 0.0,
+            # 只计训练计算 (不含读取和特征)，两者接近说明预取已把特征生成完全隐藏
+            "train_samples_per_sec": samples / compute_time if compute_time > 0 else 0.0,
+        }
+        stats.append(epoch_stats)
+        val_text = (f" val_loss={epoch_stats['val_loss']:.4f} val_acc={epoch_stats['val_accuracy']:.3f}"
+                    if val_totals[2] else "")
+        logger.info(f"Epoch {epoch}: loss={epoch_stats['train_loss']:.4f} acc={epoch_stats['train_accuracy']:.3f}"
+                    f"{val_text} | {samples} samples, {epoch_stats['samples_per_sec']:.0f} samples/s "
+                    f"(train only {epoch_stats['train_samples_per_sec']:.0f} samples/s)")
+    return model, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", nargs="+", required=True, help="JSONL corpus files of labeled decisions")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--hidden", type=int, default=32)
+    parser.add_argument("--lr", type=float, default=0.01)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--chunk-lines", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None, help="featurizer processes (default: all cores)")
+    parser.add_argument("--prefetch", type=int, default=4, help="chunks in flight per worker")
+    parser.add_argument("--validation-every", type=int, default=10, help="hold out every N-th chunk (0: none)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "policy_model.npz"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    model, stats = train(args.corpus, epochs=args.epochs, hidden=args.hidden, lr=args.lr,
+                         batch_size=args.batch_size, chunk_lines=args.chunk_lines,
+                         workers=args.workers or os.cpu_count() or 1, prefetch=args.prefetch,
+                         validation_every=args.validation_every, seed=args.seed)
+    last = stats[-1] if stats else {}
+    model.save(args.output, epochs=args.epochs, samples=last.get("samples", 0),
+               val_accuracy=last.get("val_accuracy") or 0.0)
+    logger.info(f"Policy model written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
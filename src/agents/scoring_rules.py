@@ -0,0 +1,393 @@
+"""
+声明式评分规则。
+
+heuristic.score_hand 中按卡牌类型展开的 if/elif 分支改写为规则表 (DEFAULT_RULES，可用 JSON 文件覆盖)：
+每条规则由卡牌条件 (类型、费用、标签)、战场条件 (布尔特征) 和加减分组成，按顺序执行。
+加载时编译：
+- 卡牌条件只与卡牌本身有关，按 (card_id, name, cost) 预先筛出适用的规则
+- 战场条件编码为位掩码，每张卡的最终得分只取决于 (卡牌, 特征位)，结果查表缓存
+- 手牌最大伤害只取决于攻击牌的 (card_id, cost)、能量和力量，按这些值缓存
+因此评分时每张手牌只需计算一次特征位并查表。
+规则文件修改后自动重新加载 (按 mtime 检查)，解析失败时保留旧规则，不影响游戏连接。
+
+用法:
+    python -m src.agents.scoring_rules --export data/scoring_rules.json   # 导出默认规则作为编辑起点
+    python -m src.agents.scoring_rules --check data/scoring_rules.json    # 校验规则文件
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+# 与 main.py 相同：确保可以导入 src 和 external/spirecomm
+root_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+sys.path.append(os.path.join(root_path, 'external', 'spirecomm'))
+
+from spirecomm.spire.card import CardType
+
+from src.agents.heuristic import DEFAULT_WEIGHTS, load_weights, max_hand_damage, race_possible
+
+logger = logging.getLogger(__name__)
+
+# 规则可以使用的战场特征 (布尔)，顺序即位编号
+FEATURES = (
+    "attacked",          # 有怪物意图为攻击
+    "in_danger",         # 预计伤害超过当前格挡
+    "critical",          # 预计伤害足以致死
+    "can_race",          # 两回合内可清场且扛得住 (需要 forecast / move_predictor)
+    "combo_lethal",      # 本回合全部攻击合计可击杀某个怪物
+    "multiple_attacks",  # 手牌中不止一张攻击牌
+    "single_lethal",     # 这张牌单独即可击杀某个怪物 (按卡牌伤害计算)
+)
+FEATURE_BITS = {name: 1 << i for i, name in enumerate(FEATURES)}
+ATTACKED, IN_DANGER, CRITICAL, CAN_RACE, COMBO_LETHAL, MULTIPLE_ATTACKS, SINGLE_LETHAL = (
+    FEATURE_BITS[name] for name in FEATURES)
+
+# 手牌最大伤害缓存的条目上限 (超出时整体清空)
+HAND_DAMAGE_CACHE_SIZE = 4096
+
+# 与 heuristic.score_hand 的分支一一对应 (权重名引用 DEFAULT_WEIGHTS / 调参结果)
+DEFAULT_RULES = {
+    "tags": {
+        "vulnerable_source": {"id_contains": ["bash", "terror", "shockwave", "uppercut", "thunderclap", "beam cell"]},
+        "block": {"type": "SKILL", "id_contains": ["Defend"], "name_contains": ["Block", "Wall", "防御"]},
+    },
+    # 单卡伤害估计：第一条匹配的生效，strength=true 时加上力量
+    "damage": [
+        {"id_contains": ["strike"], "name_contains": ["打击"], "base": 6, "strength": True},
+        {"id_contains": ["bash"], "base": 8, "strength": True},
+    ],
+    "default_damage": 6,
+    "rules": [
+        {"name": "zero_cost", "card": {"cost": 0}, "add": "zero_cost"},
+        {"name": "high_cost", "card": {"min_cost": 2}, "add": "high_cost"},
+        # 攻击牌：单卡斩杀 > 组合斩杀 > 普通攻击
+        {"name": "single_lethal", "card": {"type": "ATTACK"}, "when": {"single_lethal": True}, "add": "single_lethal"},
+        {"name": "combo_lethal", "card": {"type": "ATTACK"},
+         "when": {"single_lethal": False, "combo_lethal": True}, "add": "combo_lethal"},
+        {"name": "combo_vulnerable", "card": {"type": "ATTACK", "tags": ["vulnerable_source"]},
+         "when": {"single_lethal": False, "combo_lethal": True, "multiple_attacks": True}, "add": "combo_vulnerable"},
+        {"name": "combo_vulnerable_cost_refund", "card": {"type": "ATTACK", "tags": ["vulnerable_source"], "min_cost": 2},
+         "when": {"single_lethal": False, "combo_lethal": True, "multiple_attacks": True},
+         "add": "combo_vulnerable_cost_refund"},
+        {"name": "attack", "card": {"type": "ATTACK"},
+         "when": {"single_lethal": False, "combo_lethal": False}, "add": "attack"},
+        {"name": "vulnerable", "card": {"type": "ATTACK", "tags": ["vulnerable_source"]},
+         "when": {"single_lethal": False, "combo_lethal": False, "multiple_attacks": True}, "add": "vulnerable"},
+        {"name": "race_attack", "card": {"type": "ATTACK"},
+         "when": {"single_lethal": False, "combo_lethal": False, "can_race": True}, "add": "race_attack"},
+        # 防御牌
+        {"name": "defend_idle", "card": {"tags": ["block"]}, "when": {"attacked": False}, "set": 0},
+        {"name": "defend_race", "card": {"tags": ["block"]},
+         "when": {"attacked": True, "in_danger": True, "can_race": True}, "add": "defend_race"},
+        {"name": "defend_danger", "card": {"tags": ["block"]},
+         "when": {"attacked": True, "in_danger": True, "can_race": False}, "add": "defend_danger"},
+        {"name": "defend_critical", "card": {"tags": ["block"]},
+         "when": {"attacked": True, "in_danger": True, "critical": True}, "add": "defend_critical"},
+        {"name": "defend_safe", "card": {"tags": ["block"]},
+         "when": {"attacked": True, "in_danger": False}, "add": "defend_safe"},
+        # 能力牌
+        {"name": "power", "card": {"type": "POWER"}, "add": "power"},
+    ],
+}
+
+
+class RuleError(ValueError):
+    """规则文件格式错误"""
+
+
+def _expect(value, kind, what):
+    """结构检查：类型不符时抛出 RuleError (而不是在编译中途抛出 AttributeError 等)"""
+    if not isinstance(value, kind):
+        raise RuleError(f"{what} must be {'an object' if kind is dict else 'a list'}")
+    return value
+
+
+def _type_name(card_type):
+    return str(card_type).split(".")[-1]
+
+
+def _matches_keywords(spec, lower_id, lower_name):
+    """id_contains / name_contains 任一命中 (不区分大小写)；两者都未给出时视为命中"""
+    ids = spec.get("id_contains", [])
+    names = spec.get("name_contains", [])
+    if not ids and not names:
+        return True
+    return any(k.lower() in lower_id for k in ids) or any(k.lower() in lower_name for k in names)
+
+
+class CompiledRules:
+    """编译后的规则集：按卡牌缓存适用规则和得分表"""
+
+    def __init__(self, spec, weights=None):
+        _expect(spec, dict, "rules file")
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.weights.update(weights or {})
+        self.weights.update(_expect(spec.get("weights", {}), dict, "'weights'"))
+        self.tags = _expect(spec.get("tags", {}), dict, "'tags'")
+        for tag, tag_spec in self.tags.items():
+            _expect(tag_spec, dict, f"tag '{tag}'")
+        self.damage = _expect(spec.get("damage", []), list, "'damage'")
+        for i, damage_spec in enumerate(self.damage):
+            _expect(damage_spec, dict, f"damage[{i}]")
+        self.default_damage = spec.get("default_damage", 6)
+        self.base = self.weights["base"]
+        self.rules = [self._compile_rule(rule, i)
+                      for i, rule in enumerate(_expect(spec.get("rules", []), list, "'rules'"))]
+        self._cards = {}
+        self._hand_damage = {}
+
+    def _compile_rule(self, rule, index):
+        name = _expect(rule, dict, f"rules[{index}]").get("name", f"rule_{index}")
+        card = dict(_expect(rule.get("card", {}), dict, f"{name}: 'card'"))
+        tags = _expect(card.get("tags", []), list, f"{name}: 'card.tags'")
+        not_tags = _expect(card.get("not_tags", []), list, f"{name}: 'card.not_tags'")
+        unknown_tags = [t for t in tags + not_tags if t not in self.tags]
+        if unknown_tags:
+            raise RuleError(f"{name}: unknown tags {unknown_tags}")
+        mask = value = 0
+        for feature, expected in _expect(rule.get("when", {}), dict, f"{name}: 'when'").items():
+            if feature not in FEATURE_BITS:
+                raise RuleError(f"{name}: unknown feature '{feature}' (known: {', '.join(FEATURES)})")
+            mask |= FEATURE_BITS[feature]
+            if expected:
+                value |= FEATURE_BITS[feature]
+        if "set" in rule:
+            op, amount = "set", rule["set"]
+        elif "add" in rule:
+            op, amount = "add", rule["add"]
+            if isinstance(amount, str):
+                if amount not in self.weights:
+                    raise RuleError(f"{name}: unknown weight '{amount}'")
+                amount = self.weights[amount]
+        else:
+            raise RuleError(f"{name}: rule needs 'add' or 'set'")
+        if not isinstance(amount, (int, float)):
+            raise RuleError(f"{name}: amount must be a number")
+        return card, mask, value, op, amount
+
+    def _card_tags(self, type_name, lower_id, lower_name):
+        tags = set()
+        for tag, spec in self.tags.items():
+            types = spec.get("type")
+            if types and type_name not in ([types] if isinstance(types, str) else types):
+                continue
+            if _matches_keywords(spec, lower_id, lower_name):
+                tags.add(tag)
+        return tags
+
+    def _card_matches(self, cond, type_name, cost, tags):
+        types = cond.get("type")
+        if types and type_name not in ([types] if isinstance(types, str) else types):
+            return False
+        if "cost" in cond and cost != cond["cost"]:
+            return False
+        if "min_cost" in cond and cost < cond["min_cost"]:
+            return False
+        if "max_cost" in cond and cost > cond["max_cost"]:
+            return False
+        if not set(cond.get("tags", [])) <= tags or set(cond.get("not_tags", [])) & tags:
+            return False
+        return True
+
+    def compile_card(self, card_id, name, card_type, cost):
+        """
+        返回 (是否攻击牌, 基础伤害, 伤害是否加力量, 适用规则列表, 得分表)。
+        得分表 {特征位: 得分} 在评分时按需填充。
+        """
+        type_name = _type_name(card_type)
+        lower_id, lower_name = card_id.lower(), name.lower()
+        tags = self._card_tags(type_name, lower_id, lower_name)
+        damage, scales = self.default_damage, False
+        for spec in self.damage:
+            if _matches_keywords(spec, lower_id, lower_name):
+                damage, scales = spec.get("base", self.default_damage), spec.get("strength", False)
+                break
+        program = tuple((mask, value, op, amount) for cond, mask, value, op, amount in self.rules
+                        if self._card_matches(cond, type_name, cost, tags))
+        return card_type == CardType.ATTACK, damage, scales, program, {}
+
+    def _run(self, program, bits):
+        score = self.base
+        for mask, value, op, amount in program:
+            if bits & mask == value:
+                score = amount if op == "set" else score + amount
+        return min(100, max(0, score))
+
+    def _max_hand_damage(self, attack_cards, energy, strength):
+        key = (tuple((c.card_id, c.cost) for c in attack_cards), energy, strength)
+        damage = self._hand_damage.get(key)
+        if damage is None:
+            if len(self._hand_damage) >= HAND_DAMAGE_CACHE_SIZE:
+                self._hand_damage.clear()
+            damage = self._hand_damage[key] = max_hand_damage(attack_cards, energy, strength)
+        return damage
+
+    def score_hand(self, game, forecast=None, move_predictor=None):
+        """与 heuristic.score_hand 相同的输出：{uuid: 0~100}"""
+        if not game or not game.hand:
+            return {}
+        # 战场特征：与 heuristic.analyze_battle 相同的判断，只计算规则用到的部分
+        player = game.player
+        monsters = [m for m in game.monsters if not m.is_gone and not m.half_dead]
+        incoming_damage = 0
+        bits = 0
+        for m in monsters:
+            if m.intent.is_attack():
+                bits |= ATTACKED
+                incoming_damage += (m.move_adjusted_damage or 0) * (m.move_hits or 1)
+        needed_block = max(0, incoming_damage - player.block)
+        if needed_block > 0:
+            bits |= IN_DANGER
+        if player.current_hp <= incoming_damage:
+            bits |= CRITICAL
+        strength = next((p.amount for p in player.powers if p.power_id == "Strength"), 0)
+        energy = player.energy
+
+        cards = self._cards
+        hand = []
+        attack_cards = []
+        for card in game.hand:
+            # 卡牌类型由 card_id 决定，不放入缓存键 (枚举哈希较慢)
+            key = (card.card_id, card.name, card.cost)
+            compiled = cards.get(key)
+            if compiled is None:
+                compiled = cards[key] = self.compile_card(card.card_id, card.name, card.type, card.cost)
+            hand.append((card, compiled))
+            if compiled[0]:
+                attack_cards.append(card)
+        if len(attack_cards) > 1:
+            bits |= MULTIPLE_ATTACKS
+
+        min_hp = None
+        if monsters:
+            total_hand_damage = self._max_hand_damage(attack_cards, energy, strength)
+            for m in monsters:
+                for p in m.powers:
+                    if p.power_id == "Curl Up":
+                        total_hand_damage -= p.amount
+            min_hp = min(m.current_hp for m in monsters)
+            if min_hp <= total_hand_damage:
+                bits |= COMBO_LETHAL
+            if (forecast and move_predictor and bits & (IN_DANGER | CRITICAL) == IN_DANGER
+                    and forecast.expected_damage > 0
+                    and race_possible(player, monsters, needed_block, total_hand_damage, forecast, move_predictor)):
+                bits |= CAN_RACE
+
+        recommendations = {}
+        for card, (_, damage, scales, program, table) in hand:
+            if card.cost > energy:
+                recommendations[card.uuid] = 0
+                continue
+            card_bits = bits
+            if min_hp is not None and min_hp <= (damage + strength if scales else damage):
+                card_bits |= SINGLE_LETHAL
+            score = table.get(card_bits)
+            if score is None:
+                score = table[card_bits] = self._run(program, card_bits)
+            recommendations[card.uuid] = score
+        return recommendations
+
+
+def load_rules(path):
+    """读取规则文件 (不存在时返回默认规则)，格式错误时抛出 RuleError"""
+    if not path or not os.path.exists(path):
+        return DEFAULT_RULES
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+    except (OSError, ValueError) as e:
+        raise RuleError(f"cannot read {path}: {e}")
+    if not isinstance(spec, dict) or not isinstance(spec.get("rules"), list):
+        raise RuleError(f"{path}: expected an object with a 'rules' list")
+    return spec
+
+
+class RulesEngine:
+    """
+    带热加载的规则引擎：每次评分前 (最多每 check_interval 秒一次) 检查规则文件和权重文件的 mtime，
+    变化时重新编译；新规则有错误时记录日志并继续使用旧规则。
+    clock 为检查间隔使用的单调时钟 (测试中可替换为虚拟时钟)。
+    """
+
+    def __init__(self, rules_path=None, weights=None, weights_path=None, check_interval=1.0, clock=time.monotonic):
+        self.rules_path = rules_path
+        self.weights_path = weights_path
+        self.base_weights = weights
+        self.check_interval = check_interval
+        self.clock = clock
+        self.reloads = 0
+        self._stamp = None
+        self._next_check = 0.0
+        self.compiled = None
+        self.reload()
+
+    def _file_stamp(self):
+        stamps = []
+        for path in (self.rules_path, self.weights_path):
+            try:
+                stat = os.stat(path) if path else None
+                stamps.append((stat.st_mtime_ns, stat.st_size) if stat else None)
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def reload(self):
+        """重新读取并编译，返回是否成功"""
+        stamp = self._file_stamp()
+        try:
+            weights = load_weights(self.weights_path) if self.weights_path else self.base_weights
+            compiled = CompiledRules(load_rules(self.rules_path), weights)
+        except Exception as e:
+            # 除 RuleError 外，任何编译错误 (如权重文件内容有误) 也不能传到评分调用方
+            logger.error(f"Scoring rules not reloaded, keeping previous version: {e}")
+            self._stamp = stamp
+            if self.compiled is None:
+                self.compiled = CompiledRules(DEFAULT_RULES, self.base_weights)
+            return False
+        self.compiled = compiled
+        self._stamp = stamp
+        self.reloads += 1
+        if self.reloads > 1:
+            logger.info(f"Scoring rules reloaded ({len(compiled.rules)} rules)")
+        return True
+
+    def maybe_reload(self):
+        now = self.clock()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+        if self._file_stamp() != self._stamp:
+            return self.reload()
+        return False
+
+    def score_hand(self, game, forecast=None, move_predictor=None):
+        self.maybe_reload()
+        return self.compiled.score_hand(game, forecast, move_predictor)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--export", metavar="PATH", help="write the default rules as JSON")
+    parser.add_argument("--check", metavar="PATH", help="validate a rules file")
+    args = parser.parse_args()
+
+    if args.export:
+        with open(args.export, "w", encoding="utf-8") as f:
+            json.dump(DEFAULT_RULES, f, indent=2, ensure_ascii=False)
+        print(f"Default rules written to {args.export}")
+    if args.check:
+        try:
+            compiled = CompiledRules(load_rules(args.check))
+        except RuleError as e:
+            print(f"Invalid rules: {e}")
+            sys.exit(1)
+        print(f"OK: {len(compiled.rules)} rules")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,597 @@
+"""
+非战斗界面 (商店、篝火、事件、选牌升级 / 删除) 的预计算价值表。
+
+这些界面不需要实时模拟：一张牌、一个遗物、一个事件选项的价值主要取决于它本身和当前幕数。
+默认价值表 (DEFAULT_TABLES，可用 JSON 文件覆盖部分条目) 离线编译为按 (幕, 编号) 索引的数组
+(data/value_tables.npz)：
+- 卡牌：card_id -> (类别, 基础价值, 升级收益)，每幕的价值 = 基础价值 x 类别在该幕的系数
+  (初始牌越往后越拖累卡组，防御牌在后期更重要，成长类能力牌在前期收益更高)
+- 遗物、药水：id -> 价值，遗物按幕衰减 (剩余战斗越少，长期收益越低)
+- 事件：(event_id, 选项关键字) -> (基础价值, 回血权重)，回血类选项的价值随已损失血量增加
+- 金币、删牌、篝火休息的每幕单价
+后端启动时加载一次 (文件不存在时直接编译默认表)，各界面的推荐只是查表和少量算术。
+
+价值单位与 choices.scale_scores 一致：相差 1 点价值对应推荐分相差 10 分。
+
+用法:
+    python -m src.agents.value_tables --export data/value_tables.json   # 导出默认表作为编辑起点
+    python -m src.agents.value_tables                                   # 编译 (存在 data/value_tables.json 时合并) 写入 data/value_tables.npz
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+# 与 main.py 相同：确保可以导入 src 和 external/spirecomm
+root_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+sys.path.append(os.path.join(root_path, 'external', 'spirecomm'))
+
+from spirecomm.spire.screen import ScreenType
+
+from src.core.choices import ScreenChoice, scale_scores
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(root_path, "data")
+
+# 表结构或价值模型变化时递增，旧的编译结果会被忽略
+TABLES_VERSION = 1
+
+# 第一幕至第三幕 (第四幕按第三幕处理)
+ACTS = 3
+
+# 卡组中每多一张同名牌，再拿一张的价值乘以该系数
+DUPLICATE_DECAY = 0.7
+
+# 篝火休息回复最大生命的比例
+REST_HEAL_RATIO = 0.3
+
+DEFAULT_TABLES = {
+    # 卡牌类别在每一幕的价值系数
+    "card_categories": {
+        "basic": [1.0, 0.6, 0.3],
+        "attack": [1.1, 1.0, 0.9],
+        "aoe": [1.0, 1.2, 1.1],
+        "block": [0.9, 1.0, 1.1],
+        "scaling": [1.1, 1.0, 0.8],
+        "draw": [1.0, 1.0, 1.0],
+        "curse": [1.0, 1.0, 1.0],
+    },
+    # card_id -> [类别, 基础价值, 升级收益]
+    "cards": {
+        "Strike_R": ["basic", 1.0, 1.0],
+        "Defend_R": ["basic", 1.0, 0.8],
+        "Bash": ["basic", 3.0, 2.5],
+        "Anger": ["attack", 4.0, 1.5],
+        "Armaments": ["block", 4.0, 3.0],
+        "Body Slam": ["block", 3.0, 3.0],
+        "Clash": ["attack", 2.0, 1.0],
+        "Cleave": ["aoe", 5.0, 1.5],
+        "Clothesline": ["attack", 4.0, 1.5],
+        "Flex": ["scaling", 3.0, 1.5],
+        "Havoc": ["draw", 2.0, 1.5],
+        "Headbutt": ["attack", 4.0, 1.5],
+        "Heavy Blade": ["attack", 4.0, 2.0],
+        "Iron Wave": ["block", 4.0, 1.5],
+        "Perfected Strike": ["attack", 4.0, 1.5],
+        "Pommel Strike": ["draw", 6.0, 1.5],
+        "Shrug It Off": ["block", 6.5, 1.5],
+        "Sword Boomerang": ["attack", 4.0, 1.5],
+        "Thunderclap": ["aoe", 5.5, 1.5],
+        "True Grit": ["block", 4.5, 3.0],
+        "Twin Strike": ["attack", 4.5, 1.5],
+        "Warcry": ["draw", 2.0, 1.0],
+        "Wild Strike": ["attack", 3.0, 1.5],
+        "Battle Trance": ["draw", 6.0, 1.5],
+        "Blood for Blood": ["attack", 3.0, 2.0],
+        "Bloodletting": ["draw", 3.0, 1.5],
+        "Burning Pact": ["draw", 5.5, 1.5],
+        "Carnage": ["attack", 6.0, 1.5],
+        "Combust": ["aoe", 4.0, 1.5],
+        "Dark Embrace": ["draw", 5.0, 2.5],
+        "Disarm": ["block", 7.0, 1.5],
+        "Dropkick": ["attack", 4.5, 1.5],
+        "Dual Wield": ["scaling", 3.0, 1.5],
+        "Entrench": ["block", 3.0, 2.0],
+        "Evolve": ["draw", 3.5, 1.5],
+        "Feel No Pain": ["block", 6.0, 2.0],
+        "Fire Breathing": ["aoe", 2.5, 1.0],
+        "Flame Barrier": ["block", 6.5, 2.0],
+        "Ghostly Armor": ["block", 5.0, 1.5],
+        "Hemokinesis": ["attack", 5.0, 1.5],
+        "Infernal Blade": ["draw", 3.5, 2.0],
+        "Inflame": ["scaling", 6.5, 2.5],
+        "Intimidate": ["block", 4.0, 1.5],
+        "Metallicize": ["block", 5.0, 1.5],
+        "Power Through": ["block", 5.0, 1.5],
+        "Pummel": ["attack", 4.0, 1.5],
+        "Rage": ["block", 4.0, 1.5],
+        "Rampage": ["scaling", 3.5, 2.0],
+        "Reckless Charge": ["attack", 2.5, 1.0],
+        "Rupture": ["scaling", 2.5, 1.5],
+        "Searing Blow": ["attack", 3.0, 3.0],
+        "Second Wind": ["block", 5.0, 1.5],
+        "Seeing Red": ["draw", 5.0, 2.5],
+        "Sentinel": ["block", 4.5, 1.5],
+        "Sever Soul": ["attack", 4.0, 1.5],
+        "Shockwave": ["block", 8.0, 2.0],
+        "Spot Weakness": ["scaling", 5.5, 1.5],
+        "Uppercut": ["block", 7.0, 2.0],
+        "Whirlwind": ["aoe", 6.5, 1.5],
+        "Barricade": ["block", 5.0, 4.0],
+        "Berserk": ["scaling", 4.0, 1.5],
+        "Bludgeon": ["attack", 6.0, 1.5],
+        "Brutality": ["draw", 4.0, 2.0],
+        "Corruption": ["scaling", 7.0, 3.5],
+        "Demon Form": ["scaling", 8.0, 3.0],
+        "Double Tap": ["attack", 5.0, 2.0],
+        "Exhume": ["draw", 4.0, 2.5],
+        "Feed": ["scaling", 7.5, 1.5],
+        "Fiend Fire": ["attack", 6.5, 1.5],
+        "Immolate": ["aoe", 8.5, 1.5],
+        "Impervious": ["block", 8.0, 2.5],
+        "Juggernaut": ["aoe", 5.0, 1.5],
+        "Limit Break": ["scaling", 5.0, 4.0],
+        "Offering": ["draw", 9.0, 2.5],
+        "Reaper": ["aoe", 6.5, 1.5],
+    },
+    # 不在 cards 中的牌按稀有度取基础价值 (类别 attack)
+    "rarity_values": {"BASIC": 1.0, "COMMON": 3.5, "UNCOMMON": 4.5, "RARE": 5.5, "SPECIAL": 2.0, "CURSE": -8.0},
+    "default_upgrade": 1.5,
+    # relic_id -> 基础价值，每幕乘以 relic_act_factor
+    "relics": {
+        "Akabeko": 4.0, "Anchor": 4.0, "Bag of Marbles": 4.0, "Bag of Preparation": 5.0, "Blood Vial": 3.0,
+        "Bronze Scales": 3.0, "Centennial Puzzle": 3.0, "Happy Flower": 5.0, "Lantern": 5.0, "Meal Ticket": 3.0,
+        "Oddly Smooth Stone": 3.0, "Orichalcum": 4.0, "Pen Nib": 5.0, "Preserved Insect": 4.0, "Regal Pillow": 2.0,
+        "Smiling Mask": 2.0, "Strawberry": 4.0, "The Boot": 3.0, "Tiny Chest": 2.0, "Toy Ornithopter": 2.0,
+        "Vajra": 5.0, "War Paint": 4.0, "Whetstone": 4.0, "Dream Catcher": 2.0, "Potion Belt": 2.0,
+        "Juzu Bracelet": 2.0, "Kunai": 5.0, "Shuriken": 6.0, "Letter Opener": 5.0, "Ornamental Fan": 4.0,
+        "Paper Phrog": 6.0, "Self-Forming Clay": 4.0, "Meat on the Bone": 4.0, "Ice Cream": 5.0,
+        "Membership Card": 5.0, "Orange Pellets": 4.0, "Clockwork Souvenir": 4.0, "Strange Spoon": 4.0,
+        "Dolly's Mirror": 4.0, "Cauldron": 3.0, "Frozen Eye": 2.0, "Chemical X": 1.0, "Brimstone": 6.0,
+        "Champion Belt": 4.0, "Charon's Ashes": 5.0, "Magic Flower": 3.0, "Sundial": 3.0, "Horn Cleat": 4.0,
+    },
+    "default_relic": 4.0,
+    "relic_act_factor": [1.0, 0.9, 0.75],
+    # potion_id -> 价值
+    "potions": {
+        "Fairy Potion": 4.0, "Regen Potion": 3.0, "Duplication Potion": 3.0, "Blood Potion": 3.0,
+        "Heart of Iron": 3.0, "Cultist Potion": 3.0, "Distilled Chaos": 3.0, "Power Potion": 3.0,
+        "Fear Potion": 2.5, "Strength Potion": 2.5, "Explosive Potion": 2.5, "Attack Potion": 2.5,
+        "Gambler's Brew": 1.5, "Colorless Potion": 1.5,
+    },
+    "default_potion": 2.0,
+    # event_id -> {选项关键字 (匹配 label 或 text，小写): [基础价值, 回血权重]}
+    # 选项价值 = 基础价值 + 回血权重 x 已损失血量比例；未匹配的选项 (如离开) 价值为 0
+    "events": {
+        "Big Fish": {"banana": [0.0, 8.0], "donut": [3.0, 0.0], "box": [3.0, 0.0]},
+        "The Cleric": {"heal": [0.0, 6.0], "purify": [4.0, 0.0]},
+        "Golden Idol": {"take": [3.0, 0.0]},
+        "Living Wall": {"forget": [3.5, 0.0], "change": [1.0, 0.0], "grow": [3.0, 0.0]},
+        "Scrap Ooze": {"reach": [2.0, -4.0]},
+        "Shining Light": {"enter": [5.0, -8.0]},
+        "World of Goop": {"gather": [2.0, -4.0]},
+        "Golden Wing": {"pray": [3.5, -4.0], "destroy": [1.0, 0.0]},
+        "Dead Adventurer": {"search": [1.0, -2.0]},
+        "Mushrooms": {"stomp": [-1.0, -3.0], "eat": [-2.0, 6.0]},
+        "Liars Game": {"agree": [1.0, 0.0]},
+        "Golden Shrine": {"pray": [2.0, 0.0], "desecrate": [1.0, 0.0]},
+        "Purifier": {"pray": [4.0, 0.0]},
+        "Transmorgrifier": {"pray": [1.0, 0.0]},
+        "Upgrade Shrine": {"pray": [3.0, 0.0]},
+    },
+    # 每枚金币的价值 (后期剩余商店少，金币贬值)
+    "gold_value": [0.025, 0.02, 0.015],
+    # 删去一张牌的价值 (再加上被删牌价值的相反数)
+    "purge_value": [4.0, 4.0, 3.5],
+    # 休息：回血比例 x 已损失血量比例 x 该值 (越缺血回血越值)
+    "rest_heal_value": [20.0, 22.0, 25.0],
+    # 篝火的其他选项 (挖掘、举重等遗物提供的选项)
+    "rest_options": {"dig": 5.0, "lift": 3.0, "recall": 1.0},
+}
+
+
+class TableError(ValueError):
+    """价值表格式错误"""
+
+
+def _act_row(value, name):
+    """标量或长度为 ACTS 的列表 -> 每幕一个值的列表"""
+    if isinstance(value, (int, float)):
+        return [float(value)] * ACTS
+    if isinstance(value, list) and len(value) == ACTS and all(isinstance(v, (int, float)) for v in value):
+        return [float(v) for v in value]
+    raise TableError(f"{name}: expected a number or a list of {ACTS} numbers")
+
+
+def load_spec(path):
+    """默认表合并 JSON 覆盖文件 (按节合并，文件中的条目覆盖同名默认条目)，格式错误时抛出 TableError"""
+    spec = json.loads(json.dumps(DEFAULT_TABLES))
+    if not path or not os.path.exists(path):
+        return spec
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+    except (OSError, ValueError) as e:
+        raise TableError(f"cannot read {path}: {e}")
+    if not isinstance(overrides, dict):
+        raise TableError(f"{path}: expected a JSON object")
+    for section, value in overrides.items():
+        if section not in spec:
+            raise TableError(f"{path}: unknown section '{section}'")
+        if isinstance(spec[section], dict) and isinstance(value, dict):
+            spec[section].update(value)
+        else:
+            spec[section] = value
+    return spec
+
+
+def compile_tables(spec):
+    """把价值表规格编译为数组：每幕一行 (ACTS, n)，列号与对应的 *_ids 数组一致"""
+    categories = {name: _act_row(row, f"card_categories.{name}") for name, row in spec["card_categories"].items()}
+    card_ids = sorted(spec["cards"])
+    card_value = np.zeros((ACTS, len(card_ids)), dtype=np.float32)
+    card_upgrade = np.zeros((ACTS, len(card_ids)), dtype=np.float32)
+    for i, card_id in enumerate(card_ids):
+        try:
+            category, value, upgrade = spec["cards"][card_id]
+            factors = categories[category]
+            card_value[:, i] = [float(value) * f for f in factors]
+            card_upgrade[:, i] = [float(upgrade) * f for f in factors]
+        except (KeyError, TypeError, ValueError):
+            raise TableError(f"cards.{card_id}: expected [category, value, upgrade] with a known category")
+
+    def scaled(section, factors):
+        ids = sorted(spec[section])
+        rows = [[v * f for v, f in zip(_act_row(spec[section][key], f"{section}.{key}"), factors)] for key in ids]
+        return ids, np.array(rows, dtype=np.float32).reshape(len(ids), ACTS).T
+
+    attack = categories.get("attack")
+    if attack is None:
+        raise TableError("card_categories: 'attack' is required (used for cards not in the table)")
+    rarity_ids, rarity_value = scaled("rarity_values", attack)
+    relic_factor = _act_row(spec["relic_act_factor"], "relic_act_factor")
+    relic_ids, relic_value = scaled("relics", relic_factor)
+    potion_ids, potion_value = scaled("potions", [1.0] * ACTS)
+
+    event_ids, event_keywords, event_rows, event_heal = [], [], [], []
+    for event_id in sorted(spec["events"]):
+        for keyword, entry in spec["events"][event_id].items():
+            try:
+                value, heal = entry
+            except (TypeError, ValueError):
+                raise TableError(f"events.{event_id}.{keyword}: expected [value, heal_weight]")
+            event_ids.append(event_id)
+            event_keywords.append(keyword.lower())
+            event_rows.append(_act_row(value, f"events.{event_id}.{keyword}"))
+            event_heal.append(float(heal))
+
+    rest_option_ids, rest_option_value = scaled("rest_options", [1.0] * ACTS)
+
+    return {
+        "card_ids": np.array(card_ids, dtype=str), "card_value": card_value, "card_upgrade": card_upgrade,
+        "rarity_ids": np.array(rarity_ids, dtype=str), "rarity_value": rarity_value,
+        "default_upgrade": np.array([v * f for v, f in zip(_act_row(spec["default_upgrade"], "default_upgrade"), attack)],
+                                    dtype=np.float32),
+        "relic_ids": np.array(relic_ids, dtype=str), "relic_value": relic_value,
+        "default_relic": np.array([v * f for v, f in zip(_act_row(spec["default_relic"], "default_relic"), relic_factor)],
+                                  dtype=np.float32),
+        "potion_ids": np.array(potion_ids, dtype=str), "potion_value": potion_value,
+        "default_potion": np.array(_act_row(spec["default_potion"], "default_potion"), dtype=np.float32),
+        "event_ids": np.array(event_ids, dtype=str), "event_keywords": np.array(event_keywords, dtype=str),
+        "event_value": np.array(event_rows, dtype=np.float32).reshape(len(event_rows), ACTS).T,
+        "event_heal": np.array(event_heal, dtype=np.float32),
+        "rest_option_ids": np.array(rest_option_ids, dtype=str), "rest_option_value": rest_option_value,
+        "gold_value": np.array(_act_row(spec["gold_value"], "gold_value"), dtype=np.float32),
+        "purge_value": np.array(_act_row(spec["purge_value"], "purge_value"), dtype=np.float32),
+        "rest_heal_value": np.array(_act_row(spec["rest_heal_value"], "rest_heal_value"), dtype=np.float32),
+    }
+
+
+def act_index(game):
+    act = getattr(game, "act", None) or 1
+    return min(max(act, 1), ACTS) - 1
+
+
+def hp_need(game):
+    """已损失血量比例 (0~1)"""
+    max_hp = getattr(game, "max_hp", 0) or 0
+    if max_hp <= 0:
+        return 0.0
+    return min(1.0, max(0.0, 1.0 - (getattr(game, "current_hp", 0) or 0) / max_hp))
+
+
+def upgradable(card):
+    type_name = getattr(getattr(card, "type", None), "name", "")
+    if type_name in ("CURSE", "STATUS"):
+        return False
+    return getattr(card, "upgrades", 0) == 0 or card.card_id == "Searing Blow"
+
+
+class ValueTables:
+    """
+    编译后的价值表。数组按 (幕, 编号) 索引；加载时建立 id -> 列号的字典，
+    并把每幕一行转换为 Python 列表，查询时只有一次字典查找和一次列表下标。
+    """
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self._cards = {card_id: i for i, card_id in enumerate(arrays["card_ids"].tolist())}
+        self._card_value = arrays["card_value"].tolist()
+        self._card_upgrade = arrays["card_upgrade"].tolist()
+        self._rarities = {r: i for i, r in enumerate(arrays["rarity_ids"].tolist())}
+        self._rarity_value = arrays["rarity_value"].tolist()
+        self._relics = {r: i for i, r in enumerate(arrays["relic_ids"].tolist())}
+        self._relic_value = arrays["relic_value"].tolist()
+        self._potions = {p: i for i, p in enumerate(arrays["potion_ids"].tolist())}
+        self._potion_value = arrays["potion_value"].tolist()
+        self._events = {}
+        for k, (event_id, keyword) in enumerate(zip(arrays["event_ids"].tolist(), arrays["event_keywords"].tolist())):
+            self._events.setdefault(event_id, []).append((keyword, k))
+        self._event_value = arrays["event_value"].tolist()
+        self._event_heal = arrays["event_heal"].tolist()
+        self._rest_options = {o: i for i, o in enumerate(arrays["rest_option_ids"].tolist())}
+        self._rest_option_value = arrays["rest_option_value"].tolist()
+        self.default_upgrade = arrays["default_upgrade"].tolist()
+        self.default_relic = arrays["default_relic"].tolist()
+        self.default_potion = arrays["default_potion"].tolist()
+        self.gold_value = arrays["gold_value"].tolist()
+        self.purge_value = arrays["purge_value"].tolist()
+        self.rest_heal_value = arrays["rest_heal_value"].tolist()
+
+    @classmethod
+    def from_spec(cls, spec=None):
+        return cls(compile_tables(spec or DEFAULT_TABLES))
+
+    def save(self, path):
+        np.savez_compressed(path, tables_version=TABLES_VERSION, **self.arrays)
+
+    @classmethod
+    def load(cls, path):
+        """读取编译好的价值表；不存在或版本不一致时使用默认表"""
+        if path and os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    if int(data["tables_version"]) == TABLES_VERSION:
+                        tables = cls({key: data[key] for key in data.files if key != "tables_version"})
+                        logger.info(f"Value tables loaded: {path}")
+                        return tables
+                logger.warning(f"Value tables {path} were built by an older version, using defaults")
+            except Exception as e:
+                logger.error(f"Failed to load value tables {path}, using defaults: {e}")
+        return cls.from_spec()
+
+    # --- 单项查询 ---
+    def card_value(self, card, act):
+        i = self._cards.get(card.card_id)
+        if i is not None:
+            return self._card_value[act][i]
+        rarity = getattr(getattr(card, "rarity", None), "name", "")
+        type_name = getattr(getattr(card, "type", None), "name", "")
+        if type_name == "CURSE":
+            rarity = "CURSE"
+        j = self._rarities.get(rarity)
+        return self._rarity_value[act][j] if j is not None else 0.0
+
+    def upgrade_value(self, card, act):
+        i = self._cards.get(card.card_id)
+        return self._card_upgrade[act][i] if i is not None else self.default_upgrade[act]
+
+    def relic_value(self, relic_id, act):
+        i = self._relics.get(relic_id)
+        return self._relic_value[act][i] if i is not None else self.default_relic[act]
+
+    def potion_value(self, potion_id, act):
+        i = self._potions.get(potion_id)
+        return self._potion_value[act][i] if i is not None else self.default_potion[act]
+
+    def event_option_values(self, event_id, options, act, need):
+        """事件各选项的价值 (按选项顺序)；不在表中的事件返回 None"""
+        entries = self._events.get(event_id)
+        if entries is None:
+            return None
+        values = []
+        for option in options:
+            # 先匹配按钮标签，再匹配描述文字 (描述中可能出现其他选项的关键字)
+            k = None
+            for text in (getattr(option, "label", None), getattr(option, "text", None)):
+                text = (text or "").lower()
+                k = next((k for keyword, k in entries if keyword in text), None)
+                if k is not None:
+                    break
+            values.append(0.0 if k is None else self._event_value[act][k] + self._event_heal[k] * need)
+        return values
+
+    def rest_option_value(self, option, act):
+        i = self._rest_options.get(option)
+        return self._rest_option_value[act][i] if i is not None else 0.0
+
+    # --- 卡组相关 ---
+    def best_upgrade(self, cards, act):
+        """(收益最高的可升级牌, 收益)，没有可升级的牌时返回 (None, 0)"""
+        best, gain = None, 0.0
+        for card in cards:
+            if upgradable(card):
+                value = self.upgrade_value(card, act)
+                if value > gain:
+                    best, gain = card, value
+        return best, gain
+
+    def worst_card(self, cards, act):
+        """(价值最低的牌, 价值)，卡组为空时返回 (None, 0)"""
+        worst, lowest = None, 0.0
+        for card in cards:
+            value = self.card_value(card, act)
+            if worst is None or value < lowest:
+                worst, lowest = card, value
+        return worst, lowest
+
+
+class ScreenAdvisor:
+    """
+    商店、篝火、事件、选牌升级 / 删除界面的推荐。
+    get_recommendations(game) 返回可直接广播给 UI 的 (choices, recommendations)，
+    不支持的界面返回 None。推荐的 key：
+    - 商店：卡牌 uuid、"relic:<id>"、"potion:<序号>"、"purge"、"leave"
+    - 篝火：选项名小写 ("rest" / "smith" / ...)，smith 的选项名中附带建议升级的牌
+    - 事件："event:<选项序号>"
+    - 选牌界面：卡牌 uuid
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def get_recommendations(self, game):
+        screen_type = game.screen_type
+        if screen_type == ScreenType.SHOP_SCREEN:
+            return self.shop(game)
+        if screen_type == ScreenType.REST:
+            return self.rest(game)
+        if screen_type == ScreenType.EVENT:
+            return self.event(game)
+        if screen_type == ScreenType.GRID:
+            return self.grid(game)
+        return None
+
+    def _card_gain(self, card, act, deck_counts):
+        """把 card 加入卡组的价值 (同名牌越多收益越低)"""
+        return self.tables.card_value(card, act) * DUPLICATE_DECAY ** deck_counts.get(card.card_id, 0)
+
+    def shop(self, game):
+        tables = self.tables
+        screen = game.screen
+        act = act_index(game)
+        gold = getattr(game, "gold", 0) or 0
+        gold_value = tables.gold_value[act]
+        deck = game.deck or []
+        deck_counts = {}
+        for card in deck:
+            deck_counts[card.card_id] = deck_counts.get(card.card_id, 0) + 1
+
+        choices = []
+        values = {"leave": 0.0}
+        affordable = set()
+
+        def offer(uuid, name, price, kind, value):
+            choices.append(ScreenChoice(uuid=uuid, name=f"{name} ({price}g)", cost=price, type=kind))
+            values[uuid] = value - price * gold_value
+            if price <= gold:
+                affordable.add(uuid)
+
+        for card in screen.cards:
+            offer(card.uuid, card.name, card.price, "SHOP_CARD", self._card_gain(card, act, deck_counts))
+        for relic in screen.relics:
+            offer(f"relic:{relic.relic_id}", relic.name, relic.price, "SHOP_RELIC",
+                  tables.relic_value(relic.relic_id, act))
+        for i, potion in enumerate(screen.potions):
+            offer(f"potion:{i}", potion.name, getattr(potion, "price", 0), "SHOP_POTION",
+                  tables.potion_value(potion.potion_id, act))
+        if screen.purge_available:
+            worst, lowest = tables.worst_card(deck, act)
+            if worst is not None:
+                offer("purge", f"Remove {worst.name}", screen.purge_cost, "SHOP_PURGE",
+                      tables.purge_value[act] - lowest)
+        choices.append(ScreenChoice(uuid="leave", name="Leave", cost=0, type="SHOP_LEAVE"))
+
+        # 买不起的商品推荐分为 0
+        scores = scale_scores({k: v for k, v in values.items() if k == "leave" or k in affordable})
+        return choices, {choice.uuid: scores.get(choice.uuid, 0) for choice in choices}
+
+    def rest(self, game):
+        tables = self.tables
+        screen = game.screen
+        if screen.has_rested or not screen.rest_options:
+            return None
+        act = act_index(game)
+        need = hp_need(game)
+        choices = []
+        values = {}
+        for option in screen.rest_options:
+            key = option.name.lower()
+            if key == "rest":
+                healed = min(REST_HEAL_RATIO, need)
+                value = tables.rest_heal_value[act] * healed * need
+                name = f"Rest (+{int(round(healed * (game.max_hp or 0)))} HP)"
+            elif key == "smith":
+                card, value = tables.best_upgrade(game.deck or [], act)
+                name = f"Smith: {card.name}" if card is not None else "Smith"
+            elif key == "toke":
+                card, lowest = tables.worst_card(game.deck or [], act)
+                value = tables.purge_value[act] - lowest if card is not None else 0.0
+                name = f"Toke: {card.name}" if card is not None else "Toke"
+            else:
+                value = tables.rest_option_value(key, act)
+                name = option.name.capitalize()
+            choices.append(ScreenChoice(uuid=key, name=name, cost=0, type="REST_OPTION"))
+            values[key] = value
+        return choices, scale_scores(values)
+
+    def event(self, game):
+        screen = game.screen
+        options = screen.options
+        values = self.tables.event_option_values(screen.event_id, options, act_index(game), hp_need(game))
+        if values is None:
+            return None
+        choices = []
+        enabled = {}
+        for i, (option, value) in enumerate(zip(options, values)):
+            key = f"event:{i}"
+            choices.append(ScreenChoice(uuid=key, name=option.label or option.text, cost=0, type="EVENT_OPTION"))
+            if not option.disabled:
+                enabled[key] = value
+        scores = scale_scores(enabled)
+        return choices, {choice.uuid: scores.get(choice.uuid, 0) for choice in choices}
+
+    def grid(self, game):
+        """升级 (篝火锻造、事件) 或删除 (商店、事件) 时选择哪张牌；其他选牌界面不推荐"""
+        screen = game.screen
+        cards = getattr(screen, "cards", None)
+        if not cards:
+            return None
+        act = act_index(game)
+        if getattr(screen, "for_upgrade", False):
+            values = {card.uuid: self.tables.upgrade_value(card, act) if upgradable(card) else 0.0 for card in cards}
+        elif getattr(screen, "for_purge", False):
+            values = {card.uuid: -self.tables.card_value(card, act) for card in cards}
+        else:
+            return None
+        return cards, scale_scores(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--export", metavar="PATH", help="write the default tables as JSON and exit")
+    parser.add_argument("--tables", default=os.path.join(DATA_DIR, "value_tables.json"),
+                        help="JSON overrides merged into the defaults (ignored if missing)")
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "value_tables.npz"))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.export:
+        with open(args.export, "w", encoding="utf-8") as f:
+            json.dump(DEFAULT_TABLES, f, indent=2, ensure_ascii=False)
+        logger.info(f"Default tables written to {args.export}")
+        return
+
+    start = time.perf_counter()
+    try:
+        tables = ValueTables.from_spec(load_spec(args.tables))
+    except TableError as e:
+        logger.error(f"Invalid tables: {e}")
+        sys.exit(1)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    tables.save(args.output)
+    arrays = tables.arrays
+    logger.info(f"Value tables: {arrays['card_ids'].size} cards, {arrays['relic_ids'].size} relics, "
+                f"{arrays['potion_ids'].size} potions, {arrays['event_ids'].size} event options x {ACTS} acts "
+                f"compiled in {(time.perf_counter() - start) * 1000:.1f} ms -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+启发式权重自动调参工具。
+
+在录制的决策语料上评估候选权重 (多进程并行，使用全部 CPU 核心)，
+用随机搜索或简化的进化策略 (ES) 搜索最优权重，每一代写入检查点，可中断后续跑。
+结果写入 data/heuristic_weights.json，GameBridge 启动时自动加载。
+
+语料格式 (JSONL，每行一条)：CommunicationMod 原始消息 + 人类实际打出的牌
+    {"game_state": {...}, "available_commands": [...], "label": "<card uuid 或 card_id>"}
+语料由 src.core.export_decisions 从 --record-raw 录制的原始消息导出 (与 policy_trainer 共用)。
+
+用法:
+    python -m src.core.export_decisions data/raw_messages.jsonl --output data/decisions.jsonl
+    python -m src.agents.weight_tuner --corpus data/decisions.jsonl --generations 30
+    python -m src.agents.weight_tuner --corpus data/decisions.jsonl --resume
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+# 与 main.py 相同：确保可以导入 src 和 external/spirecomm
+root_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+sys.path.append(os.path.join(root_path, 'external', 'spirecomm'))
+
+from spirecomm.spire.game import Game
+
+from src.agents.heuristic import DEFAULT_WEIGHTS, score_hand, save_weights
+from src.agents.move_predictor import MovePredictor
+from src.core.deck_tracker import DeckTracker
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(root_path, "data")
+
+# 不参与搜索的权重 (基础分只是整体平移，不影响排序)
+FIXED_KEYS = {"base"}
+
+# 工作进程内的语料缓存：[(game, forecast, label)]
+_worker_corpus = []
+_worker_predictor = None
+
+
+def load_corpus(path):
+    """读取语料，返回 [(game, forecast, label)]，跳过无法解析或无手牌的记录"""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+                label = message["label"]
+                game = Game.from_json(message["game_state"], message.get("available_commands", []))
+            except Exception as e:
+                logger.warning(f"Skipping corpus record: {e}")
+                continue
+            if not game.in_combat or not game.hand:
+                continue
+            tracker = DeckTracker()
+            tracker.update(game)
+            records.append((game, tracker.forecast(), label))
+    return records
+
+
+def _init_worker(corpus_path):
+    global _worker_corpus, _worker_predictor
+    _worker_corpus = load_corpus(corpus_path)
+    _worker_predictor = MovePredictor.default()
+
+
+def evaluate_weights(weights, corpus=None, move_predictor=None):
+    """
+    候选权重的得分：被标注牌在推荐排序中的平均倒数排名 (MRR)。
+    排名按不同 card_id 计算 (两张打击视为同一选项)，排名第一得 1 分，第二得 1/2 分，
+    与其他牌同分时按最差名次计。
+    """
+    corpus = _worker_corpus if corpus is None else corpus
+    move_predictor = move_predictor or _worker_predictor
+    if not corpus:
+        return 0.0
+
+    total = 0.0
+    for game, forecast, label in corpus:
+        scores = score_hand(game, weights, forecast, move_predictor)
+        by_card_id = {}
+        label_card_id = None
+        for card in game.hand:
+            by_card_id[card.card_id] = max(by_card_id.get(card.card_id, 0), scores.get(card.uuid, 0))
+            if label in (card.uuid, card.card_id):
+                label_card_id = card.card_id
+        if label_card_id is None:
+            continue
+        label_score = by_card_id[label_card_id]
+        rank = 1 + sum(1 for cid, s in by_card_id.items() if cid != label_card_id and s >= label_score)
+        total += 1.0 / rank
+    return total / len(corpus)
+
+
+class WeightTuner:
+    """
+    权重搜索器。
+    method="random": 在当前最优解附近做固定步长的随机扰动
+    method="es":     (mu, lambda) 进化策略，均值取前 mu 个候选的平均，步长随是否提升自适应
+    """
+
+    def __init__(self, corpus_path, checkpoint_path, method="es", population=32,
+                 sigma=8.0, seed=0, workers=None):
+        self.corpus_path = corpus_path
+        self.checkpoint_path = checkpoint_path
+        self.method = method
+        self.population = population
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.keys = [k for k in DEFAULT_WEIGHTS if k not in FIXED_KEYS]
+
+        self.generation = 0
+        self.mean = dict(DEFAULT_WEIGHTS)
+        self.sigma = sigma
+        self.best_weights = dict(DEFAULT_WEIGHTS)
+        self.best_score = None
+        self.history = []
+
+    def load_checkpoint(self):
+        """从检查点恢复搜索状态，返回是否成功"""
+        if not os.path.exists(self.checkpoint_path):
+            return False
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        self.method = state["method"]
+        self.seed = state["seed"]
+        self.generation = state["generation"]
+        self.mean = {**DEFAULT_WEIGHTS, **state["mean"]}
+        self.sigma = state["sigma"]
+        self.best_weights = {**DEFAULT_WEIGHTS, **state["best_weights"]}
+        self.best_score = state["best_score"]
+        self.history = state["history"]
+        logger.info(f"Resumed from generation {self.generation} (best {self.best_score})")
+        return True
+
+    def save_checkpoint(self):
+        state = {
+            "method": self.method,
+            "seed": self.seed,
+            "generation": self.generation,
+            "mean": self.mean,
+            "sigma": self.sigma,
+            "best_weights": self.best_weights,
+            "best_score": self.best_score,
+            "history": self.history,
+        }
+        # 先写临时文件再替换，避免中断时留下半个检查点
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _sample(self, center, rng):
+        candidate = dict(center)
+        for key in self.keys:
+            candidate[key] = int(round(center[key] + rng.gauss(0, self.sigma)))
+        return candidate
+
+    def _next_generation(self, candidates, scores):
+        ranked = sorted(zip(scores, range(len(candidates))), reverse=True)
+        top_score, top_index = ranked[0]
+        improved = self.best_score is None or top_score > self.best_score
+        if improved:
+            self.best_score = top_score
+            self.best_weights = candidates[top_index]
+
+        if self.method == "random":
+            self.mean = dict(self.best_weights)
+            return
+
+        mu = max(1, len(candidates) // 4)
+        elite = [candidates[i] for _, i in ranked[:mu]]
+        self.mean = {k: (sum(c[k] for c in elite) / mu if k in self.keys else self.mean[k])
+                     for k in self.mean}
+        # 1/5 成功率规则的简化版：有提升则放大步长，否则收缩
+        self.sigma *= 1.2 if improved else 0.85
+        self.sigma = max(0.5, min(self.sigma, 50.0))
+
+    def run(self, generations):
+        with multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=(self.corpus_path,)) as pool:
+            if self.best_score is None:
+                self.best_score = pool.apply(evaluate_weights, (self.best_weights,))
+                logger.info(f"Baseline score: {self.best_score:.4f}")
+
+            while self.generation < generations:
+                start = time.time()
+                # 每一代使用独立的确定性随机源，续跑时结果可复现
+                rng = random.Random(f"{self.seed}-{self.generation}")
+                center = self.best_weights if self.method == "random" else self.mean
+                candidates = [self._sample(center, rng) for _ in range(self.population)]
+                scores = pool.map(evaluate_weights, candidates)
+                self._next_generation(candidates, scores)
+                self.generation += 1
+                self.history.append({"generation": self.generation, "best": self.best_score,
+                                     "max": max(scores), "sigma": self.sigma})
+                self.save_checkpoint()
+                logger.info(f"Generation {self.generation}: best={self.best_score:.4f} "
+                            f"max={max(scores):.4f} sigma={self.sigma:.2f} ({time.time() - start:.1f}s)")
+        return self.best_weights, self.best_score
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", required=True,
+                        help="JSONL corpus of labeled decisions (produced by src.core.export_decisions)")
+    parser.add_argument("--method", choices=["random", "es"], default="es")
+    parser.add_argument("--generations", type=int, default=30)
+    parser.add_argument("--population", type=int, default=32)
+    parser.add_argument("--sigma", type=float, default=8.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--checkpoint", default=os.path.join(DATA_DIR, "tuning_checkpoint.json"))
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "heuristic_weights.json"))
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint if present")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if not os.path.exists(args.corpus):
+        logger.error(f"{args.corpus} not found; export it from a --record-raw recording with "
+                     f"python -m src.core.export_decisions <raw.jsonl> --output {args.corpus}")
+        sys.exit(1)
+
+    tuner = WeightTuner(args.corpus, args.checkpoint, method=args.method, population=args.population,
+                        sigma=args.sigma, seed=args.seed, workers=args.workers)
+    if args.resume:
+        tuner.load_checkpoint()
+
+    best_weights, best_score = tuner.run(args.generations)
+    save_weights(best_weights, args.output, score=best_score, method=tuner.method,
+                 generations=tuner.generation, corpus=os.path.basename(args.corpus))
+    logger.info(f"Best weights written to {args.output} (score {best_score:.4f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+单一 asyncio 运行时：在一个事件循环中处理游戏 stdin、UI / 控制连接和定时任务。
+
+原先后端同时运行 Coordinator 的 stdin / stdout 线程、GameBridge 的阻塞 accept 线程、
+每个客户端一个控制指令线程，以及数据上传线程。AsyncRuntime 把这些 I/O 合并到一个事件循环：
+- stdin 每读到一行就放入 Coordinator 的输入队列 (由 StateMailbox 合并)，评分期间也能及时收到新状态，
+  因此取消令牌 (见 src/core/mailbox.py) 可以立即生效
+- 状态处理 (协议解析、评分、采集写盘) 在单个引擎线程中串行执行，不阻塞事件循环
+- UI 广播由事件循环写出：慢客户端积压过多时跳过该帧，而不是阻塞评分线程
+- 定时任务 (数据上传等) 用 asyncio.sleep 调度，阻塞的网络请求放到 I/O 线程池
+- stdin 关闭 (游戏退出) 或收到 SIGINT / SIGTERM 时取消全部任务并关闭连接，没有轮询循环
+
+UI 端的 ui_client 同样基于 asyncio：连接断开后按固定间隔重连，停止时立即返回。
+"""
+import asyncio
+import json
+import logging
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 单条游戏状态可能超过 StreamReader 默认的 64 KiB 行长度上限
+STDIN_LIMIT = 16 * 1024 * 1024
+# UI 客户端未读取的数据超过该值时跳过新帧 (UI 只需要最新状态)
+MAX_CLIENT_BUFFER = 1024 * 1024
+RECONNECT_DELAY = 2.0
+
+
+async def open_stdin_reader(stdin=None):
+    """
+    把 stdin 包装为 StreamReader。
+    管道不支持异步读取时 (如 Windows 下的匿名管道) 退回到一个读取线程，按行转交事件循环。
+    """
+    stdin = stdin or sys.stdin
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STDIN_LIMIT)
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), stdin)
+        return reader
+    except (NotImplementedError, OSError, ValueError) as e:
+        logger.info(f"Async stdin unavailable ({e}), using a reader thread")
+
+    source = getattr(stdin, "buffer", stdin)
+
+    def pump():
+        try:
+            for line in iter(source.readline, b""):
+                loop.call_soon_threadsafe(reader.feed_data, line)
+            loop.call_soon_threadsafe(reader.feed_eof)
+        except RuntimeError:
+            pass  # 事件循环已关闭
+
+    threading.Thread(target=pump, daemon=True).start()
+    return reader
+
+
+class AsyncRuntime:
+    """
+    在一个事件循环中驱动 BridgeCoordinator 和 GameBridge。
+    coordinator 需以 io_threads=False 创建 (不启动 spirecomm 自带的 stdin / stdout 线程)，
+    agent 需以 listen=False 创建 (不启动自带的 Socket 监听线程)。
+    stdin 可以传入已有的 StreamReader (测试时手动喂数据)，默认读取进程 stdin。
+    """
+
+    def __init__(self, coordinator, agent, host='127.0.0.1', port=9999, stdin=None):
+        self.coordinator = coordinator
+        self.agent = agent
+        self.host = host
+        self.port = port
+        self.stdin = stdin
+        self.clients = set()  # 接收状态广播的 UI 连接 (StreamWriter)
+        self.dropped_frames = 0
+        self.loop = None
+        self.server = None
+        self._timers = []  # (interval, fn)
+        self._wake = None
+        self._stopping = None
+        # 状态处理串行执行，与 Coordinator.run 的单线程语义一致
+        self._engine = ThreadPoolExecutor(max_workers=1, thread_name_prefix="engine")
+
+    def every(self, interval, fn):
+        """注册定时任务：运行期间每 interval 秒在 I/O 线程池中调用一次 fn"""
+        self._timers.append((interval, fn))
+
+    def run(self):
+        """阻塞运行，直到 stdin 关闭或收到停止信号"""
+        asyncio.run(self.serve())
+
+    def stop(self):
+        """请求停止 (可从任意线程调用)"""
+        loop = self.loop
+        if loop and not loop.is_closed():
+            loop.call_soon_threadsafe(self._stopping.set)
+
+    def publish(self, data):
+        """Bridge 的广播钩子，在引擎线程中调用：交给事件循环写给所有 UI 连接"""
+        loop = self.loop
+        if loop and not loop.is_closed():
+            loop.call_soon_threadsafe(self._broadcast, data)
+
+    def _broadcast(self, data):
+        for writer in list(self.clients):
+            if writer.is_closing():
+                self.clients.discard(writer)
+                continue
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                self.dropped_frames += 1
+                continue
+            writer.write(data + b"\n")
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = asyncio.Event()
+        for sig in (getattr(signal, "SIGINT", None), getattr(signal, "SIGTERM", None)):
+            if sig is None:
+                continue
+            try:
+                self.loop.add_signal_handler(sig, self._stopping.set)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass  # Windows 或非主线程：依赖 KeyboardInterrupt
+
+        # 性能分析采样的目标改为引擎线程 (评分在这里执行)
+        self.agent.profiler.cpu.thread_id = await self.loop.run_in_executor(self._engine, threading.get_ident)
+        self.server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.agent.publisher = self.publish
+        logger.info(f"Async runtime listening on {self.host}:{self.port}")
+
+        main_tasks = [asyncio.create_task(self._read_stdin()), asyncio.create_task(self._run_engine()),
+                      asyncio.create_task(self._stopping.wait())]
+        timer_tasks = [asyncio.create_task(self._every(interval, fn)) for interval, fn in self._timers]
+        try:
+            done, _ = await asyncio.wait(main_tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()  # 引擎出错时向上抛出，与 Coordinator.run 一致
+        finally:
+            await self._shutdown(main_tasks + timer_tasks)
+
+    async def _shutdown(self, tasks):
+        self.agent.publisher = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.server.close()
+        for writer in list(self.clients):
+            writer.close()
+        self.clients.clear()
+        await self.server.wait_closed()
+        # 等待正在执行的状态处理结束，之后调用方才能安全地关闭 Bridge
+        await self.loop.run_in_executor(None, self._engine.shutdown)
+        logger.info("Async runtime stopped")
+
+    async def _read_stdin(self):
+        reader = self.stdin or await open_stdin_reader()
+        while True:
+            line = await reader.readline()
+            if not line:
+                logger.info("Game closed stdin, shutting down")
+                return
+            self.coordinator.input_queue.put(line.decode("utf-8"))
+            self._wake.set()
+
+    async def _run_engine(self):
+        coordinator = self.coordinator
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            # 引擎线程空闲时才检查队列 (动作队列只在引擎线程中修改)
+            while coordinator.has_work():
+                await self.loop.run_in_executor(self._engine, coordinator.step)
+
+    async def _every(self, interval, fn):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.loop.run_in_executor(None, fn)
+            except Exception as e:
+                logger.error(f"Timer task {getattr(fn, '__qualname__', fn)} failed: {e}")
+
+    async def _handle_client(self, reader, writer):
+        """
+        UI 连接接收状态广播；连接发来的每行 JSON 是控制指令 (如 {"cmd": "profile", "seconds": 10})，
+        结果以 {"control": ...} 回复。发送过控制指令的连接 (如 scripts/profile_bridge.py) 不再接收广播。
+        """
+        logger.info(f"UI Client connected from {writer.get_extra_info('peername')}")
+        self.clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                self.clients.discard(writer)
+                reply = await self.loop.run_in_executor(None, self.agent.profiler.handle_command, json.loads(line))
+                writer.write(json.dumps({"control": reply}).encode('utf-8') + b"\n")
+                await writer.drain()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Control channel closed: {e}")
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+
+async def ui_client(host, port, on_message, on_status, stop_event, retry_delay=RECONNECT_DELAY):
+    """
+    UI 端接收循环：连接后端，逐行解析 JSON 交给 on_message；
+    连接失败或断开后等待 retry_delay 秒重连，stop_event 被设置时立即返回。
+    """
+    on_status("Connecting...")
+    while not stop_event.is_set():
+        writer = None
+        try:
+            reader, writer = await asyncio.open_connection(host, port, limit=STDIN_LIMIT)
+            on_status("Connected")
+            stop_wait = asyncio.ensure_future(stop_event.wait())
+            try:
+                while True:
+                    read = asyncio.ensure_future(reader.readline())
+                    await asyncio.wait((read, stop_wait), return_when=asyncio.FIRST_COMPLETED)
+                    if not read.done():
+                        read.cancel()
+                        return
+                    line = read.result()
+                    if not line:
+                        break
+                    if not line.strip():
+                        continue
+                    try:
+                        on_message(json.loads(line))
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"JSON Parse Error: {e}")
+            finally:
+                stop_wait.cancel()
+            on_status("Waiting for Game...")
+        except (ConnectionRefusedError, asyncio.TimeoutError):
+            on_status("Waiting for Game...")
+        except (OSError, ValueError) as e:
+            on_status(f"Error: {e}")
+        finally:
+            if writer:
+                writer.close()
+        try:
+            await asyncio.wait_for(stop_event.wait(), retry_delay)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,103 @@
+import collections
+import json
+import logging
+import queue
+
+from spirecomm.communication.coordinator import Coordinator
+
+from src.core.mailbox import StateMailbox
+from src.core.state_view import LazyGameState
+
+logger = logging.getLogger(__name__)
+
+
+class BridgeCoordinator(Coordinator):
+    """
+    在 SpireComm Coordinator 基础上改为构造惰性状态视图 (LazyGameState)，
+    不再为每条消息都构建完整的 Game 对象树。
+    协议处理流程与父类 receive_game_state_update 保持一致。
+    消息经过 StateMailbox 合并：处理前已被更新状态取代的旧状态直接丢弃 (错误消息保留)。
+    io_threads=False 时不启动父类的 stdin / stdout 线程，由 AsyncRuntime 读取 stdin 并放入 input_queue，
+    指令直接写到 stdout (见 src/connector/async_runtime.py)。
+    """
+
+    def __init__(self, recorder=None, io_threads=True):
+        self.io_threads = io_threads
+        if io_threads:
+            super().__init__()
+        else:
+            # 与父类 __init__ 相同的字段，但不启动读写线程
+            self.input_queue = queue.Queue()
+            self.output_queue = queue.Queue()
+            self.action_queue = collections.deque()
+            self.state_change_callback = None
+            self.out_of_game_callback = None
+            self.error_callback = None
+            self.game_is_ready = False
+            self.stop_after_run = False
+            self.in_game = False
+            self.last_game_state = None
+            self.last_error = None
+        self.mailbox = StateMailbox(self.input_queue, recorder)
+
+    def send_message(self, message):
+        if self.io_threads:
+            super().send_message(message)
+        else:
+            print(message, flush=True)
+
+    def get_next_raw_message(self, block=False):
+        return self.mailbox.get(block)
+
+    def build_game_state(self, communication_state):
+        return LazyGameState(communication_state.get("game_state"), communication_state.get("available_commands"))
+
+    def has_work(self):
+        """是否有待处理的消息或可以立即执行的动作"""
+        if self.mailbox.cancelled:
+            return True
+        return bool(self.action_queue) and self.action_queue[0].can_be_executed(self)
+
+    def step(self):
+        """主循环的一次迭代 (不阻塞)：执行可执行的动作，处理一条消息"""
+        self.execute_next_action_if_ready()
+        self.receive_game_state_update(block=False, perform_callbacks=True)
+
+    def run(self):
+        """
+        与父类相同的主循环，但在没有可立即执行的动作时阻塞等待下一条消息，
+        不再空转轮询 (回调中也就不需要用 sleep 压低 CPU 占用)。
+        """
+        while True:
+            self.execute_next_action_if_ready()
+            idle = not self.action_queue or not self.action_queue[0].can_be_executed(self)
+            self.receive_game_state_update(block=idle, perform_callbacks=True)
+
+    def receive_game_state_update(self, block=False, perform_callbacks=True):
+        message = self.get_next_raw_message(block)
+        if message is None:
+            return False
+
+        communication_state = json.loads(message)
+        self.last_error = communication_state.get("error", None)
+        self.game_is_ready = communication_state.get("ready_for_command")
+        if self.last_error is None:
+            self.in_game = communication_state.get("in_game")
+            if self.in_game:
+                self.last_game_state = self.build_game_state(communication_state)
+
+        if perform_callbacks:
+            if self.last_error is not None:
+                self.action_queue.clear()
+                new_action = self.error_callback(self.last_error)
+                self.add_action_to_queue(new_action)
+            elif self.in_game:
+                if len(self.action_queue) == 0:
+                    new_action = self.state_change_callback(self.last_game_state)
+                    self.add_action_to_queue(new_action)
+            elif self.stop_after_run:
+                self.clear_actions()
+            else:
+                new_action = self.out_of_game_callback()
+                self.add_action_to_queue(new_action)
+        return True
@@ -12,7 +12,17 @@ from typing import Dict, Any
 from spirecomm.ai.agent import SimpleAgent
 from spirecomm.spire.card import CardType
 from spirecomm.spire.screen import ScreenType
-from spirecomm.communication.action import PlayCardAction, EndTurnAction, Action
+from spirecomm.communication.action import PlayCardAction, EndTurnAction, ProceedAction, Action
+
+from src.agents import autopilot
+from src.agents.scoring_rules import RulesEngine
+from src.agents.map_planner import MapPlanner
+from src.core.action_labeler import ActionLabeler, Decision
+from src.core.eval_cache import EvalCache
+from src.core.mailbox import EvaluationCancelled
+from src.core.run_history import RunHistory, RunRecorder
+from src.utils.flight_recorder import FlightRecorder
+from src.utils.profiler import ProfilerControl
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -37,14 +47,28 @@ class GameBridge(SimpleAgent):
     它的核心职责是将清洗后的状态广播给 Socket Server。
     """
 
-    def __init__(self, host='127.0.0.1', port=9999):
+    def __init__(self, host='127.0.0.1', port=9999, shared_memory_name=None, deferred_init=False, listen=True):
         super().__init__()
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.server_socket.bind((host, port))
-        self.server_socket.listen(1)
+        # listen=False 时不创建监听 Socket，UI 连接由 AsyncRuntime 处理，广播经 publisher 交给它
+        self.server_socket = None
+        if listen:
+            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server_socket.bind((host, port))
+            self.server_socket.listen(1)
         self.client_socket = None
+        self.publisher = None
         self.running = True
+
+        # 可选的共享内存传输 (同机 UI 免 TCP 读取)，TCP 始终保留作为回退
+        self.shared_state = None
+        if shared_memory_name:
+            try:
+                from src.connector.shm_transport import SharedStateWriter
+                self.shared_state = SharedStateWriter(shared_memory_name)
+                logger.info(f"Shared memory transport enabled: {shared_memory_name}")
+            except Exception as e:
+                logger.error(f"Shared memory unavailable, using TCP only: {e}")
         self.auto_play = False  # 默认关闭自动打牌
         self.auto_start = False # 默认关闭自动开始游戏
         
@@ -54,14 +78,100 @@ class GameBridge(SimpleAgent):
         root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         self.data_dir = os.path.join(root_dir, "data")
         self.data_file = os.path.join(self.data_dir, "training_data.csv")
-        self.log_file = os.path.join(self.data_dir, "collection_debug.log") # 调试日志
+        self.log_file = os.path.join(self.data_dir, "collection_debug.log") # 飞行记录器出错 / 关闭时的转储文件
+        self.move_table_file = os.path.join(self.data_dir, "monster_moves.json") # 学习到的怪物行动表
+        self.weights_file = os.path.join(self.data_dir, "heuristic_weights.json") # 调参得到的评分权重
+        self.rules_file = os.path.join(self.data_dir, "scoring_rules.json") # 声明式评分规则 (不存在时用默认规则)
+        self.cache_file = os.path.join(self.data_dir, "eval_cache.sqlite3") # 跨会话评估缓存
+        self.history_file = os.path.join(self.data_dir, "run_history.sqlite3") # 对局历史 (带局号，可索引查询)
+        self.labels_file = os.path.join(self.data_dir, "action_labels.csv") # 实际出牌 (由状态差异推断)
+        self.outcomes_file = os.path.join(self.data_dir, "combat_outcomes.csv") # 回合 / 战斗结果标签
+        self.policy_file = os.path.join(self.data_dir, "policy_model.npz") # 行为克隆策略 (policy_trainer 输出)
+        self.book_file = os.path.join(self.data_dir, "opening_book.npz") # 初始卡组开局库 (opening_book 输出)
+        self.value_tables_file = os.path.join(self.data_dir, "value_tables.npz") # 商店 / 篝火 / 事件价值表 (value_tables 输出)
+        self.eval_cache = None
+        self.policy_model = None
+        self.opening_book = None
+        self.screen_advisor = None
+        self.rules_engine = None
+        self.shipper = None
+        self.run_recorder = None
+        self.action_labeler = None
+        self.last_decision = None
         self.last_state_hash = None
-        self._init_data_collection()
+        # 取消令牌 (通常是 BridgeCoordinator.mailbox)：有更新的状态在等待时放弃当前状态的评估
+        self.cancel_token = None
+        self.cancelled_evaluations = 0
+        # 决策时间戳的时钟 (测试中替换为虚拟时钟，见 tests/protocol_harness.py)
+        self.clock = time.time
+
+        # 调试事件写入内存环形缓冲区，只在出错、按需 (flight_dump 指令) 或关闭时格式化写盘
+        self.flight = FlightRecorder(self.log_file)
+
+        # 按需启用的性能分析 (CPU 采样 / 内存快照)，目标是构造 Bridge 的线程，即 Coordinator 主循环所在线程
+        self.profiler = ProfilerControl(os.path.join(self.data_dir, "profiles"), thread_id=threading.get_ident(),
+                                        flight_recorder=self.flight)
+
+        # 非关键初始化 (数据采集、评分引擎、模型加载)：
+        # deferred_init=True 时由调用方在 ready 信号之后调用 ensure_initialized()，否则立即完成
+        self.initialized = False
+        self._init_lock = threading.Lock()
+        if not deferred_init:
+            self.ensure_initialized()
 
         # 启动 Socket 监听线程
-        self.socket_thread = threading.Thread(target=self._accept_client, daemon=True)
-        self.socket_thread.start()
-        logger.info(f"GameBridge initialized. Listening on {host}:{port}")
+        self.socket_thread = None
+        if listen:
+            self.socket_thread = threading.Thread(target=self._accept_client, daemon=True)
+            self.socket_thread.start()
+            logger.info(f"GameBridge initialized. Listening on {host}:{port}")
+        else:
+            logger.info("GameBridge initialized")
+
+    def ensure_initialized(self):
+        """完成非关键初始化，只执行一次 (收到第一条游戏状态时也会调用，保证引擎已就绪)"""
+        if self.initialized:
+            return
+        with self._init_lock:
+            if self.initialized:
+                return
+            start = time.perf_counter()
+            # numpy 相关模块较重，放到这里导入，不拖慢 ready 信号
+            from src.agents.move_predictor import MovePredictor
+            from src.core.deck_tracker import DeckTracker
+            from src.agents.policy_model import PolicyModel
+            from src.agents.opening_book import OpeningBook
+            from src.agents.value_tables import ScreenAdvisor, ValueTables
+
+            self._init_data_collection()
+            if self.collect_data:
+                self.run_recorder = RunRecorder(RunHistory(self.history_file))
+                self.action_labeler = ActionLabeler(self.labels_file, self.outcomes_file, self.run_recorder.history)
+
+            # 编译后的评分规则 (存在调参结果时使用其权重)；规则文件或权重文件修改后自动重新加载，无需重启
+            self.rules_engine = RulesEngine(self.rules_file, weights_path=self.weights_file)
+
+            # 持久化评估缓存 (地图路线)，预读最近使用的条目
+            self.eval_cache = EvalCache(self.cache_file)
+            warmed = self.eval_cache.warm_load()
+            if warmed:
+                logger.info(f"Eval cache warmed with {warmed} entries")
+
+            # 地图路线规划 (每张地图预计算一次，随玩家前进增量更新)
+            self.map_planner = MapPlanner(cache=self.eval_cache)
+            # 牌堆追踪 (下回合抽牌预测)
+            self.deck_tracker = DeckTracker()
+            # 怪物行动预测 (手工表 + 录制对局学习结果)
+            self.move_predictor = MovePredictor.load(self.move_table_file)
+            # 训练好的出牌策略 (不存在时返回 None，继续使用启发式)
+            self.policy_model = PolicyModel.load(self.policy_file)
+            # 初始卡组局面的预计算最优出牌 (不存在时返回 None)
+            self.opening_book = OpeningBook.load(self.book_file)
+            # 商店、篝火、事件、升级 / 删除选牌的预计算价值表 (不存在时使用默认表)
+            self.screen_advisor = ScreenAdvisor(ValueTables.load(self.value_tables_file))
+
+            self.initialized = True
+            logger.info(f"Engine initialization finished in {(time.perf_counter() - start) * 1000:.1f} ms")
 
     def _accept_client(self):
         """等待 UI 客户端连接"""
@@ -69,17 +179,74 @@ class GameBridge(SimpleAgent):
             try:
                 client, addr = self.server_socket.accept()
                 logger.info(f"UI Client connected from {addr}")
-                self.client_socket = client
+                previous, self.client_socket = self.client_socket, client
+                threading.Thread(target=self._read_control_commands, args=(client, previous), daemon=True).start()
             except Exception as e:
                 logger.error(f"Socket accept error: {e}")
 
-    def _log_debug(self, msg):
-        """写入调试日志"""
+    def _read_control_commands(self, client, previous):
+        """
+        读取客户端发来的控制指令 (每行一个 JSON，如 {"cmd": "profile", "seconds": 10})，结果以 {"control": ...} 回复。
+        发送控制指令的连接 (如 scripts/profile_bridge.py) 不占用 UI 广播通道，会把广播目标还给之前的 UI 客户端。
+        """
+        buffer = b""
         try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {msg}\n")
-        except:
-            pass
+            while self.running:
+                chunk = client.recv(4096)
+                if not chunk:
+                    break
+                buffer += chunk
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    if not line.strip():
+                        continue
+                    if self.client_socket is client:
+                        self.client_socket = previous
+                    reply = self.profiler.handle_command(json.loads(line))
+                    client.sendall(json.dumps({"control": reply}).encode('utf-8') + b"\n")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Control channel closed: {e}")
+
+    def start_shipping(self, url, interval=30.0, background=True):
+        """
+        把本机采集的 CSV 定期上传到中心汇总服务 (见 src/core/collection_sync.py)。
+        background=False 时不启动上传线程，由调用方定时调用 self.shipper.ship_once (如 AsyncRuntime.every)。
+        """
+        from src.core.collection_sync import CollectionShipper, load_source_id
+        os.makedirs(self.data_dir, exist_ok=True)
+        source_id = load_source_id(os.path.join(self.data_dir, "source_id"))
+        self.shipper = CollectionShipper(url, [self.data_file, self.labels_file, self.outcomes_file], source_id)
+        if background:
+            self.shipper.start(interval)
+        logger.info(f"Shipping collected data to {url} as {source_id}")
+
+    def shutdown(self):
+        """停止监听并释放 Socket / 共享内存"""
+        self.running = False
+        self.profiler.cpu.stop()
+        self.flight.dump(reason="shutdown")
+        for sock in (self.client_socket, self.server_socket):
+            if sock:
+                try:
+                    sock.close()
+                except Exception:
+                    pass
+        self.client_socket = None
+        if self.shared_state:
+            self.shared_state.close()
+            self.shared_state = None
+        if self.eval_cache:
+            self.eval_cache.close()
+        if self.action_labeler:
+            self.action_labeler.close()
+            self.action_labeler = None
+        if self.run_recorder:
+            self.run_recorder.history.close()
+            self.run_recorder = None
+        if self.shipper:
+            # 采集文件已全部关闭，最后上传一次剩余的行
+            self.shipper.stop(flush=True)
+            self.shipper = None
 
     def _init_data_collection(self):
         """初始化数据采集模块"""
@@ -98,11 +265,33 @@ class GameBridge(SimpleAgent):
                         "hand_size", "attack_ratio", "skill_ratio", "max_damage_card",
                         "best_card_name", "best_card_score", "uuid"
                     ])
-            self._log_debug(f"Data collection initialized: {self.data_file}")
+            self.flight.record("Data collection initialized: %s", self.data_file)
             logger.info(f"Data collection initialized: {self.data_file}")
         except Exception as e:
             logger.error(f"Failed to init data collection: {e}")
-            self._log_debug(f"Init failed: {e}")
+            self.flight.error("Init failed: %s", e, exc=e)
+
+    def _observe_run(self, finished=False):
+        """
+        更新对局历史 (新的一局 / 楼层 / 战斗开始结束) 并推断上一状态之后实际打出的牌；
+        回到主菜单时结束当前一局和未结束的战斗。
+        """
+        try:
+            if self.run_recorder:
+                if finished:
+                    self.run_recorder.finish()
+                else:
+                    self.run_recorder.observe(self.game)
+            if self.action_labeler:
+                if finished:
+                    self.action_labeler.end_combat(won=False)
+                else:
+                    self.action_labeler.observe(self.game, self.last_decision)
+                if finished or not self.game.in_combat:
+                    self.last_decision = None
+        except Exception as e:
+            logger.error(f"Run history error: {e}")
+            self.flight.error("Run history error: %s", e, exc=e)
 
     def _get_state_hash(self, player, monsters, hand):
         """生成当前状态的哈希值用于去重"""
@@ -117,11 +306,11 @@ class GameBridge(SimpleAgent):
             return
 
         if not self.game:
-            self._log_debug("Skipped: No game state")
+            self.flight.record("Skipped: No game state")
             return
             
         if not self.game.in_combat:
-            self._log_debug("Skipped: Not in combat")
+            self.flight.record("Skipped: Not in combat")
             return
 
         try:
@@ -132,11 +321,11 @@ class GameBridge(SimpleAgent):
             # 去重检测
             current_hash = self._get_state_hash(player, monsters, hand)
             if current_hash == self.last_state_hash:
-                # self._log_debug("Skipped: Duplicate state") # 太频繁，先注释掉
+                self.flight.record("Skipped: Duplicate state")
                 return
             self.last_state_hash = current_hash
             
-            self._log_debug(f"Recording state... Hand size: {len(hand)}")
+            self.flight.record("Recording state... Hand size: %d", len(hand))
 
             # 1. 基础信息
             hp_ratio = round(player.current_hp / player.max_hp, 2) if player.max_hp > 0 else 0
@@ -201,27 +390,36 @@ class GameBridge(SimpleAgent):
                         best_card_name = best_card.name
 
             # 写入 CSV
+            timestamp = self.clock()
             with open(self.data_file, 'a', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
                 writer.writerow([
-                    time.time(), self.game.floor, hp_ratio, player.energy,
+                    timestamp, self.game.floor, hp_ratio, player.energy,
                     total_monster_hp, "|".join(intents), incoming_damage,
                     hand_size, attack_ratio, skill_ratio, max_dmg,
                     best_card_name, best_score, best_uuid
                 ])
                 f.flush() # 强制刷新
+
+            # 同时写入对局历史库 (带局号和战斗编号)
+            decision_id = None
+            if self.run_recorder:
+                decision_id = self.run_recorder.record_decision(self.game, incoming_damage, best_uuid,
+                                                                best_card_name, best_score, timestamp)
+            # 下一个状态推断出的实际出牌归属于这次推荐
+            self.last_decision = Decision(timestamp, decision_id, best_uuid, best_card_name)
+            if self.action_labeler:
+                self.action_labeler.add_decision(self.last_decision, getattr(self.game, "turn", 0))
                 
-            self._log_debug(f"Recorded successfully: {best_card_name} ({best_score})")
+            self.flight.record("Recorded successfully: %s (%s)", best_card_name, best_score)
                 
         except Exception as e:
             logger.error(f"Data collection error: {e}")
-            self._log_debug(f"Error: {e}")
-            import traceback
-            self._log_debug(traceback.format_exc())
+            self.flight.error("Data collection error: %s", e, exc=e)
 
     def _broadcast_state(self, recommendation: Dict[str, Any], status="In Game", cards=None):
         """将当前状态和推荐操作打包发送给 UI"""
-        if not self.client_socket:
+        if not self.client_socket and not self.shared_state and not self.publisher:
             return
 
         # 提取当前游戏关键信息
@@ -272,9 +470,19 @@ class GameBridge(SimpleAgent):
                         for m in self.game.monsters if not m.is_gone
                     ]
 
+            data = json.dumps(state_snapshot).encode('utf-8')
+
+            # 共享内存：原地覆盖最新快照
+            if self.shared_state:
+                self.shared_state.write(data)
+
+            # 异步运行时：由事件循环写给所有 UI 连接，不阻塞评分线程
+            if self.publisher:
+                self.publisher(data)
+
             # 发送 JSON 数据，以换行符分隔
-            data = json.dumps(state_snapshot) + "\n"
-            self.client_socket.sendall(data.encode('utf-8'))
+            if self.client_socket:
+                self.client_socket.sendall(data + b"\n")
         except BrokenPipeError:
             logger.warning("Client disconnected")
             self.client_socket = None
@@ -284,219 +492,26 @@ class GameBridge(SimpleAgent):
 
     def calculate_recommendation(self) -> Dict[str, int]:
         """
-        基于 Bottled AI 逻辑的启发式推荐引擎。
+        基于 Bottled AI 逻辑的启发式推荐引擎 (规则见 src/agents/scoring_rules.py，与 src/agents/heuristic.py 的分支逐一对应)。
         优先逻辑：
         1. 斩杀 (Lethal)
         2. 保命 (Survival)
         3. 高效 (Efficiency)
         4. AOE 识别 (AOE Check)
         5. 力量加成 (Strength Scaling)
+        开局库 (data/opening_book.npz) 中的局面直接查表；
+        其余局面在存在训练好的策略模型 (data/policy_model.npz) 时改用模型打分。
         """
-        recommendations = {}
         if not self.game or not self.game.hand:
-            return recommendations
-
-        # --- 1. 分析战场形势 (Analyze Battle State) ---
-        player = self.game.player
-        monsters = [m for m in self.game.monsters if not m.is_gone and not m.half_dead]
-        monster_count = len(monsters)
-        
-        # 计算即将受到的总伤害
-        incoming_damage = 0
-        is_attacked = False
-        for m in monsters:
-            if m.intent.is_attack():
-                is_attacked = True
-                # 注意：move_adjusted_damage 是单次伤害，如果有多次攻击(move_hits)，需要乘算
-                damage = m.move_adjusted_damage or 0
-                hits = m.move_hits or 1
-                incoming_damage += damage * hits
-        
-        # 计算需要的格挡
-        needed_block = max(0, incoming_damage - player.block)
-        is_in_danger = needed_block > 0
-        is_critical = player.current_hp <= incoming_damage # 可能会死
-
-        # 检查自身 Buff
-        has_strength = False
-        strength_amt = 0
-        for p in player.powers:
-            if p.power_id == "Strength":
-                has_strength = True
-                strength_amt = p.amount
-                break
-        
-        # --- 2. 预计算：最大可造成伤害 (Pre-calculate Max Possible Damage) ---
-        # 考虑能量限制和卡牌组合，计算当前回合能造成的最大伤害
-        total_hand_damage = 0
-        attack_cards = [c for c in self.game.hand if c.type == CardType.ATTACK]
-        
-        # 简单的背包问题解法 (Greedy approach for max damage)
-        # 方案 A: 优先打出易伤牌 (Vulnerable Priority)
-        damage_a = 0
-        energy_a = player.energy
-        has_vulnerable = False
-        
-        # 寻找易伤源
-        vulnerable_cards = [c for c in attack_cards if "bash" in c.card_id.lower() or "terror" in c.card_id.lower() or "shockwave" in c.card_id.lower() or "uppercut" in c.card_id.lower() or "thunderclap" in c.card_id.lower() or "beam cell" in c.card_id.lower()]
-        other_attacks = [c for c in attack_cards if c not in vulnerable_cards]
-        
-        if vulnerable_cards and energy_a >= vulnerable_cards[0].cost:
-            vuln_card = vulnerable_cards[0]
-            # 计算易伤牌伤害
-            base_dmg = 6
-            if "bash" in vuln_card.card_id.lower(): base_dmg = 8
-            damage_a += base_dmg + strength_amt
-            energy_a -= vuln_card.cost
-            has_vulnerable = True
-            
-        # 填充剩余能量
-        sorted_others = sorted(other_attacks, key=lambda c: 6 if "strike" in c.card_id.lower() else 5, reverse=True) # 简单按伤害排序
-        for card in sorted_others:
-            if energy_a >= card.cost:
-                base_dmg = 6
-                if "strike" in card.card_id.lower(): base_dmg = 6
-                final_dmg = base_dmg + strength_amt
-                if has_vulnerable:
-                    final_dmg = int(final_dmg * 1.5)
-                damage_a += final_dmg
-                energy_a -= card.cost
-                
-        # 方案 B: 纯伤害最大化 (Pure Damage)
-        # 简单按 D/C (Damage Per Cost) 排序? 或者直接按伤害高低填入
-        # 这里简化为按伤害排序
-        damage_b = 0
-        energy_b = player.energy
-        all_sorted = sorted(attack_cards, key=lambda c: 8 if "bash" in c.card_id.lower() else 6, reverse=True)
-        for card in all_sorted:
-            if energy_b >= card.cost:
-                base_dmg = 6
-                if "bash" in card.card_id.lower(): base_dmg = 8
-                damage_b += base_dmg + strength_amt
-                energy_b -= card.cost
-                
-        total_hand_damage = max(damage_a, damage_b)
-
-        # 修正：考虑怪物格挡/蜷身 (Curl Up Adjustment)
-        # 如果怪物有 Curl Up，总伤害需要减去 3 (假设我们会触发它)
-        # 这里简单对所有怪物做保守估计
-        for m in monsters:
-             for p in m.powers:
-                 if p.power_id == "Curl Up":
-                     total_hand_damage -= p.amount
-
-        # 检查是否对某个怪物有斩杀能力 (Total Lethal Check)
-        # 如果总伤害足以杀死某个怪物，那么所有攻击牌的价值都应提升
-        can_kill_monster_map = {} # monster_index -> boolean
-        for m in monsters:
-            if m.current_hp <= total_hand_damage:
-                can_kill_monster_map[m.monster_index] = True
-
-        # --- 3. 遍历手牌打分 ---
-        for card in self.game.hand:
-            score = 50 # 基础分
-            
-            # --- 基础属性修正 ---
-            # 0费牌通常是好的润滑剂
-            if card.cost == 0:
-                score += 10
-            # 费用过高惩罚
-            elif card.cost >= 2:
-                score -= 5
-                
-            # 能量不足直接 0 分
-            if card.cost > player.energy:
-                recommendations[card.uuid] = 0
-                continue
-
-            # --- 核心逻辑 ---
-            
-            # A. 攻击牌逻辑
-            if card.type == CardType.ATTACK:
-                estimated_damage = 6 # 默认值
-                is_aoe = False
-                is_multi_hit = False
-                
-                # 关键词检测
-                lower_name = card.name.lower()
-                lower_id = card.card_id.lower()
-                
-                # 易伤源识别 (Vulnerable Source)
-                is_vulnerable_source = False
-                vulnerable_keywords = ["bash", "terror", "shockwave", "uppercut", "thunderclap", "beam cell"]
-                if any(k in lower_id for k in vulnerable_keywords):
-                    is_vulnerable_source = True
-
-                # AOE 加分
-                if is_aoe and monster_count > 1:
-                    score += 20 * monster_count # 怪物越多越强
-                
-                # 力量加成对多段攻击的加分
-                if has_strength and is_multi_hit:
-                    score += 10 + (strength_amt * 2) # 力量越高，多段攻击价值越高
-
-                # 斩杀判断 (Lethal Logic)
-                is_lethal_contributor = False
-                
-                # A. 单卡斩杀 (Single Card Lethal)
-                estimated_damage = 6 # 默认值
-                if "strike" in lower_id or "打击" in lower_name: estimated_damage = 6 + strength_amt
-                elif "bash" in lower_id: estimated_damage = 8 + strength_amt
-                
-                single_card_lethal = False
-                for m in monsters:
-                    if m.current_hp <= estimated_damage:
-                        single_card_lethal = True
-                        break
-                
-                # B. 组合斩杀 (Combo Lethal)
-                # 如果这张卡是攻击牌，且全队总伤害能造成击杀，这张卡就是斩杀组件
-                combo_lethal = False
-                for m in monsters:
-                    if can_kill_monster_map.get(m.monster_index, False):
-                        combo_lethal = True
-                        break
-
-                if single_card_lethal:
-                    score += 50 # 单卡直接斩杀，极高优先级
-                elif combo_lethal:
-                    score += 40 # 组合斩杀组件，高优先级
-                    
-                    # 关键修正：如果是易伤源，且有后续伤害，给予额外加分以确保先手打出
-                    if is_vulnerable_source and len(attack_cards) > 1:
-                         score += 25 # 确保超过普通打击 (40 vs 40+25)
-                         # 抵消高费用的惩罚
-                         if card.cost >= 2:
-                             score += 5
-                else:
-                    score += 10 # 普通攻击加分
-                    
-                    # 非斩杀情况下的易伤也很重要
-                    if is_vulnerable_source and len(attack_cards) > 1:
-                        score += 15
-
-            # B. 防御牌逻辑
-            elif card.type == CardType.SKILL:
-                # 假设是防御牌 (包含 Defend, Block 等关键词)
-                is_block_card = "Defend" in card.card_id or "Block" in card.name or "Wall" in card.name or "防御" in card.name
-                if is_block_card:
-                    if not is_attacked:
-                        # 负面状态：如果敌人不攻击，防御牌分数归零
-                        score = 0
-                    elif is_in_danger:
-                        score += 30 # 需要防御时，防御牌很重要
-                        if is_critical:
-                            score += 100 # 快死了，必须防御
-                    else:
-                        score -= 10 # 不需要防御时，防御牌价值降低
-            
-            # C. 能力牌逻辑
-            elif card.type == CardType.POWER:
-                score += 20 # 能力牌通常越早打越好
-            
-            recommendations[card.uuid] = min(100, max(0, score)) # 限制在 0-100
-            
-        return recommendations
+            return {}
+        self.deck_tracker.update(self.game)
+        if self.opening_book:
+            scores = self.opening_book.lookup(self.game)
+            if scores is not None:
+                return scores
+        if self.policy_model:
+            return self.policy_model.score_hand(self.game)
+        return self.rules_engine.score_hand(self.game, self.deck_tracker.forecast(), self.move_predictor)
 
     def calculate_reward_recommendation(self, cards) -> Dict[str, int]:
         """计算选牌界面的推荐分数"""
@@ -528,56 +543,112 @@ class GameBridge(SimpleAgent):
         # print(f"DEBUG: Received Game State, Hand size: {len(game_state.hand)}", file=sys.stderr)
         # 1. 更新本地 game 状态 (不要盲目调用 super()，因为它会触发 SimpleAgent 的自动决策逻辑导致崩溃)
         self.game = game_state
+        self.ensure_initialized()
+        self._observe_run()
         
         # 2. 根据当前屏幕类型计算推荐
+        screen_type = None
+        recommendations = {}
+        start = time.perf_counter()
         try:
             screen_type = self.game.screen_type
-            
+            cards = None
+            is_combat = False
+
             if screen_type == ScreenType.CARD_REWARD:
                 # 选牌界面
-                reward_cards = self.game.screen.cards
-                recommendations = self.calculate_reward_recommendation(reward_cards)
-                self._broadcast_state(recommendations, status="Card Reward", cards=reward_cards)
-                
+                cards = self.game.screen.cards
+                recommendations = self.calculate_reward_recommendation(cards)
+                status = "Card Reward"
+
             elif screen_type == ScreenType.MAP:
-                # 地图界面
-                self._broadcast_state({}, status="Map Select")
-                
+                # 地图界面：推荐下一步节点 (路线计算途中有新状态到达时放弃)
+                cards, recommendations = self.map_planner.get_recommendations(self.game, self.cancel_token)
+                status = "Map Select"
+
             elif self.game.in_combat:
                 # 战斗界面
                 recommendations = self.calculate_recommendation()
+                status = "Combat"
+                is_combat = True
+
+            else:
+                # 其他界面：商店、篝火、事件、升级 / 删除选牌按价值表查表推荐，其余 (宝箱、战斗奖励等) 只广播状态
+                status = str(screen_type).split('.')[-1] if screen_type else "Event/Menu"
+                advice = self.screen_advisor.get_recommendations(self.game) if screen_type else None
+                if advice is not None:
+                    cards, recommendations = advice
+
+            # 3. 评估期间已有更新的状态到达：本状态已过时，不广播、不采集，直接处理最新状态
+            if self.cancel_token is not None:
+                self.cancel_token.raise_if_cancelled()
+            self.flight.record("%s: %d recommendations in %.2f ms", status, len(recommendations),
+                               (time.perf_counter() - start) * 1000)
+            if is_combat:
                 # 数据采集
                 self._record_decision_step(recommendations)
-                self._broadcast_state(recommendations, status="Combat")
-                
-            else:
-                # 其他界面 (如事件、商店等)
-                status_name = str(screen_type).split('.')[-1] if screen_type else "Event/Menu"
-                self._broadcast_state({}, status=status_name)
-                
+            self._broadcast_state(recommendations, status=status, cards=cards)
+
+        except EvaluationCancelled:
+            self.cancelled_evaluations += 1
+            self.flight.record("Evaluation cancelled: newer state waiting")
+            return NullAction()
         except Exception as e:
             logger.error(f"Error in recommendation/broadcast: {e}")
-            import traceback
-            traceback.print_exc()
+            self.flight.error("Error in recommendation/broadcast: %s", e, exc=e)
 
         # 4. 自动打牌逻辑开关
         if not self.auto_play:
-            # 暂停模式：不发送任何指令，或者发送空指令防止 Coordinator 崩溃
-            # 为了防止 CPU 空转，稍微 sleep 一下
-            time.sleep(0.5) 
+            # 暂停模式：不发送任何指令 (BridgeCoordinator 在没有待执行动作时阻塞等待下一条消息，无需 sleep)
             return NullAction()
             
-        # 5. 如果开启了自动打牌，则调用父类逻辑或自定义逻辑
+        # 5. 自动模式：由推荐引擎直接给出动作，引擎未覆盖的界面 (表外事件、宝箱、Boss 遗物等) 交给 SimpleAgent
         try:
-             return super().get_next_action_in_game(game_state)
+            action = self._autopilot_action(screen_type, recommendations)
+            if action is None:
+                action = super().get_next_action_in_game(game_state)
+            self.flight.record("Auto-play: %s", action.command)
+            return action
         except Exception as e:
              logger.error(f"Auto-play logic error: {e}")
-             return EndTurnAction()
+             self.flight.error("Auto-play logic error: %s", e, exc=e)
+             # 只发送当前界面合法的指令 (奖励等界面上 end 不可用)
+             game = self.game
+             if game.in_combat and game.end_available:
+                 return EndTurnAction()
+             if game.proceed_available:
+                 return ProceedAction()
+             return NullAction()
+
+    def _autopilot_action(self, screen_type, recommendations):
+        """根据本状态的推荐分选择动作，返回 None 表示交给 SimpleAgent"""
+        game = self.game
+        if screen_type == ScreenType.COMBAT_REWARD:
+            return autopilot.choose_combat_reward_action(game)
+        if game.choice_available:
+            if screen_type == ScreenType.CARD_REWARD:
+                return autopilot.choose_reward_action(game, recommendations)
+            if screen_type == ScreenType.MAP:
+                return autopilot.choose_map_action(game, recommendations)
+            if screen_type == ScreenType.REST:
+                return autopilot.choose_rest_action(game, recommendations)
+            if screen_type == ScreenType.SHOP_SCREEN:
+                return autopilot.choose_shop_action(game, recommendations)
+            if screen_type == ScreenType.EVENT:
+                return autopilot.choose_event_action(game, recommendations)
+            if screen_type == ScreenType.GRID:
+                return autopilot.choose_grid_action(game, recommendations)
+            # 战斗中的选牌界面 (弃牌、消耗等) 仍由 SimpleAgent 处理
+            return None
+        if game.in_combat and not game.proceed_available:
+            return autopilot.choose_combat_action(game, recommendations)
+        return None
 
     def get_next_action_out_of_game(self):
         """
         处理游戏外的状态（如菜单界面）。
         """
+        self._observe_run(finished=True)
         # 即使在游戏外，也广播状态（保持 UI 连接活跃）
         try:
             # 尝试广播空状态或上一次的状态
@@ -589,5 +660,4 @@ class GameBridge(SimpleAgent):
             return super().get_next_action_out_of_game()
         else:
             # 如果不自动开始，就什么都不做，等待用户手动操作
-            time.sleep(1) # 避免疯狂轮询
             return NullAction()
@@ -0,0 +1,101 @@
+import logging
+import struct
+import sys
+from multiprocessing import shared_memory
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHM_NAME = "spire_ai_state"
+DEFAULT_SHM_SIZE = 256 * 1024
+
+# 头部布局: seq (uint64) | length (uint32) | flags (uint32)
+# seq 为顺序锁 (seqlock) 计数：写入期间为奇数，写完为偶数
+HEADER = struct.Struct("<QII")
+FLAG_CLOSED = 1
+
+
+class SharedStateWriter:
+    """
+    共享内存状态写入端 (后端使用)。
+    只保留最新的一份快照：每次写入原地覆盖，通过 seqlock 保证读取端拿到的是完整数据。
+    """
+
+    def __init__(self, name=DEFAULT_SHM_NAME, size=DEFAULT_SHM_SIZE):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # 上次异常退出留下的同名共享内存，直接复用
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.buf = self.shm.buf
+        self.capacity = len(self.buf) - HEADER.size
+        self.seq = HEADER.unpack_from(self.buf, 0)[0]
+        if self.seq % 2:
+            self.seq += 1
+        HEADER.pack_into(self.buf, 0, self.seq, 0, 0)
+
+    def write(self, payload: bytes):
+        """写入一份快照，超过容量时丢弃并返回 False"""
+        length = len(payload)
+        if length > self.capacity:
+            logger.warning(f"Snapshot too large for shared memory ({length} > {self.capacity})")
+            return False
+        self.seq += 1  # 奇数：写入中
+        HEADER.pack_into(self.buf, 0, self.seq, length, 0)
+        self.buf[HEADER.size:HEADER.size + length] = payload
+        self.seq += 1  # 偶数：写入完成
+        HEADER.pack_into(self.buf, 0, self.seq, length, 0)
+        return True
+
+    def close(self):
+        """标记关闭，让读取端回退到 TCP，然后释放共享内存"""
+        try:
+            HEADER.pack_into(self.buf, 0, self.seq + 2, 0, FLAG_CLOSED)
+            self.buf = None
+            self.shm.close()
+            self.shm.unlink()
+        except Exception as e:
+            logger.error(f"Failed to close shared memory: {e}")
+
+
+class SharedStateReader:
+    """
+    共享内存状态读取端 (UI 使用)。
+    read_latest() 只读取头部的版本号判断是否有新数据，无新数据时不做任何拷贝，也不产生系统调用。
+    """
+
+    def __init__(self, name=DEFAULT_SHM_NAME):
+        self.shm = shared_memory.SharedMemory(name=name)
+        if sys.platform != "win32":
+            # POSIX 下 attach 也会被 resource_tracker 登记，进程退出时会误删后端创建的共享内存
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            except Exception:
+                pass
+        self.buf = self.shm.buf
+        self.last_seq = None
+        self.closed = False
+
+    def read_latest(self, max_retries=100):
+        """返回最新快照 (bytes)；没有新数据、写入端已关闭或多次重试仍冲突时返回 None"""
+        for _ in range(max_retries):
+            seq, length, flags = HEADER.unpack_from(self.buf, 0)
+            if flags & FLAG_CLOSED:
+                self.closed = True
+                return None
+            if seq == self.last_seq or seq == 0:
+                return None
+            if seq % 2:
+                continue  # 写入中，重试
+            if length == 0:
+                self.last_seq = seq
+                return None
+            payload = bytes(self.buf[HEADER.size:HEADER.size + length])
+            if HEADER.unpack_from(self.buf, 0)[0] == seq:
+                self.last_seq = seq
+                return payload
+        return None
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
@@ -0,0 +1,178 @@
+import csv
+import logging
+import os
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# 一张手牌的精简信息
+CardInfo = namedtuple("CardInfo", ["uuid", "card_id", "name", "cost", "has_target"])
+
+# 战斗中某一时刻的精简快照 (只保留推断出牌所需的字段)
+CombatSnapshot = namedtuple("CombatSnapshot", ["floor", "turn", "hp", "energy", "hand", "monster_hp"])
+
+# 推断出的一次出牌
+PlayedCard = namedtuple("PlayedCard", ["card", "target_index", "energy_spent", "damage_dealt"])
+
+# 已知推荐 (来自 _record_decision_step)：出牌会被归到最近一次推荐上
+Decision = namedtuple("Decision", ["timestamp", "decision_id", "uuid", "card_name"])
+
+LABEL_HEADER = [
+    "decision_timestamp", "floor", "turn", "recommended_uuid", "recommended_card",
+    "played_uuid", "played_card", "target_index", "energy_spent", "damage_dealt", "followed",
+]
+OUTCOME_HEADER = [
+    "decision_timestamp", "floor", "turn", "turn_damage_dealt", "turn_damage_taken",
+    "combat_turns", "combat_hp_lost", "combat_won",
+]
+
+
+def snapshot(game):
+    """从 Game / LazyGameState 提取战斗快照"""
+    player = game.player
+    hand = {}
+    for c in game.hand:
+        hand[c.uuid] = CardInfo(c.uuid, c.card_id, c.name, c.cost, bool(getattr(c, "has_target", False)))
+    monster_hp = tuple((m.current_hp or 0) + (m.block or 0) for m in game.monsters)
+    return CombatSnapshot(game.floor, getattr(game, "turn", 0), player.current_hp, player.energy, hand, monster_hp)
+
+
+def infer_played_card(prev, curr):
+    """
+    对比同一回合内的两个连续快照，推断打出的牌。
+    - 手牌中消失的牌里，费用与能量变化一致的那张 (X 费牌消耗全部能量) 视为打出的牌
+    - 目标为生命+格挡下降最多的怪物
+    回合变化 (回合结束弃牌) 或无法唯一确定时返回 None。
+    """
+    if curr.turn != prev.turn or curr.floor != prev.floor:
+        return None
+    removed = [card for uuid, card in prev.hand.items() if uuid not in curr.hand]
+    if not removed:
+        return None
+    spent = prev.energy - curr.energy
+    if len(removed) == 1:
+        card = removed[0]
+    else:
+        # 一次移除多张 (如打出的牌消耗了其他手牌)：按能量变化挑出打出的那张
+        matching = [c for c in removed if c.cost == spent or (c.cost == -1 and curr.energy == 0)]
+        if len(matching) != 1:
+            return None
+        card = matching[0]
+
+    drops = [max(0, before - after) for before, after in zip(prev.monster_hp, curr.monster_hp)]
+    damage = sum(drops)
+    target = None
+    if card.has_target and damage > 0:
+        target = max(range(len(drops)), key=lambda i: drops[i])
+    return PlayedCard(card, target, spent, damage)
+
+
+class _CsvAppender:
+    """保持文件打开的 CSV 追加写入 (每行 flush，不需要重新读取已有内容)"""
+
+    def __init__(self, path, header):
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        if is_new:
+            self.writer.writerow(header)
+            self.file.flush()
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ActionLabeler:
+    """
+    通过连续状态的差异推断玩家实际的出牌，并在回合/战斗结束后补上结果标签。
+    - action_labels.csv: 每次出牌一行 (推荐的牌 vs 实际打出的牌)
+    - combat_outcomes.csv: 战斗结束时为本场每次推荐写一行回合与战斗结果
+    两个文件与 training_data.csv 通过 decision_timestamp 关联；结果在内存中按战斗缓存，
+    战斗结束时一次性追加，从不回头修改或读取已写入的行。
+    """
+
+    def __init__(self, labels_path, outcomes_path, history=None):
+        self.labels = _CsvAppender(labels_path, LABEL_HEADER)
+        self.outcomes = _CsvAppender(outcomes_path, OUTCOME_HEADER)
+        self.history = history
+        self.prev = None
+        self.combat_start_hp = None
+        self.turn_damage_dealt = {}
+        self.turn_start_hp = {}
+        self.turn_end_hp = {}
+        self.decisions = []
+        self.labeled = 0
+
+    def observe(self, game, decision=None):
+        """
+        处理一个新状态。decision 为上一状态时给出的推荐 (出牌归属于它)。
+        返回推断出的 PlayedCard (没有出牌时为 None)。
+        """
+        if not game.in_combat:
+            self.end_combat(won=game.current_hp > 0)
+            return None
+
+        curr = snapshot(game)
+        if self.prev is None or curr.floor != self.prev.floor:
+            self.end_combat(won=True)
+            self.combat_start_hp = curr.hp
+        self.turn_start_hp.setdefault(curr.turn, curr.hp)
+        self.turn_end_hp[curr.turn] = curr.hp
+
+        played = None
+        if self.prev is not None and curr.floor == self.prev.floor:
+            played = infer_played_card(self.prev, curr)
+            if played:
+                self.turn_damage_dealt[curr.turn] = self.turn_damage_dealt.get(curr.turn, 0) + played.damage_dealt
+                self._write_label(curr, played, decision)
+        self.prev = curr
+        return played
+
+    def add_decision(self, decision, turn):
+        """登记一次推荐，战斗结束时为其写出结果"""
+        if decision and (not self.decisions or self.decisions[-1][0] != decision.timestamp):
+            self.decisions.append((decision.timestamp, turn))
+
+    def _write_label(self, curr, played, decision):
+        card = played.card
+        recommended_uuid = decision.uuid if decision else ""
+        self.labels.write_rows([[
+            decision.timestamp if decision else "", curr.floor, curr.turn,
+            recommended_uuid, decision.card_name if decision else "",
+            card.uuid, card.name, "" if played.target_index is None else played.target_index,
+            played.energy_spent, played.damage_dealt, int(bool(recommended_uuid) and recommended_uuid == card.uuid),
+        ]])
+        self.labeled += 1
+        if self.history and decision and decision.decision_id:
+            self.history.label_decision(decision.decision_id, card.uuid, card.name)
+
+    def end_combat(self, won):
+        """战斗结束：为本场每次推荐追加回合 / 战斗结果"""
+        if self.prev is None:
+            return
+        floor = self.prev.floor
+        turns = max(self.turn_start_hp) if self.turn_start_hp else 0
+        hp_lost = max(0, (self.combat_start_hp or 0) - self.prev.hp)
+        rows = []
+        for timestamp, turn in self.decisions:
+            # 本回合承受的伤害 = 本回合最后的血量 - 下回合开始时的血量 (怪物行动发生在两者之间)
+            next_start = self.turn_start_hp.get(turn + 1, self.prev.hp)
+            taken = max(0, self.turn_end_hp.get(turn, next_start) - next_start)
+            rows.append([timestamp, floor, turn, self.turn_damage_dealt.get(turn, 0), taken,
+                         turns, hp_lost, int(won)])
+        if rows:
+            self.outcomes.write_rows(rows)
+        self.prev = None
+        self.combat_start_hp = None
+        self.turn_damage_dealt = {}
+        self.turn_start_hp = {}
+        self.turn_end_hp = {}
+        self.decisions = []
+
+    def close(self):
+        self.labels.close()
+        self.outcomes.close()
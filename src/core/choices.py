@@ -0,0 +1,17 @@
+from collections import namedtuple
+
+# 非卡牌界面 (地图、商店、篝火、事件) 的可选项。
+# 字段与卡牌保持一致，这样 GameBridge._broadcast_state 可以像处理奖励牌一样序列化它们，
+# UI 端无需区分卡牌和其他选项。
+ScreenChoice = namedtuple("ScreenChoice", ["uuid", "name", "cost", "type"])
+
+
+def scale_scores(values):
+    """
+    将任意尺度的估值映射到 0-100 的推荐分。
+    最优项固定为 100，其余按与最优项的差距递减。
+    """
+    if not values:
+        return {}
+    best = max(values.values())
+    return {k: max(0, min(100, int(round(100 - 10 * (best - v))))) for k, v in values.items()}
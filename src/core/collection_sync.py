@@ -0,0 +1,364 @@
+"""
+多台机器的数据采集汇总。
+
+每个 Bridge 仍然只追加写本地 CSV (training_data.csv / action_labels.csv / combat_outcomes.csv)；
+CollectionShipper 在后台把其中已写完整的行分批、gzip 压缩后通过 HTTP 发给中心的 Aggregator。
+
+- 行号：每行以 (来源 ID, 数据流, 该行在文件中的字节偏移) 唯一标识。CSV 只追加不修改，偏移是稳定的；
+  数据流 = 文件名 + 第一行数据的哈希，文件被删除重建后视为新的数据流，不会与旧偏移冲突
+- 去重：Aggregator 以上述三元组为主键 INSERT OR IGNORE，重复上传 (例如确认回包丢失后重发) 只会被忽略
+- 续传：Aggregator 记录每个数据流已提交到的偏移，Shipper 在每个进程中首次上传前先查询它，
+  断线或重启后都从服务端已提交的位置继续 (本地不保存游标)；服务端不可达时不丢数据，下次再试
+
+用法:
+    python -m src.core.collection_sync serve --db data/aggregate.sqlite3 --port 8765
+    python -m src.core.collection_sync ship --url http://192.168.1.10:8765 --watch 30
+    python -m src.core.collection_sync export --db data/aggregate.sqlite3 --output data/merged
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+DEFAULT_STREAMS = ("training_data.csv", "action_labels.csv", "combat_outcomes.csv")
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS streams (
+        source TEXT NOT NULL, stream TEXT NOT NULL, name TEXT NOT NULL, header TEXT NOT NULL,
+        committed_offset INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL,
+        PRIMARY KEY (source, stream))""",
+    """CREATE TABLE IF NOT EXISTS rows (
+        source TEXT NOT NULL, stream TEXT NOT NULL, offset INTEGER NOT NULL,
+        name TEXT NOT NULL, line TEXT NOT NULL, received_at REAL NOT NULL,
+        PRIMARY KEY (source, stream, offset))""",
+    "CREATE INDEX IF NOT EXISTS idx_rows_name ON rows (name)",
+]
+
+
+def load_source_id(path):
+    """本机的来源 ID (首次使用时随机生成并保存，同一台机器上的多个数据目录也不会冲突)"""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            source_id = f.read().strip()
+        if source_id:
+            return source_id
+    source_id = uuid.uuid4().hex
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(source_id)
+    return source_id
+
+
+def read_complete_lines(path, offset, max_rows, max_bytes):
+    """
+    从 offset 开始读取完整的行 (不含仍在写入中的最后半行)。
+    返回 ([(行偏移, 行文本)], 读到的结束偏移)。
+    """
+    rows = []
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(max_bytes)
+        # 单行超过 max_bytes 时继续读，直到读到一个完整的行或文件末尾
+        while b"\n" not in data and len(data) == max_bytes:
+            more = f.read(max_bytes)
+            if not more:
+                break
+            data += more
+            max_bytes = len(data)
+    end = data.rfind(b"\n")
+    if end < 0:
+        return rows, offset
+    position = 0
+    for raw in data[:end + 1].splitlines(keepends=True):
+        rows.append((offset + position, raw.decode("utf-8").rstrip("\r\n")))
+        position += len(raw)
+        if len(rows) >= max_rows:
+            break
+    return rows, offset + position
+
+
+class CsvStream:
+    """一个本地 CSV 文件：表头、第一行数据之后的偏移，以及由第一行数据得出的数据流 ID"""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.header = None
+        self.stream_id = None
+        self.data_offset = None
+
+    def refresh(self):
+        """读取表头并确定数据流 ID；文件不存在或还没有完整的数据行时返回 False"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "rb") as f:
+            header = f.readline()
+            first_row = f.readline()
+        if not header.endswith(b"\n") or not first_row.endswith(b"\n"):
+            return False
+        stream_id = f"{self.name}:{hashlib.sha1(first_row).hexdigest()[:12]}"
+        self.header = header.decode("utf-8").rstrip("\r\n")
+        self.data_offset = len(header)
+        self.stream_id = stream_id
+        return True
+
+
+class CollectionShipper:
+    """把本地 CSV 的新行批量上传到 Aggregator (可在 Bridge 进程内用后台线程运行)"""
+
+    def __init__(self, url, paths, source_id, batch_rows=500, batch_bytes=256 * 1024, timeout=10.0):
+        self.url = url.rstrip("/")
+        self.streams = [CsvStream(p) for p in paths]
+        self.source_id = source_id
+        self.batch_rows = batch_rows
+        self.batch_bytes = batch_bytes
+        self.timeout = timeout
+        self.cursors = {}  # 数据流 ID -> 下一个待上传的偏移 (首次使用时从服务端读取)
+        self.rows_sent = 0
+        self.bytes_sent = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _request(self, method, path, payload=None):
+        body = None
+        headers = {}
+        if payload is not None:
+            body = gzip.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+            headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        request = urllib.request.Request(self.url + path, data=body, headers=headers, method=method)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            result = json.loads(response.read().decode("utf-8"))
+        if body:
+            self.bytes_sent += len(body)
+        return result
+
+    def _sync_cursor(self, stream):
+        """从服务端已提交的偏移继续 (跳过表头)"""
+        query = urllib.parse.urlencode({"source": self.source_id, "stream": stream.stream_id})
+        committed = self._request("GET", f"/cursor?{query}")["committed_offset"]
+        self.cursors[stream.stream_id] = max(committed, stream.data_offset)
+
+    def ship_once(self):
+        """上传所有数据流中尚未确认的完整行，返回本次确认的行数；服务端不可达时返回已确认的部分"""
+        shipped = 0
+        try:
+            for stream in self.streams:
+                if not stream.refresh():
+                    continue
+                if stream.stream_id not in self.cursors:
+                    self._sync_cursor(stream)
+                while True:
+                    offset = self.cursors[stream.stream_id]
+                    rows, end = read_complete_lines(stream.path, offset, self.batch_rows, self.batch_bytes)
+                    if not rows:
+                        break
+                    result = self._request("POST", "/ingest", {
+                        "source": self.source_id, "stream": stream.stream_id, "name": stream.name,
+                        "header": stream.header, "end_offset": end, "rows": rows,
+                    })
+                    self.cursors[stream.stream_id] = result["committed_offset"]
+                    shipped += len(rows)
+                    self.rows_sent += len(rows)
+        except (urllib.error.URLError, OSError, ValueError, KeyError) as e:
+            logger.warning(f"Collection upload interrupted, will resume later: {e}")
+        return shipped
+
+    def start(self, interval=30.0):
+        """后台线程每 interval 秒上传一次"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while not self._stop.is_set():
+            self.ship_once()
+            self._stop.wait(interval)
+
+    def stop(self, flush=True):
+        """停止后台线程；flush=True 时再上传一次剩余的行"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.timeout + 1)
+            self._thread = None
+        if flush:
+            self.ship_once()
+
+
+class Aggregator:
+    """汇总库：按 (source, stream, offset) 去重保存所有机器上传的行"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        with self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+
+    def committed_offset(self, source, stream):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT committed_offset FROM streams WHERE source = ? AND stream = ?", (source, stream)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def ingest(self, batch):
+        """写入一批行 (同一事务)，返回 (新增行数, 重复行数, 已提交偏移)"""
+        now = time.time()
+        source, stream, name = batch["source"], batch["stream"], batch["name"]
+        rows = [(source, stream, offset, name, line, now) for offset, line in batch["rows"]]
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany("INSERT OR IGNORE INTO rows VALUES (?, ?, ?, ?, ?, ?)", rows)
+            inserted = self.conn.total_changes - before
+            self.conn.execute(
+                "INSERT INTO streams (source, stream, name, header, committed_offset, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(source, stream) DO UPDATE SET"
+                " committed_offset = MAX(committed_offset, excluded.committed_offset), updated_at = excluded.updated_at",
+                (source, stream, name, batch["header"], batch["end_offset"], now)
+            )
+            committed = self.conn.execute(
+                "SELECT committed_offset FROM streams WHERE source = ? AND stream = ?", (source, stream)
+            ).fetchone()[0]
+        return inserted, len(rows) - inserted, committed
+
+    def export(self, output_dir):
+        """按文件名合并导出 CSV (首列为来源 ID)，返回 {文件名: 行数}"""
+        os.makedirs(output_dir, exist_ok=True)
+        counts = {}
+        with self._lock:
+            names = [r[0] for r in self.conn.execute("SELECT DISTINCT name FROM streams ORDER BY name")]
+            for name in names:
+                header = self.conn.execute(
+                    "SELECT header FROM streams WHERE name = ? ORDER BY updated_at DESC LIMIT 1", (name,)
+                ).fetchone()[0]
+                with open(os.path.join(output_dir, name), "w", newline="", encoding="utf-8") as f:
+                    f.write("source," + header + "\n")
+                    count = 0
+                    for source, line in self.conn.execute(
+                            "SELECT source, line FROM rows WHERE name = ? ORDER BY source, stream, offset", (name,)):
+                        f.write(f"{source},{line}\n")
+                        count += 1
+                counts[name] = count
+        return counts
+
+    def close(self):
+        self.conn.close()
+
+
+class _IngestHandler(BaseHTTPRequestHandler):
+    """GET /cursor?source=..&stream=.. 查询已提交偏移；POST /ingest 上传一批行 (可 gzip)"""
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path != "/cursor":
+            self._reply(404, {"error": "not found"})
+            return
+        query = urllib.parse.parse_qs(url.query)
+        try:
+            offset = self.server.aggregator.committed_offset(query["source"][0], query["stream"][0])
+        except KeyError:
+            self._reply(400, {"error": "source and stream are required"})
+            return
+        self._reply(200, {"committed_offset": offset})
+
+    def do_POST(self):
+        if self.path != "/ingest":
+            self._reply(404, {"error": "not found"})
+            return
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            inserted, duplicates, committed = self.server.aggregator.ingest(json.loads(body))
+        except (ValueError, KeyError, OSError) as e:
+            self._reply(400, {"error": str(e)})
+            return
+        self._reply(200, {"inserted": inserted, "duplicates": duplicates, "committed_offset": committed})
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_server(aggregator, host="0.0.0.0", port=DEFAULT_PORT):
+    """创建 HTTP 服务 (port=0 时由系统分配端口，测试中使用)；调用方负责 serve_forever / shutdown"""
+    server = ThreadingHTTPServer((host, port), _IngestHandler)
+    server.daemon_threads = True
+    server.aggregator = aggregator
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run the central aggregator")
+    serve.add_argument("--db", default="data/aggregate.sqlite3")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ship = sub.add_parser("ship", help="upload local collection files")
+    ship.add_argument("--url", required=True)
+    ship.add_argument("--data-dir", default="data")
+    ship.add_argument("--watch", type=float, default=0, help="keep uploading every N seconds")
+    export = sub.add_parser("export", help="write merged CSV files")
+    export.add_argument("--db", default="data/aggregate.sqlite3")
+    export.add_argument("--output", default="data/merged")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == "serve":
+        aggregator = Aggregator(args.db)
+        server = make_server(aggregator, args.host, args.port)
+        logger.info(f"Aggregator listening on {args.host}:{server.server_address[1]} ({args.db})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            aggregator.close()
+    elif args.command == "ship":
+        shipper = CollectionShipper(
+            args.url, [os.path.join(args.data_dir, name) for name in DEFAULT_STREAMS],
+            load_source_id(os.path.join(args.data_dir, "source_id")))
+        while True:
+            logger.info(f"Uploaded {shipper.ship_once()} rows ({shipper.bytes_sent} bytes compressed so far)")
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    else:
+        aggregator = Aggregator(args.db)
+        for name, count in aggregator.export(args.output).items():
+            print(f"{name}: {count} rows")
+        aggregator.close()
+
+
+if __name__ == "__main__":
+    main()
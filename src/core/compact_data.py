@@ -0,0 +1,361 @@
+"""
+采集数据离线压缩：全局去重、按日期 / 来源分片排序，并报告压缩比。
+
+Bridge 采集时只和上一条状态比较 (last_state_hash)，重复发送的状态、重启后的会话、
+多机合并导出 (collection_sync export，首列为来源 ID) 都会留下重复行，且 CSV 只会不断增长。
+本工具流式处理任意大小的输入，内存占用只取决于去重索引和排序块大小：
+
+1. 逐行读取所有输入 (表头按列名对齐，缺少的列补空)，对去掉 timestamp / source 之后的内容取 blake2b 摘要；
+   索引中已有该摘要的行视为重复，保留最先出现的一行。
+   索引默认为精确集合 (每行约 60 字节)；预计行数超过 EXACT_INDEX_LIMIT 时改用 Bloom 过滤器
+   (每行约 20 bit，按 --fp-rate 的概率把不重复的行误判为重复)
+2. 去重后的行 (以编码后的 CSV 文本保存，比字段列表省内存) 按 (分片, 时间戳) 分块排序，写入临时文件
+3. 多路归并各块，按分片写入 output/<分片>/part-00000.csv，单个文件超过 --max-shard-mb 时换下一个
+   (分片：按 timestamp 的 UTC 日期、按来源 ID，或不分片)
+
+用法:
+    python -m src.core.compact_data data/training_data.csv --output data/compacted
+    python -m src.core.compact_data data/merged/training_data.csv data/training_data.csv --output data/compacted --shard-by source
+    python -m src.core.compact_data big/*.csv --output data/compacted --index bloom --fp-rate 1e-5
+"""
+import argparse
+import csv
+import hashlib
+import heapq
+import logging
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# 不参与去重的列：同一状态在不同会话 / 机器上被记录时只有这些列不同
+IGNORED_COLUMNS = ("timestamp", "source")
+SHARD_MODES = ("date", "source", "none")
+CHUNK_ROWS = 200000
+MAX_SHARD_BYTES = 64 * 1024 * 1024
+EXACT_INDEX_LIMIT = 5000000
+DEFAULT_FP_RATE = 1e-4
+
+CompactionStats = namedtuple(
+    "CompactionStats", "input_rows unique_rows duplicates input_bytes output_bytes shards parts index")
+
+
+class ExactIndex:
+    """内容摘要 (前 8 字节) 的集合；64 bit 摘要在 1 亿行内碰撞概率约 3e-4"""
+
+    name = "exact"
+
+    def __init__(self):
+        self._seen = set()
+
+    def add(self, digest):
+        """加入摘要，已存在时返回 False"""
+        key = int.from_bytes(digest[:8], "little")
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def __len__(self):
+        return len(self._seen)
+
+
+class BloomFilter:
+    """固定大小的 Bloom 过滤器：按 capacity 和 fp_rate 预分配位数组，k 个位置由摘要双重哈希得到"""
+
+    name = "bloom"
+
+    def __init__(self, capacity, fp_rate=DEFAULT_FP_RATE):
+        capacity = max(1, capacity)
+        self.bits = max(64, int(math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)))
+        self.k = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest):
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.k)]
+
+    def add(self, digest):
+        """加入摘要，(可能) 已存在时返回 False"""
+        array = self._array
+        new = False
+        for pos in self._positions(digest):
+            mask = 1 << (pos & 7)
+            if not array[pos >> 3] & mask:
+                array[pos >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __contains__(self, digest):
+        array = self._array
+        return all(array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+    def __len__(self):
+        return self.count
+
+
+def read_header(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), None) or []
+
+
+def merged_header(paths):
+    """所有输入表头按出现顺序合并"""
+    header = []
+    for path in paths:
+        for column in read_header(path):
+            if column not in header:
+                header.append(column)
+    return header
+
+
+def estimate_rows(paths, sample=1000):
+    """按第一个非空文件前 sample 行的平均长度估计总行数"""
+    total = sum(os.path.getsize(p) for p in paths)
+    for path in paths:
+        with open(path, "rb") as f:
+            f.readline()
+            lengths = [len(line) for _, line in zip(range(sample), f)]
+        if lengths:
+            return int(total / (sum(lengths) / len(lengths)))
+    return 0
+
+
+def iter_rows(paths, header):
+    """逐行读取所有输入，按合并后的表头对齐"""
+    for path in paths:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            file_header = next(reader, None)
+            if not file_header:
+                continue
+            positions = {column: i for i, column in enumerate(file_header)}
+            mapping = [positions.get(column) for column in header]
+            if mapping == list(range(len(header))):
+                for row in reader:
+                    yield row
+                continue
+            for row in reader:
+                yield [row[i] if i is not None and i < len(row) else "" for i in mapping]
+
+
+def _shard_function(mode, header):
+    ts_col = header.index("timestamp") if "timestamp" in header else None
+    source_col = header.index("source") if "source" in header else None
+
+    def timestamp(row):
+        try:
+            return float(row[ts_col])
+        except (TypeError, ValueError, IndexError):
+            return None
+
+    days = {}  # UTC 日序号 -> 分片名 (同一天的行共用一个字符串)
+
+    def date_key(ts):
+        day = int(ts // 86400)
+        key = days.get(day)
+        if key is None:
+            key = days[day] = time.strftime("%Y-%m-%d", time.gmtime(day * 86400))
+        return key
+
+    def shard(row):
+        ts = timestamp(row) if ts_col is not None else None
+        if mode == "date":
+            key = date_key(ts) if ts is not None else "unknown"
+        elif mode == "source":
+            key = (row[source_col] if source_col is not None else "") or "local"
+        else:
+            key = "all"
+        return key, ts if ts is not None else 0.0
+
+    return shard
+
+
+def _write_run(chunk, tmp_dir, runs):
+    chunk.sort()
+    path = os.path.join(tmp_dir, f"run-{len(runs):05d}.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for shard, ts, seq, line in chunk:
+            writer.writerow([shard, repr(ts), seq, line])
+    runs.append(path)
+    chunk.clear()
+
+
+def _read_run(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for record in csv.reader(f):
+            yield record[0], float(record[1]), int(record[2]), record[3]
+
+
+class _LineBuffer:
+    """csv.writer 的目标：保存最近写入的一行"""
+
+    def __init__(self):
+        self.line = ""
+
+    def write(self, line):
+        self.line = line
+
+
+class LineEncoder:
+    """把字段列表编码为一行 CSV 文本 (含换行，与 csv.writer 写文件的格式相同)"""
+
+    def __init__(self):
+        self._buffer = _LineBuffer()
+        self._writer = csv.writer(self._buffer)
+
+    def __call__(self, row):
+        self._writer.writerow(row)
+        return self._buffer.line
+
+
+class ShardWriter:
+    """按分片写出 part 文件 (行为已编码的 CSV 文本)，单个文件达到 max_bytes 后换下一个；同一时间只打开一个文件"""
+
+    def __init__(self, output_dir, header, max_bytes=MAX_SHARD_BYTES):
+        self.output_dir = output_dir
+        self.header = header
+        self.max_bytes = max_bytes
+        self.parts = 0
+        self.shards = 0
+        self.bytes_written = 0
+        self._header_line = LineEncoder()(header).encode("utf-8")
+        self._file = None
+        self._shard = None
+        self._part = 0
+        self._size = 0
+
+    def _open(self, shard):
+        if shard != self._shard:
+            self._shard = shard
+            self._part = 0
+            self.shards += 1
+        else:
+            self._part += 1
+        self.close()
+        shard_dir = os.path.join(self.output_dir, shard)
+        os.makedirs(shard_dir, exist_ok=True)
+        self._file = open(os.path.join(shard_dir, f"part-{self._part:05d}.csv"), "wb")
+        self.parts += 1
+        self._size = 0
+        self._write(self._header_line)
+
+    def _write(self, data):
+        self._file.write(data)
+        self._size += len(data)
+        self.bytes_written += len(data)
+
+    def write(self, shard, line):
+        if self._file is None or shard != self._shard or self._size >= self.max_bytes:
+            self._open(shard)
+        self._write(line.encode("utf-8"))
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def compact(paths, output_dir, shard_by="date", index="auto", fp_rate=DEFAULT_FP_RATE,
+            max_shard_bytes=MAX_SHARD_BYTES, chunk_rows=CHUNK_ROWS, ignore=IGNORED_COLUMNS):
+    """压缩 paths 中的 CSV 到 output_dir (必须不存在或为空)，返回 CompactionStats"""
+    if shard_by not in SHARD_MODES:
+        raise ValueError(f"unknown shard mode: {shard_by}")
+    if os.path.isdir(output_dir) and os.listdir(output_dir):
+        raise FileExistsError(f"output directory is not empty: {output_dir}")
+    paths = [p for p in paths if os.path.getsize(p) > 0]
+    header = merged_header(paths)
+    key_columns = [i for i, column in enumerate(header) if column not in ignore]
+
+    estimated = estimate_rows(paths) if index != "exact" else 0
+    if index == "auto":
+        index = "bloom" if estimated > EXACT_INDEX_LIMIT else "exact"
+    if index == "bloom":
+        seen = BloomFilter(estimated, fp_rate)
+    else:
+        seen = ExactIndex()
+    shard = _shard_function(shard_by, header)
+    encode = LineEncoder()
+
+    input_rows = 0
+    runs = []
+    chunk = []
+    tmp_dir = tempfile.mkdtemp(prefix="compact-", dir=os.path.dirname(os.path.abspath(output_dir)))
+    try:
+        # 1. 去重 + 分块排序
+        for row in iter_rows(paths, header):
+            input_rows += 1
+            content = "\x1f".join(row[i] if i < len(row) else "" for i in key_columns)
+            if not seen.add(hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()):
+                continue
+            key, ts = shard(row)
+            chunk.append((key, ts, input_rows, encode(row)))
+            if len(chunk) >= chunk_rows:
+                _write_run(chunk, tmp_dir, runs)
+        if chunk:
+            _write_run(chunk, tmp_dir, runs)
+
+        # 2. 多路归并，写出分片
+        os.makedirs(output_dir, exist_ok=True)
+        writer = ShardWriter(output_dir, header, max_shard_bytes)
+        unique_rows = 0
+        try:
+            for key, _, _, line in heapq.merge(*(_read_run(path) for path in runs)):
+                writer.write(key, line)
+                unique_rows += 1
+        finally:
+            writer.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return CompactionStats(
+        input_rows=input_rows, unique_rows=unique_rows, duplicates=input_rows - unique_rows,
+        input_bytes=sum(os.path.getsize(p) for p in paths), output_bytes=writer.bytes_written,
+        shards=writer.shards, parts=writer.parts, index=seen.name)
+
+
+def format_stats(stats):
+    row_ratio = stats.duplicates / stats.input_rows if stats.input_rows else 0.0
+    byte_ratio = 1 - stats.output_bytes / stats.input_bytes if stats.input_bytes else 0.0
+    return (f"{stats.input_rows} rows -> {stats.unique_rows} unique ({stats.duplicates} duplicates, "
+            f"{row_ratio:.1%} fewer rows); {stats.input_bytes / 1e6:.1f} MB -> {stats.output_bytes / 1e6:.1f} MB "
+            f"({byte_ratio:.1%} smaller) in {stats.parts} files / {stats.shards} shards; index={stats.index}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="CSV files (training_data.csv or merged exports)")
+    parser.add_argument("--output", required=True, help="output directory (must be empty)")
+    parser.add_argument("--shard-by", choices=SHARD_MODES, default="date")
+    parser.add_argument("--index", choices=("auto", "exact", "bloom"), default="auto")
+    parser.add_argument("--fp-rate", type=float, default=DEFAULT_FP_RATE, help="Bloom filter false positive rate")
+    parser.add_argument("--max-shard-mb", type=float, default=MAX_SHARD_BYTES / 1024 / 1024)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows sorted in memory per run")
+    parser.add_argument("--ignore", default=",".join(IGNORED_COLUMNS),
+                        help="comma-separated columns excluded from the dedup key")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    start = time.perf_counter()
+    try:
+        stats = compact(args.inputs, args.output, args.shard_by, args.index, args.fp_rate,
+                        int(args.max_shard_mb * 1024 * 1024), args.chunk_rows,
+                        tuple(c for c in args.ignore.split(",") if c))
+    except (FileExistsError, ValueError) as e:
+        logger.error(str(e))
+        sys.exit(1)
+    logger.info(f"{format_stats(stats)} [{time.perf_counter() - start:.1f}s] -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import logging
+from collections import namedtuple, Counter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 下回合抽牌预测结果
+# expected_damage / expected_block: 下回合手牌预计能打出的伤害 / 格挡 (已按能量折算)
+# draw_probs: card_id -> 下回合至少抽到一张的概率
+TurnForecast = namedtuple("TurnForecast", ["expected_damage", "expected_block", "draw_probs"])
+
+EMPTY_FORECAST = TurnForecast(0.0, 0.0, {})
+
+
+def card_damage(card_id, card_type):
+    """与评分引擎一致的简化伤害估计：痛击 8，其余攻击牌 6"""
+    if str(card_type).split(".")[-1] != "ATTACK":
+        return 0
+    return 8 if "bash" in card_id.lower() else 6
+
+
+def card_block(card_id, card_type):
+    """简化格挡估计：防御牌 5"""
+    if str(card_type).split(".")[-1] != "SKILL":
+        return 0
+    return 5 if "defend" in card_id.lower() else 0
+
+
+def hypergeometric_at_least_one(pile_size, copies, draws):
+    """
+    向量化超几何分布：从 pile_size 张牌中抽 draws 张，至少抽到一张目标牌的概率。
+    copies 为每种目标牌在牌堆中的数量 (ndarray)。
+    P(X >= 1) = 1 - C(N-K, n) / C(N, n) = 1 - prod_{i<n} (N-K-i) / (N-i)
+    """
+    copies = np.asarray(copies, dtype=np.float64)
+    if pile_size <= 0 or draws <= 0:
+        return np.zeros_like(copies)
+    draws = min(draws, pile_size)
+    i = np.arange(draws, dtype=np.float64)
+    miss = np.clip(pile_size - copies[:, None] - i, 0, None) / (pile_size - i)
+    return 1.0 - np.prod(miss, axis=1)
+
+
+class DeckTracker:
+    """
+    增量式牌堆追踪器。
+    每次状态到达时只对抽牌堆/弃牌堆做 uuid 差分，更新计数；
+    只有牌堆内容真正变化时才重新计算下回合预测，其余情况直接返回缓存结果。
+    """
+
+    def __init__(self, draw_per_turn=5, energy_per_turn=3):
+        self.draw_per_turn = draw_per_turn
+        self.energy_per_turn = energy_per_turn
+        self.draw_pile = {}     # uuid -> (card_id, type, cost)
+        self.discard_pile = {}
+        self.draw_counts = Counter()
+        self.discard_counts = Counter()
+        self._forecast = EMPTY_FORECAST
+        self._dirty = False
+        self._strength = 0
+
+    def _sync_pile(self, pile, counts, cards):
+        current = {getattr(c, "uuid", ""): c for c in cards}
+        removed = [u for u in pile if u not in current]
+        added = [u for u in current if u not in pile]
+        for uuid in removed:
+            counts[pile.pop(uuid)[0]] -= 1
+        for uuid in added:
+            card = current[uuid]
+            info = (card.card_id, card.type, getattr(card, "cost", 1))
+            pile[uuid] = info
+            counts[info[0]] += 1
+        if removed or added:
+            self._dirty = True
+
+    def update(self, game):
+        """根据最新状态增量更新牌堆内容"""
+        if not game or not game.in_combat:
+            return
+        self._sync_pile(self.draw_pile, self.draw_counts, getattr(game, "draw_pile", []) or [])
+        self._sync_pile(self.discard_pile, self.discard_counts, getattr(game, "discard_pile", []) or [])
+
+        strength = 0
+        if game.player:
+            for p in game.player.powers:
+                if p.power_id == "Strength":
+                    strength = p.amount
+                    break
+        if strength != self._strength:
+            self._strength = strength
+            self._dirty = True
+
+    def forecast(self):
+        """返回下回合抽牌预测 (牌堆无变化时为 O(1))"""
+        if self._dirty:
+            self._forecast = self._compute_forecast()
+            self._dirty = False
+        return self._forecast
+
+    def _compute_forecast(self):
+        card_info = {}
+        for info in self.draw_pile.values():
+            card_info.setdefault(info[0], info)
+        for info in self.discard_pile.values():
+            card_info.setdefault(info[0], info)
+        if not card_info:
+            return EMPTY_FORECAST
+
+        card_ids = list(card_info)
+        draw_k = np.array([max(0, self.draw_counts[c]) for c in card_ids], dtype=np.float64)
+        discard_k = np.array([max(0, self.discard_counts[c]) for c in card_ids], dtype=np.float64)
+        draw_n = int(draw_k.sum())
+        discard_n = int(discard_k.sum())
+
+        n = self.draw_per_turn
+        if n <= draw_n:
+            expected = n * draw_k / draw_n
+            prob = hypergeometric_at_least_one(draw_n, draw_k, n)
+        else:
+            # 抽牌堆不够：先抽光，再从洗回的弃牌堆中抽剩余的牌
+            rest = n - draw_n
+            expected = draw_k.copy()
+            prob = (draw_k > 0).astype(np.float64)
+            if discard_n > 0:
+                expected += min(rest, discard_n) * discard_k / discard_n
+                from_discard = hypergeometric_at_least_one(discard_n, discard_k, rest)
+                prob = 1.0 - (1.0 - prob) * (1.0 - from_discard)
+
+        damage = np.array([card_damage(c, card_info[c][1]) for c in card_ids], dtype=np.float64)
+        damage = np.where(damage > 0, damage + self._strength, 0)
+        block = np.array([card_block(c, card_info[c][1]) for c in card_ids], dtype=np.float64)
+        cost = np.array([max(0, card_info[c][2]) for c in card_ids], dtype=np.float64)
+
+        # 能量折算：预计手牌总费用超过能量时按比例缩减
+        total_cost = float((expected * cost).sum())
+        energy_factor = min(1.0, self.energy_per_turn / total_cost) if total_cost > 0 else 1.0
+
+        return TurnForecast(
+            expected_damage=float((expected * damage).sum()) * energy_factor,
+            expected_block=float((expected * block).sum()) * energy_factor,
+            draw_probs=dict(zip(card_ids, prob.tolist()))
+        )
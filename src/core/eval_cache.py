@@ -0,0 +1,191 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(*parts):
+    """状态的规范指纹：parts 需可 JSON 序列化，字典按键排序，与进程、会话无关 (不使用 hash())"""
+    text = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EvalCache:
+    """
+    跨会话、跨进程共享的评估结果缓存。
+    磁盘层为 SQLite (WAL 模式，多个读者与一个写者可以并发，写冲突由 busy timeout 等待)，
+    前面再加一层进程内 LRU。每条记录以 (namespace, key) 为主键并带有引擎版本号，
+    版本不一致视为未命中，新结果直接覆盖旧版本。条目数超过 max_entries 时按最近使用时间淘汰。
+    """
+
+    def __init__(self, path, max_entries=50000, memory_entries=4096, evict_every=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._memory = OrderedDict()
+        self._touched = set()
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connection(self):
+        # fork 出来的子进程 (如调参工具的进程池) 不能复用父进程的连接
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            self._pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS evaluations ("
+                    " namespace TEXT NOT NULL, key TEXT NOT NULL, version TEXT NOT NULL,"
+                    " value TEXT NOT NULL, last_used REAL NOT NULL,"
+                    " PRIMARY KEY (namespace, key))"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_evaluations_last_used ON evaluations (last_used)")
+        return self._conn
+
+    def _remember(self, mem_key, version, value):
+        self._memory[mem_key] = (version, value)
+        self._memory.move_to_end(mem_key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, namespace, version, key):
+        """返回缓存的结果；不存在或版本不一致时返回 None"""
+        mem_key = (namespace, key)
+        with self._lock:
+            cached = self._memory.get(mem_key)
+            if cached is not None and cached[0] == version:
+                self._memory.move_to_end(mem_key)
+                self._touched.add(mem_key)
+                self.hits += 1
+                return cached[1]
+            try:
+                row = self._connection().execute(
+                    "SELECT version, value FROM evaluations WHERE namespace = ? AND key = ?", mem_key
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"Eval cache read failed: {e}")
+                row = None
+            if row is None or row[0] != version:
+                self.misses += 1
+                return None
+            value = json.loads(row[1])
+            self._remember(mem_key, version, value)
+            self._touched.add(mem_key)
+            self.hits += 1
+            self.disk_hits += 1
+            return value
+
+    def put(self, namespace, version, key, value):
+        """写入结果 (value 需可 JSON 序列化)"""
+        mem_key = (namespace, key)
+        with self._lock:
+            self._remember(mem_key, version, value)
+            self._touched.discard(mem_key)
+            try:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO evaluations (namespace, key, version, value, last_used) VALUES (?, ?, ?, ?, ?)",
+                        (namespace, key, version, json.dumps(value, separators=(",", ":")), time.time())
+                    )
+            except sqlite3.Error as e:
+                logger.error(f"Eval cache write failed: {e}")
+                return
+            self._puts += 1
+            if self._puts % self.evict_every == 0:
+                try:
+                    self._flush_touched()
+                    self._evict()
+                except sqlite3.Error as e:
+                    logger.error(f"Eval cache eviction failed: {e}")
+
+    def _flush_touched(self):
+        """把内存层命中的条目批量更新为最近使用 (避免每次命中都写磁盘)"""
+        if not self._touched:
+            return
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "UPDATE evaluations SET last_used = ? WHERE namespace = ? AND key = ?",
+                [(now, namespace, key) for namespace, key in self._touched]
+            )
+        self._touched.clear()
+
+    def _evict(self):
+        """超过上限时删除最久未使用的条目，删到上限的 90%，避免每次写入都触发淘汰"""
+        conn = self._connection()
+        count = conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+        if count <= self.max_entries:
+            return 0
+        excess = count - int(self.max_entries * 0.9)
+        with conn:
+            conn.execute(
+                "DELETE FROM evaluations WHERE rowid IN "
+                "(SELECT rowid FROM evaluations ORDER BY last_used ASC LIMIT ?)", (excess,)
+            )
+        logger.info(f"Eval cache evicted {excess} entries")
+        return excess
+
+    def evict(self):
+        with self._lock:
+            try:
+                self._flush_touched()
+                return self._evict()
+            except sqlite3.Error as e:
+                logger.error(f"Eval cache eviction failed: {e}")
+                return 0
+
+    def warm_load(self, namespaces=None, limit=None):
+        """启动时把最近使用的条目预读到内存层，返回读入的条数"""
+        limit = limit or self.memory_entries
+        query = "SELECT namespace, key, version, value FROM evaluations"
+        params = []
+        if namespaces:
+            query += f" WHERE namespace IN ({','.join('?' * len(namespaces))})"
+            params.extend(namespaces)
+        query += " ORDER BY last_used DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            try:
+                rows = self._connection().execute(query, params).fetchall()
+            except sqlite3.Error as e:
+                logger.error(f"Eval cache warm load failed: {e}")
+                return 0
+            # 按最近使用从旧到新插入，保证 LRU 顺序正确
+            for namespace, key, version, value in reversed(rows):
+                self._remember((namespace, key), version, json.loads(value))
+        return len(rows)
+
+    def count(self):
+        """磁盘上的条目数"""
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is None or self._pid != os.getpid():
+                return
+            try:
+                self._flush_touched()
+            except sqlite3.Error as e:
+                logger.error(f"Eval cache flush failed: {e}")
+            self._conn.close()
+            self._conn = None
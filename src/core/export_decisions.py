@@ -0,0 +1,137 @@
+"""
+从原始记录导出带标注的决策语料 (weight_tuner / policy_trainer 的输入)。
+
+`python -m src.main --record-raw <path>` 逐行记录游戏发来的原始消息，但不带标注；
+本工具按顺序回放这些消息，对同一战斗中相邻的两个状态用 action_labeler.infer_played_card
+(与运行时 ActionLabeler 相同的推断逻辑) 找出实际打出的牌，把前一个状态和这张牌写成一行：
+    {"game_state": {...}, "available_commands": [...], "label": "<card uuid>"}
+
+传入 --labels 时与采集时写出的 action_labels.csv 按状态 (floor, turn, played_uuid) 关联，
+只导出运行时也标注过的出牌 (例如只用开启采集的会话，或用 --followed-only 只保留采纳了推荐的出牌)。
+输入流式读取，内存占用只取决于标注表的大小。
+
+用法:
+    python -m src.main --record-raw data/raw_messages.jsonl
+    python -m src.core.export_decisions data/raw_messages.jsonl --output data/decisions.jsonl
+    python -m src.core.export_decisions raw/*.jsonl --output data/decisions.jsonl --labels data/action_labels.csv
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import namedtuple
+
+# 与 main.py 相同：确保可以导入 src 和 external/spirecomm
+root_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+sys.path.append(os.path.join(root_path, 'external', 'spirecomm'))
+
+from src.core.action_labeler import infer_played_card, snapshot
+from src.core.state_view import LazyGameState
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(root_path, "data")
+
+ExportStats = namedtuple("ExportStats", "messages combat_states plays exported")
+
+
+def load_labels(path, followed_only=False):
+    """读取 action_labels.csv，返回 {(floor, turn, played_uuid)}"""
+    keys = set()
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if followed_only and row.get("followed") != "1":
+                continue
+            try:
+                keys.add((int(row["floor"]), int(row["turn"]), row["played_uuid"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+    return keys
+
+
+def iter_messages(paths):
+    """按顺序读取原始记录中的状态消息 (跳过错误回包和无法解析的行)"""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(message, dict) and isinstance(message.get("game_state"), dict):
+                    yield message
+
+
+def iter_decisions(messages):
+    """从有序的状态消息中产生 (message, CombatSnapshot, PlayedCard)：message 和快照为出牌前的状态"""
+    prev_message = prev = None
+    for message in messages:
+        try:
+            game = LazyGameState(message["game_state"], message.get("available_commands", []))
+            curr = snapshot(game) if game.in_combat else None
+        except Exception as e:
+            logger.debug(f"Skipping raw message: {e}")
+            curr = None
+        if curr is not None and prev is not None:
+            played = infer_played_card(prev, curr)
+            if played:
+                yield prev_message, prev, played
+        prev_message, prev = (message, curr) if curr is not None else (None, None)
+
+
+def export_decisions(raw_paths, output_path, labels_path=None, followed_only=False):
+    """导出语料，返回 ExportStats"""
+    labels = load_labels(labels_path, followed_only) if labels_path else None
+    counts = {"messages": 0, "combat_states": 0, "plays": 0}
+
+    def counted(messages):
+        for message in messages:
+            counts["messages"] += 1
+            if message["game_state"].get("combat_state"):
+                counts["combat_states"] += 1
+            yield message
+
+    exported = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        for message, state, played in iter_decisions(counted(iter_messages(raw_paths))):
+            counts["plays"] += 1
+            if labels is not None and (state.floor, state.turn, played.card.uuid) not in labels:
+                continue
+            out.write(json.dumps({
+                "game_state": message["game_state"],
+                "available_commands": message.get("available_commands", []),
+                "label": played.card.uuid,
+            }, ensure_ascii=False) + "\n")
+            exported += 1
+    return ExportStats(counts["messages"], counts["combat_states"], counts["plays"], exported)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="raw message recordings (--record-raw), in recording order")
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "decisions.jsonl"))
+    parser.add_argument("--labels", help="action_labels.csv: only export plays also labeled at runtime")
+    parser.add_argument("--followed-only", action="store_true",
+                        help="with --labels, only plays that followed the recommendation")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    start = time.perf_counter()
+    try:
+        stats = export_decisions(args.inputs, args.output, args.labels, args.followed_only)
+    except OSError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    logger.info(f"{stats.messages} messages, {stats.combat_states} combat states, {stats.plays} plays inferred, "
+                f"{stats.exported} exported [{time.perf_counter() - start:.1f}s] -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
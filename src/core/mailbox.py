@@ -0,0 +1,103 @@
+"""
+状态信箱：游戏消息到达与评分引擎之间的"最新值优先"缓冲。
+
+CommunicationMod 在 Bridge 评分 / 写盘期间可能连续发来多条状态，逐条处理会让浮窗落后于游戏。
+StateMailbox 每次取消息时先把输入队列中已到达的消息全部取出：
+- 状态消息只保留最新一条，被取代的计入 superseded (开启原始记录时仍会写入记录文件)
+- 错误消息 (命令执行失败) 从不丢弃，按到达顺序交给 Coordinator
+同时它也是评估的取消令牌：cancelled 为 True 表示已有更新的消息在等待，
+耗时的评估 (路线搜索等) 应尽快放弃当前状态，抛出 EvaluationCancelled。
+"""
+import collections
+import json
+import logging
+import queue
+
+logger = logging.getLogger(__name__)
+
+
+class EvaluationCancelled(Exception):
+    """评估期间有更新的状态到达，当前状态的结果已经过时"""
+
+
+def is_error_message(message):
+    """CommunicationMod 的错误回包：{"error": "...", "ready_for_command": true}"""
+    if '"error"' not in message:
+        return False
+    try:
+        return json.loads(message).get("error") is not None
+    except (ValueError, AttributeError):
+        return False
+
+
+class RawRecorder:
+    """把收到的原始消息逐行追加到文件 (含被合并丢弃的状态)，用于复现和回放"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def record(self, message):
+        self._file.write(message.rstrip("\n") + "\n")
+        self.count += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class StateMailbox:
+    """
+    包装 Coordinator 的 input_queue，提供合并后的消息。
+    received / superseded 统计收到的消息数和被更新状态取代而丢弃的状态数。
+    """
+
+    def __init__(self, input_queue, recorder=None):
+        self.input_queue = input_queue
+        self.recorder = recorder
+        self.received = 0
+        self.superseded = 0
+        self._backlog = collections.deque()  # (is_error, message)
+
+    def _take(self, message):
+        self.received += 1
+        if self.recorder:
+            try:
+                self.recorder.record(message)
+            except OSError as e:
+                logger.error(f"Raw recorder failed, disabling: {e}")
+                self.recorder = None
+        is_error = is_error_message(message)
+        if not is_error and self._backlog:
+            # 新状态取代所有尚未处理的旧状态，错误消息保留
+            kept = collections.deque(entry for entry in self._backlog if entry[0])
+            self.superseded += len(self._backlog) - len(kept)
+            self._backlog = kept
+        self._backlog.append((is_error, message))
+
+    def _drain(self):
+        while True:
+            try:
+                message = self.input_queue.get_nowait()
+            except queue.Empty:
+                return
+            self._take(message)
+
+    def get(self, block=False):
+        """返回下一条消息；block 为 False 且没有消息时返回 None"""
+        if not self._backlog:
+            if not block and self.input_queue.empty():
+                return None
+            self._take(self.input_queue.get())
+        self._drain()
+        return self._backlog.popleft()[1]
+
+    @property
+    def cancelled(self):
+        """是否已有更新的消息在等待处理 (当前状态的评估可以放弃)"""
+        return bool(self._backlog) or not self.input_queue.empty()
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise EvaluationCancelled()
@@ -0,0 +1,151 @@
+"""
+对局历史的汇总统计。
+
+汇总表在每局结束时由 RunHistory.end_run 增量更新 (apply_run 只读取这一局的数据)，
+看板查询直接读汇总表，与历史数据量无关。
+
+用法:
+    python -m src.core.run_analytics data/run_history.sqlite3
+"""
+import argparse
+import sqlite3
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS agg_runs (
+        character TEXT PRIMARY KEY,
+        runs INTEGER NOT NULL DEFAULT 0, victories INTEGER NOT NULL DEFAULT 0,
+        deaths INTEGER NOT NULL DEFAULT 0, floor_sum INTEGER NOT NULL DEFAULT 0)""",
+    """CREATE TABLE IF NOT EXISTS agg_death_floors (
+        floor INTEGER PRIMARY KEY, deaths INTEGER NOT NULL DEFAULT 0)""",
+    """CREATE TABLE IF NOT EXISTS agg_floors (
+        floor INTEGER PRIMARY KEY,
+        combats INTEGER NOT NULL DEFAULT 0, combats_won INTEGER NOT NULL DEFAULT 0,
+        turns_sum INTEGER NOT NULL DEFAULT 0, hp_lost_sum INTEGER NOT NULL DEFAULT 0)""",
+    """CREATE TABLE IF NOT EXISTS agg_recommendations (
+        floor INTEGER PRIMARY KEY,
+        decisions INTEGER NOT NULL DEFAULT 0, labeled INTEGER NOT NULL DEFAULT 0,
+        followed INTEGER NOT NULL DEFAULT 0)""",
+]
+
+
+def apply_run(conn, run_id):
+    """
+    把一局已结束的对局合并进汇总表 (调用方负责事务)。
+    通过 runs.aggregated 标记保证每局只合并一次。
+    """
+    row = conn.execute(
+        "SELECT character, final_floor, victory, aggregated FROM runs WHERE run_id = ?", (run_id,)
+    ).fetchone()
+    if row is None or row[3]:
+        return False
+    character, final_floor, victory, _ = row
+    died = victory == 0
+
+    conn.execute("INSERT OR IGNORE INTO agg_runs (character) VALUES (?)", (character or "",))
+    conn.execute(
+        "UPDATE agg_runs SET runs = runs + 1, victories = victories + ?, deaths = deaths + ?,"
+        " floor_sum = floor_sum + ? WHERE character = ?",
+        (int(victory == 1), int(died), final_floor or 0, character or "")
+    )
+    if died:
+        conn.execute(
+            "INSERT INTO agg_death_floors (floor, deaths) VALUES (?, 1)"
+            " ON CONFLICT(floor) DO UPDATE SET deaths = deaths + 1", (final_floor,)
+        )
+
+    conn.execute(
+        "INSERT INTO agg_floors (floor, combats, combats_won, turns_sum, hp_lost_sum)"
+        " SELECT floor, COUNT(*), SUM(COALESCE(won, 0)), SUM(COALESCE(turns, 0)),"
+        "        SUM(MAX(0, COALESCE(hp_start, 0) - COALESCE(hp_end, hp_start, 0)))"
+        " FROM combats WHERE run_id = ? GROUP BY floor"
+        " ON CONFLICT(floor) DO UPDATE SET combats = combats + excluded.combats,"
+        " combats_won = combats_won + excluded.combats_won, turns_sum = turns_sum + excluded.turns_sum,"
+        " hp_lost_sum = hp_lost_sum + excluded.hp_lost_sum", (run_id,)
+    )
+    conn.execute(
+        "INSERT INTO agg_recommendations (floor, decisions, labeled, followed)"
+        " SELECT floor, COUNT(*), COUNT(played_uuid),"
+        "        SUM(CASE WHEN played_uuid IS NOT NULL AND played_uuid = recommended_uuid THEN 1 ELSE 0 END)"
+        " FROM decisions WHERE run_id = ? GROUP BY floor"
+        " ON CONFLICT(floor) DO UPDATE SET decisions = decisions + excluded.decisions,"
+        " labeled = labeled + excluded.labeled, followed = followed + excluded.followed", (run_id,)
+    )
+    conn.execute("UPDATE runs SET aggregated = 1 WHERE run_id = ?", (run_id,))
+    return True
+
+
+def rebuild(conn):
+    """清空并从明细表重建全部汇总 (汇总口径变化后使用)"""
+    with conn:
+        for table in ("agg_runs", "agg_death_floors", "agg_floors", "agg_recommendations"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute("UPDATE runs SET aggregated = 0")
+        run_ids = [r[0] for r in conn.execute("SELECT run_id FROM runs WHERE ended_at IS NOT NULL")]
+        for run_id in run_ids:
+            apply_run(conn, run_id)
+    return len(run_ids)
+
+
+class RunAnalytics:
+    """看板查询 (只读汇总表)"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, timeout=5.0)
+        with self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+
+    def run_summary(self):
+        """按角色统计：[(character, runs, victories, deaths, avg_floor)]"""
+        return [
+            (character, runs, victories, deaths, round(floor_sum / runs, 1) if runs else 0.0)
+            for character, runs, victories, deaths, floor_sum in self.conn.execute(
+                "SELECT character, runs, victories, deaths, floor_sum FROM agg_runs ORDER BY runs DESC")
+        ]
+
+    def death_floors(self, limit=10):
+        """阵亡最多的楼层：[(floor, deaths)]"""
+        return self.conn.execute(
+            "SELECT floor, deaths FROM agg_death_floors ORDER BY deaths DESC, floor LIMIT ?", (limit,)
+        ).fetchall()
+
+    def floor_stats(self):
+        """各楼层战斗统计：[(floor, combats, win_rate, avg_turns, avg_hp_lost)]"""
+        return [
+            (floor, combats, combats_won / combats, turns_sum / combats, hp_lost_sum / combats)
+            for floor, combats, combats_won, turns_sum, hp_lost_sum in self.conn.execute(
+                "SELECT floor, combats, combats_won, turns_sum, hp_lost_sum FROM agg_floors"
+                " WHERE combats > 0 ORDER BY floor")
+        ]
+
+    def recommendation_agreement(self):
+        """推荐与实际出牌一致的比例：(decisions, labeled, followed, rate)"""
+        decisions, labeled, followed = self.conn.execute(
+            "SELECT COALESCE(SUM(decisions), 0), COALESCE(SUM(labeled), 0), COALESCE(SUM(followed), 0)"
+            " FROM agg_recommendations"
+        ).fetchone()
+        return decisions, labeled, followed, (followed / labeled if labeled else 0.0)
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("database", nargs="?", default="data/run_history.sqlite3")
+    parser.add_argument("--rebuild", action="store_true", help="从明细表重建汇总")
+    args = parser.parse_args()
+
+    analytics = RunAnalytics(args.database)
+    if args.rebuild:
+        print(f"Rebuilt aggregates from {rebuild(analytics.conn)} runs")
+    for character, runs, victories, deaths, avg_floor in analytics.run_summary():
+        print(f"{character or '?':<10} runs={runs} victories={victories} deaths={deaths} avg_floor={avg_floor}")
+    print("Deadliest floors:", ", ".join(f"{f} ({d})" for f, d in analytics.death_floors()))
+    decisions, labeled, followed, rate = analytics.recommendation_agreement()
+    print(f"Recommendations followed: {followed}/{labeled} labeled ({rate:.0%}), {decisions} decisions total")
+    analytics.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import logging
+import os
+import sqlite3
+import time
+
+from src.core import run_analytics
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS runs (
+        run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        seed TEXT, character TEXT, ascension INTEGER,
+        started_at REAL NOT NULL, ended_at REAL,
+        final_floor INTEGER, victory INTEGER,
+        aggregated INTEGER NOT NULL DEFAULT 0)""",
+    """CREATE TABLE IF NOT EXISTS floors (
+        run_id INTEGER NOT NULL, floor INTEGER NOT NULL, room_type TEXT,
+        hp INTEGER, max_hp INTEGER, gold INTEGER, entered_at REAL NOT NULL,
+        PRIMARY KEY (run_id, floor))""",
+    """CREATE TABLE IF NOT EXISTS combats (
+        combat_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id INTEGER NOT NULL, floor INTEGER, monsters TEXT,
+        started_at REAL NOT NULL, ended_at REAL,
+        turns INTEGER, hp_start INTEGER, hp_end INTEGER, won INTEGER)""",
+    """CREATE TABLE IF NOT EXISTS decisions (
+        decision_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id INTEGER NOT NULL, combat_id INTEGER, floor INTEGER, turn INTEGER,
+        timestamp REAL NOT NULL, hp INTEGER, energy INTEGER, incoming_damage INTEGER, hand_size INTEGER,
+        recommended_uuid TEXT, recommended_card TEXT, recommended_score INTEGER,
+        played_uuid TEXT, played_card TEXT)""",
+    "CREATE INDEX IF NOT EXISTS idx_runs_final_floor ON runs (final_floor)",
+    "CREATE INDEX IF NOT EXISTS idx_floors_floor ON floors (floor)",
+    "CREATE INDEX IF NOT EXISTS idx_combats_run ON combats (run_id)",
+    "CREATE INDEX IF NOT EXISTS idx_decisions_run ON decisions (run_id)",
+    "CREATE INDEX IF NOT EXISTS idx_decisions_combat ON decisions (combat_id)",
+]
+
+
+class RunHistory:
+    """
+    对局历史库 (SQLite)：runs / floors / combats / decisions 四张表。
+    每局结束时在同一事务内把该局数据增量合并进 run_analytics 的汇总表，
+    看板查询只读汇总表，不需要扫描全部历史。
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            for statement in SCHEMA + run_analytics.SCHEMA:
+                self.conn.execute(statement)
+
+    def start_run(self, seed, character, ascension):
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (seed, character, ascension, started_at) VALUES (?, ?, ?, ?)",
+                (str(seed), character, ascension, time.time())
+            )
+        return cursor.lastrowid
+
+    def enter_floor(self, run_id, floor, room_type, hp, max_hp, gold):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO floors (run_id, floor, room_type, hp, max_hp, gold, entered_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, floor, room_type, hp, max_hp, gold, time.time())
+            )
+
+    def start_combat(self, run_id, floor, monsters, hp):
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO combats (run_id, floor, monsters, started_at, hp_start) VALUES (?, ?, ?, ?, ?)",
+                (run_id, floor, monsters, time.time(), hp)
+            )
+        return cursor.lastrowid
+
+    def end_combat(self, combat_id, turns, hp, won):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE combats SET ended_at = ?, turns = ?, hp_end = ?, won = ? WHERE combat_id = ?",
+                (time.time(), turns, hp, None if won is None else int(won), combat_id)
+            )
+
+    def record_decision(self, run_id, combat_id, floor, turn, hp, energy, incoming_damage, hand_size,
+                        recommended_uuid, recommended_card, recommended_score, timestamp=None):
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO decisions (run_id, combat_id, floor, turn, timestamp, hp, energy, incoming_damage,"
+                " hand_size, recommended_uuid, recommended_card, recommended_score)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, combat_id, floor, turn, timestamp or time.time(), hp, energy, incoming_damage,
+                 hand_size, recommended_uuid, recommended_card, recommended_score)
+            )
+        return cursor.lastrowid
+
+    def label_decision(self, decision_id, played_uuid, played_card):
+        """补上一次决策中玩家实际打出的牌 (按主键更新)"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE decisions SET played_uuid = ?, played_card = ? WHERE decision_id = ?",
+                (played_uuid, played_card, decision_id)
+            )
+
+    def end_run(self, run_id, final_floor, victory):
+        """结束一局 (victory: True 通关 / False 阵亡 / None 中途放弃) 并把该局合并进汇总表，同一事务内完成"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE runs SET ended_at = ?, final_floor = ?, victory = ? WHERE run_id = ?",
+                (time.time(), final_floor, None if victory is None else int(victory), run_id)
+            )
+            run_analytics.apply_run(self.conn, run_id)
+
+    def close(self):
+        self.conn.close()
+
+
+class RunRecorder:
+    """
+    把 Bridge 收到的连续游戏状态转换为对局历史：
+    种子变化 → 新的一局；楼层变化 → 新楼层；进入/离开战斗 → 战斗开始/结束；GAME_OVER → 一局结束。
+    GAME_OVER 界面在玩家离开前会重复发送：一局在 GAME_OVER 结束后，同一种子的状态都忽略，
+    直到出现新种子或回到主菜单 (finish()，之后用同一种子重开的一局照常记录)。
+    只有状态发生转换时才写库，普通状态只做几次属性比较。
+    """
+
+    def __init__(self, history):
+        self.history = history
+        self.run_id = None
+        self.seed = None
+        self.finished_seed = None  # 在 GAME_OVER 结束的上一局的种子
+        self.floor = None
+        self.combat_id = None
+        self.combat_turns = 0
+        self.last_hp = None
+
+    def observe(self, game):
+        seed = getattr(game, "seed", None)
+        if self.run_id is None and seed == self.finished_seed:
+            return
+        if self.run_id is None or seed != self.seed:
+            if self.run_id is not None:
+                self.finish()
+            character = getattr(getattr(game, "character", None), "name", None)
+            self.run_id = self.history.start_run(seed, character, getattr(game, "ascension_level", 0))
+            self.seed = seed
+            self.floor = None
+
+        if game.floor != self.floor:
+            self.floor = game.floor
+            self.history.enter_floor(self.run_id, game.floor, getattr(game, "room_type", None),
+                                     game.current_hp, game.max_hp, game.gold)
+        self.last_hp = game.current_hp
+
+        screen_type = str(getattr(game, "screen_type", ""))
+        if screen_type.endswith("GAME_OVER"):
+            victory = bool(getattr(game.screen, "victory", False))
+            self._end_combat(won=victory)
+            self.finish(victory)
+            self.finished_seed = seed
+            return
+
+        if game.in_combat:
+            if self.combat_id is None:
+                monsters = "|".join(m.name for m in game.monsters)
+                self.combat_id = self.history.start_combat(self.run_id, game.floor, monsters, game.current_hp)
+                self.combat_turns = 0
+            self.combat_turns = max(self.combat_turns, getattr(game, "turn", 0) or 0)
+        else:
+            self._end_combat(won=game.current_hp > 0)
+
+    def _end_combat(self, won):
+        if self.combat_id is not None:
+            self.history.end_combat(self.combat_id, self.combat_turns, self.last_hp, won)
+            self.combat_id = None
+
+    def record_decision(self, game, incoming_damage, best_uuid, best_name, best_score, timestamp=None):
+        """记录一次战斗决策 (尚未观察到对局时忽略)，返回 decision_id"""
+        if self.run_id is None:
+            return None
+        player = game.player
+        return self.history.record_decision(
+            self.run_id, self.combat_id, game.floor, getattr(game, "turn", 0), player.current_hp, player.energy,
+            incoming_damage, len(game.hand), best_uuid, best_name, best_score, timestamp
+        )
+
+    def finish(self, victory=None):
+        """结束当前一局；victory 未知时 (如退出到主菜单) 血量归零记为阵亡，否则记为中途放弃 (NULL)"""
+        # 已离开 GAME_OVER 界面：同一种子的新状态属于重开的新一局 (GAME_OVER 分支在调用后重新设置)
+        self.finished_seed = None
+        if self.run_id is None:
+            return
+        if victory is None and self.last_hp is not None and self.last_hp <= 0:
+            victory = False
+        self._end_combat(won=victory)
+        self.history.end_run(self.run_id, self.floor, victory)
+        self.run_id = None
+        self.seed = None
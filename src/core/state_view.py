@@ -0,0 +1,192 @@
+from functools import cached_property
+
+from spirecomm.spire.game import Game, RoomPhase
+from spirecomm.spire.card import Card
+from spirecomm.spire.character import Player, Monster, PlayerClass
+from spirecomm.spire.relic import Relic
+from spirecomm.spire.potion import Potion
+from spirecomm.spire.map import Map
+from spirecomm.spire.screen import ScreenType, screen_from_json
+
+
+class LazyGameState:
+    """
+    Game 的惰性视图。
+    CommunicationMod 的 JSON 只解析一次 (json.loads)，玩家、怪物、卡牌、地图、界面等子对象
+    在第一次访问时才构造并缓存；只广播状态字符串的界面 (如菜单、事件) 几乎没有额外开销。
+    属性名与 spirecomm.spire.game.Game 保持一致，可直接替代后者交给评分引擎、数据采集和 UI 广播。
+    """
+
+    def __init__(self, json_state, available_commands=None):
+        self.json_state = json_state
+        self.available_commands = available_commands or []
+        self._combat = json_state.get("combat_state")
+
+    # --- 标量字段：直接读字典 ---
+    @property
+    def current_action(self):
+        return self.json_state.get("current_action")
+
+    @property
+    def current_hp(self):
+        return self.json_state.get("current_hp")
+
+    @property
+    def max_hp(self):
+        return self.json_state.get("max_hp")
+
+    @property
+    def floor(self):
+        return self.json_state.get("floor")
+
+    @property
+    def act(self):
+        return self.json_state.get("act")
+
+    @property
+    def gold(self):
+        return self.json_state.get("gold")
+
+    @property
+    def seed(self):
+        return self.json_state.get("seed")
+
+    @property
+    def ascension_level(self):
+        return self.json_state.get("ascension_level")
+
+    @property
+    def screen_up(self):
+        return self.json_state.get("is_screen_up", False)
+
+    @property
+    def room_type(self):
+        return self.json_state.get("room_type")
+
+    @property
+    def choice_available(self):
+        return "choice_list" in self.json_state
+
+    @property
+    def choice_list(self):
+        return self.json_state.get("choice_list", [])
+
+    @property
+    def in_combat(self):
+        return self._combat is not None
+
+    @property
+    def turn(self):
+        return self._combat.get("turn") if self._combat else 0
+
+    @property
+    def cards_discarded_this_turn(self):
+        return self._combat.get("cards_discarded_this_turn") if self._combat else 0
+
+    # --- 可用指令 ---
+    @property
+    def end_available(self):
+        return "end" in self.available_commands
+
+    @property
+    def potion_available(self):
+        return "potion" in self.available_commands
+
+    @property
+    def play_available(self):
+        return "play" in self.available_commands
+
+    @property
+    def proceed_available(self):
+        return "proceed" in self.available_commands or "confirm" in self.available_commands
+
+    @property
+    def cancel_available(self):
+        return any(c in self.available_commands for c in ("cancel", "leave", "return", "skip"))
+
+    # --- 需要构造对象的字段：首次访问时构造并缓存 ---
+    @cached_property
+    def character(self):
+        return PlayerClass[self.json_state.get("class")]
+
+    @cached_property
+    def screen_type(self):
+        return ScreenType[self.json_state.get("screen_type")]
+
+    @cached_property
+    def screen(self):
+        return screen_from_json(self.screen_type, self.json_state.get("screen_state"))
+
+    @cached_property
+    def room_phase(self):
+        return RoomPhase[self.json_state.get("room_phase")]
+
+    @cached_property
+    def relics(self):
+        return [Relic.from_json(r) for r in self.json_state.get("relics", [])]
+
+    @cached_property
+    def deck(self):
+        return [Card.from_json(c) for c in self.json_state.get("deck", [])]
+
+    @cached_property
+    def potions(self):
+        return [Potion.from_json(p) for p in self.json_state.get("potions", [])]
+
+    @cached_property
+    def map(self):
+        return Map.from_json(self.json_state.get("map", []))
+
+    @cached_property
+    def player(self):
+        return Player.from_json(self._combat.get("player")) if self._combat else None
+
+    @cached_property
+    def monsters(self):
+        if not self._combat:
+            return []
+        monsters = [Monster.from_json(m) for m in self._combat.get("monsters", [])]
+        for i, monster in enumerate(monsters):
+            monster.monster_index = i
+        return monsters
+
+    def _cards(self, key):
+        if not self._combat:
+            return []
+        return [Card.from_json(c) for c in self._combat.get(key, [])]
+
+    @cached_property
+    def hand(self):
+        return self._cards("hand")
+
+    @cached_property
+    def draw_pile(self):
+        return self._cards("draw_pile")
+
+    @cached_property
+    def discard_pile(self):
+        return self._cards("discard_pile")
+
+    @cached_property
+    def exhaust_pile(self):
+        return self._cards("exhaust_pile")
+
+    @cached_property
+    def limbo(self):
+        return self._cards("limbo")
+
+    @cached_property
+    def card_in_play(self):
+        card = self._combat.get("card_in_play") if self._combat else None
+        return Card.from_json(card) if card else None
+
+    # --- 与 Game 相同的辅助方法 (SimpleAgent 处理奖励界面和战斗时调用) ---
+    def are_potions_full(self):
+        return all(potion.potion_id != "Potion Slot" for potion in self.potions)
+
+    def get_real_potions(self):
+        return [potion for potion in self.potions if potion.potion_id != "Potion Slot"]
+
+    def materialize(self):
+        """构造完整的 spirecomm Game 对象 (仅在需要完整对象树的旧逻辑中使用)"""
+        return Game.from_json(self.json_state, self.available_commands)
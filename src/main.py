@@ -1,6 +1,11 @@
 import sys
 import io
 import os
+import signal
+import time
+
+# 启动计时起点 (各阶段耗时在启动完成后输出到 stderr)
+start_time = time.perf_counter()
 
 # 将项目根目录添加到 sys.path
 root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -14,36 +19,102 @@ sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 # 必须在导入 spirecomm 之前执行
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
 
-from spirecomm.communication.coordinator import Coordinator
-from src.connector.game_bridge import GameBridge
+from src.connector.coordinator import BridgeCoordinator
+
+def elapsed_ms():
+    return (time.perf_counter() - start_time) * 1000
 
 def main():
     print("Spire AI Master is starting...", file=sys.stderr)
-    
-    # 1. 初始化我们的 Bridge Agent
-    # 它会自动启动 Socket Server 监听 9999 端口
-    agent = GameBridge()
-    
-    # 2. 初始化 SpireComm 的协调器
+
+    # 快速启动 (默认)：游戏只等待 ready 信号，
+    # 因此先创建协调器并发出 ready，Bridge 和评分引擎的初始化都放到之后
+    # 传入 --eager-start 时恢复旧的顺序 (全部初始化完成后再发 ready)，用于对比启动耗时
+    fast_start = "--eager-start" not in sys.argv
+    # 默认使用单一 asyncio 运行时 (stdin、UI 连接、定时上传在一个事件循环中，评分在引擎线程)
+    # 传入 --threaded 时恢复旧的线程模型 (spirecomm 读写线程 + Socket 监听线程 + Coordinator.run)
+    threaded = "--threaded" in sys.argv
+
+    # 1. 初始化 SpireComm 的协调器
     # Coordinator 负责从 stdin 读取游戏发来的 JSON，并写入 stdout
-    coordinator = Coordinator()
-    
+    # BridgeCoordinator 使用惰性状态视图，子对象只在被访问时才构造
+    # 传入 --record-raw <path> 时把收到的原始消息 (含被合并丢弃的旧状态) 逐行追加到文件
+    recorder = None
+    if "--record-raw" in sys.argv[:-1]:
+        from src.core.mailbox import RawRecorder
+        recorder = RawRecorder(sys.argv[sys.argv.index("--record-raw") + 1])
+    coordinator = BridgeCoordinator(recorder, io_threads=threaded)
+    if fast_start:
+        coordinator.signal_ready()
+        ready_ms = elapsed_ms()
+
+    # 2. 初始化我们的 Bridge Agent
+    # 它会自动启动 Socket Server 监听 9999 端口
+    # 传入 --shm 时额外通过共享内存发布状态 (UI 同样需要 --shm)
+    from src.connector.game_bridge import GameBridge
+    shm_name = None
+    if "--shm" in sys.argv:
+        from src.connector.shm_transport import DEFAULT_SHM_NAME
+        shm_name = DEFAULT_SHM_NAME
+    agent = GameBridge(shared_memory_name=shm_name, deferred_init=fast_start, listen=threaded)
+    runtime = None
+    if not threaded:
+        from src.connector.async_runtime import AsyncRuntime
+        runtime = AsyncRuntime(coordinator, agent)
+    # 传入 --autopilot 时无人值守：自动开局，并按推荐引擎的最高分自动出牌 / 选牌 / 选路线
+    if "--autopilot" in sys.argv:
+        agent.auto_play = True
+        agent.auto_start = True
+
     # 3. 注册我们的 Agent
     # 当游戏状态更新时，coordinator 会调用 agent.get_next_action_in_game()
-    coordinator.signal_ready()
+    if not fast_start:
+        coordinator.signal_ready()
+        ready_ms = elapsed_ms()
+    # 评估途中有新状态到达时放弃旧状态 (浮窗始终显示最新状态)
+    agent.cancel_token = coordinator.mailbox
     coordinator.register_command_error_callback(agent.handle_error)
     coordinator.register_state_change_callback(agent.get_next_action_in_game)
     coordinator.register_out_of_game_callback(agent.get_next_action_out_of_game)
 
+    # 数据采集、评分引擎、怪物行动表在 ready 之后加载；期间游戏发来的消息在输入队列中排队
+    agent.ensure_initialized()
+    # 传入 --ship-to <url> 时把采集数据定期上传到中心汇总服务 (python -m src.core.collection_sync serve)
+    if "--ship-to" in sys.argv[:-1]:
+        agent.start_shipping(sys.argv[sys.argv.index("--ship-to") + 1], background=threaded)
+        if runtime:
+            runtime.every(30.0, agent.shipper.ship_once)
+    print(f"Startup: ready={ready_ms:.1f}ms initialized={elapsed_ms():.1f}ms", file=sys.stderr)
+
+    # 信号触发性能分析 (仅 POSIX)：SIGUSR1 采样 10 秒 CPU，SIGUSR2 拍摄内存快照
+    # Windows 下使用 scripts/profile_bridge.py 通过 Socket 发送同样的指令
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: agent.profiler.handle_command({"cmd": "profile", "seconds": 10}))
+        signal.signal(signal.SIGUSR2, lambda *_: agent.profiler.handle_command({"cmd": "mem_snapshot"}))
+
     # 4. 阻塞运行
     # 使用 coordinator.run() 来维持主循环，它会正确处理 stdin/stdout
+    # asyncio 运行时在游戏关闭 stdin 或收到 SIGINT / SIGTERM 时返回
     print("Agent is ready and listening on port 9999 for UI connections...", file=sys.stderr)
     try:
-        coordinator.run()
+        if runtime:
+            runtime.run()
+        else:
+            coordinator.run()
+    except KeyboardInterrupt:
+        pass
     except Exception as e:
         print(f"CRITICAL ERROR in Coordinator: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc(file=sys.stderr)
+    finally:
+        mailbox = coordinator.mailbox
+        print(f"Messages: received={mailbox.received} superseded={mailbox.superseded} "
+              f"cancelled_evaluations={agent.cancelled_evaluations}"
+              + (f" dropped_frames={runtime.dropped_frames}" if runtime else ""), file=sys.stderr)
+        agent.shutdown()
+        if recorder:
+            recorder.close()
 
 if __name__ == "__main__":
     try:
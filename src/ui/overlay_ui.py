@@ -1,11 +1,16 @@
 import sys
-import socket
+import os
 import json
 import threading
+import time
 from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QLabel, 
                                QListWidget, QListWidgetItem, QFrame, QHBoxLayout, QPushButton)
-from PySide6.QtCore import Qt, Signal, QObject, Slot
-from PySide6.QtGui import QColor, QFont, QPalette, QBrush, QIcon
+from PySide6.QtCore import Qt, Signal, QObject, Slot, QTimer
+
+# 将项目根目录添加到 sys.path，以便导入 src.connector 中的传输实现
+root_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
 
 # 定义深色系配色
 COLOR_BACKGROUND = "#1B262C"  # 深蓝黑
@@ -23,73 +28,73 @@ class DataReceiver(QObject):
     data_received = Signal(dict)
     connection_status = Signal(str)
 
-    def __init__(self, host='127.0.0.1', port=9999):
+    def __init__(self, host='127.0.0.1', port=9999, shared_memory_name=None, poll_interval=0.005):
         super().__init__()
         self.host = host
         self.port = port
+        self.shared_memory_name = shared_memory_name
+        self.poll_interval = poll_interval
         self.running = True
+        self._loop = None
+        self._stop_event = None
         self.thread = threading.Thread(target=self._listen, daemon=True)
         self.thread.start()
 
     def stop(self):
         """显式停止接收线程"""
         self.running = False
+        loop, stop_event = self._loop, self._stop_event
+        if loop and stop_event:
+            try:
+                loop.call_soon_threadsafe(stop_event.set)
+            except RuntimeError:
+                pass  # 接收循环已结束
 
     def _listen(self):
-        self.connection_status.emit("Connecting...")
-        while self.running:
-            s = None
-            try:
-                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                # 设置超时，以便在停止时能跳出 recv 阻塞
-                s.settimeout(2.0)
-                s.connect((self.host, self.port))
-                self.connection_status.emit("Connected")
-                
-                buffer = ""
-                while self.running:
-                    try:
-                        data = s.recv(4096)
-                        if not data:
-                            break
-                        
-                        buffer += data.decode('utf-8')
-                        while '\n' in buffer:
-                            line, buffer = buffer.split('\n', 1)
-                            if line.strip():
-                                try:
-                                    # print(f"DEBUG: Raw Line: {line}") 
-                                    json_data = json.loads(line)
-                                    self.data_received.emit(json_data)
-                                except json.JSONDecodeError as e:
-                                    print(f"JSON Parse Error: {e}")
-                                    print(f"Problematic Data: {line}")
-                                except Exception as e:
-                                    print(f"Critical Error in Receive Loop: {e}")
-                    except socket.timeout:
-                        continue
-                    except OSError:
-                        break
-                                
-            except (ConnectionRefusedError, socket.timeout):
-                self.connection_status.emit("Waiting for Game...")
-                # 稍微等待重试，避免死循环占满 CPU
-                import time
-                for _ in range(20): # sleep 2s, but check running every 0.1s
-                    if not self.running: break
-                    time.sleep(0.1)
-            except Exception as e:
-                self.connection_status.emit(f"Error: {e}")
-                import time
-                for _ in range(20):
-                    if not self.running: break
-                    time.sleep(0.1)
-            finally:
-                if s:
-                    try:
-                        s.close()
-                    except:
-                        pass
+        # 优先使用共享内存，不可用或后端关闭时回退到 TCP
+        if self.shared_memory_name:
+            self._listen_shared_memory()
+        self._listen_tcp()
+
+    def _listen_shared_memory(self):
+        # 只有启用共享内存时才导入 (multiprocessing 相关模块会拖慢启动)
+        from src.connector.shm_transport import SharedStateReader
+        try:
+            reader = SharedStateReader(self.shared_memory_name)
+        except Exception as e:
+            print(f"Shared memory unavailable, falling back to TCP: {e}")
+            return
+
+        self.connection_status.emit("Connected (shm)")
+        try:
+            while self.running and not reader.closed:
+                payload = reader.read_latest()
+                if payload is None:
+                    # 无新数据：只检查了头部版本号，短暂休眠后再看
+                    time.sleep(self.poll_interval)
+                    continue
+                try:
+                    self.data_received.emit(json.loads(payload))
+                except json.JSONDecodeError as e:
+                    print(f"JSON Parse Error: {e}")
+        finally:
+            reader.close()
+
+    def _listen_tcp(self):
+        # 基于 asyncio 的接收循环 (见 src/connector/async_runtime.py)：
+        # 断线后按固定间隔重连，stop() 时立即关闭连接，不再依赖 recv 超时和 sleep 轮询
+        # 在接收线程中才导入，不拖慢窗口首帧
+        import asyncio
+        from src.connector.async_runtime import ui_client
+        asyncio.run(self._run_tcp(ui_client))
+
+    async def _run_tcp(self, ui_client):
+        import asyncio
+        self._stop_event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        if not self.running:
+            return
+        await ui_client(self.host, self.port, self.data_received.emit, self.connection_status.emit, self._stop_event)
 
 class CardItemWidget(QWidget):
     """
@@ -115,7 +120,7 @@ class OverlayWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.init_ui()
-        self.init_logic()
+        # 接收线程在窗口显示之后再启动 (见 __main__)，不推迟首帧
 
     def init_ui(self):
         # 1. 窗口属性设置
@@ -210,7 +215,12 @@ class OverlayWindow(QWidget):
         self.old_pos = None
 
     def init_logic(self):
-        self.receiver = DataReceiver()
+        # 传入 --shm 时优先通过共享内存读取后端状态
+        shm_name = None
+        if "--shm" in sys.argv:
+            from src.connector.shm_transport import DEFAULT_SHM_NAME
+            shm_name = DEFAULT_SHM_NAME
+        self.receiver = DataReceiver(shared_memory_name=shm_name)
         self.receiver.connection_status.connect(self.update_status)
         self.receiver.data_received.connect(self.update_data)
 
@@ -282,6 +292,8 @@ if __name__ == "__main__":
         print("Window initialized. Showing window...", file=sys.stderr)
         window.show()
         print("Window shown. Entering main loop...", file=sys.stderr)
+        # 首帧绘制完成后再连接后端
+        QTimer.singleShot(0, window.init_logic)
         sys.exit(app.exec())
     except Exception as e:
         print(f"CRITICAL UI ERROR: {e}", file=sys.stderr)
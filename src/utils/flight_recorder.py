@@ -0,0 +1,102 @@
+"""
+飞行记录器：决策热路径上的调试事件写入固定大小的内存环形缓冲区，只在需要时才写盘。
+
+record(fmt, *args) 只把 (时间戳, 格式串, 参数, 异常) 元组放进预分配的槽位，不做字符串格式化、不打开文件；
+缓冲区写满后覆盖最旧的事件。以下情况才把事件格式化 (fmt % args，异常展开为 traceback) 并写出：
+- 出错时 (error)，同一时间段内最多转储一次
+- 按需 (控制指令 {"cmd": "flight_dump"}，见 src/utils/profiler.py)
+- Bridge 关闭时
+"""
+import os
+import threading
+import time
+import traceback
+
+DEFAULT_CAPACITY = 4096
+# 连续出错时两次转储的最小间隔 (秒)，期间的事件留在缓冲区，下次转储时写出
+ERROR_DUMP_INTERVAL = 5.0
+
+
+class FlightRecorder:
+    """
+    path 为出错 / 关闭时追加写入的文件 (None 时只在按需转储时写出)。
+    记录不加锁 (只在引擎线程中调用)；转储可以来自其他线程，加锁保证两次转储不重复写出同一事件。
+    """
+
+    def __init__(self, path=None, capacity=DEFAULT_CAPACITY, clock=time.time, error_dump_interval=ERROR_DUMP_INTERVAL):
+        self.path = path
+        self.capacity = capacity
+        self.clock = clock
+        self.error_dump_interval = error_dump_interval
+        self._events = [None] * capacity
+        self._count = 0  # 累计记录的事件数，槽位为 _count % capacity
+        self._dumped = 0  # 已追加写出到 path 的事件数 (累计编号)
+        self._next_error_dump = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def recorded(self):
+        return self._count
+
+    def record(self, fmt, *args):
+        i = self._count
+        self._events[i % self.capacity] = (self.clock(), fmt, args, None)
+        self._count = i + 1
+
+    def error(self, fmt, *args, exc=None):
+        """记录错误 (可附带异常，traceback 在转储时才展开) 并转储到 path"""
+        i = self._count
+        self._events[i % self.capacity] = (self.clock(), fmt, args, exc)
+        self._count = i + 1
+        now = time.monotonic()
+        if self.path and now >= self._next_error_dump:
+            self._next_error_dump = now + self.error_dump_interval
+            self.dump(self.path, reason="error")
+
+    def _take(self, only_new):
+        """返回 (事件列表, 被覆盖而未写出的事件数)"""
+        with self._lock:
+            end = self._count
+            first = max(0, end - self.capacity)
+            start = max(first, self._dumped) if only_new else first
+            lost = max(0, first - self._dumped) if only_new else 0
+            events = [self._events[i % self.capacity] for i in range(start, end)]
+            if only_new:
+                self._dumped = end
+        return events, lost
+
+    def dump(self, path=None, reason="manual", only_new=True):
+        """
+        把缓冲区中的事件格式化后追加到 path (默认 self.path)，返回写出的事件数。
+        only_new=True 时跳过上次追加转储已写出的事件；False 时写出缓冲区中的全部事件 (按需快照)。
+        """
+        path = path or self.path
+        if not path:
+            return 0
+        events, lost = self._take(only_new)
+        if not events:
+            return 0
+        header = f"=== flight recorder dump ({reason}): {len(events)} events"
+        if lost:
+            header += f", {lost} overwritten before dump"
+        lines = [header + " ===\n"] + [format_event(event) for event in events]
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        except OSError:
+            return 0
+        return len(events)
+
+
+def format_event(event):
+    timestamp, fmt, args, exc = event
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+    try:
+        message = fmt % args if args else fmt
+    except (TypeError, ValueError):
+        message = f"{fmt} {args!r}"
+    line = f"{stamp}.{int(timestamp * 1000) % 1000:03d} - {message}\n"
+    if exc is not None:
+        line += "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+    return line
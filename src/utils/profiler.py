@@ -0,0 +1,175 @@
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+def collapse_stack(frame):
+    """把一个栈帧链转换为 collapsed-stack 格式 (根在前，以分号分隔)"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    采样式 CPU 分析器。
+    在独立线程中按固定间隔读取目标线程 (默认为 Coordinator 所在的主线程) 的调用栈，
+    统计后写出 collapsed-stack 文件，可直接交给 flamegraph.pl 或 speedscope 生成火焰图。
+    只有在采样期间才存在采样线程，未启用时对被分析线程没有任何开销。
+    """
+
+    def __init__(self, thread_id=None, interval=0.005):
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.interval = interval
+        self.samples = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds, output_path):
+        """开始一次限时采样，结束后写入 output_path；已有采样在进行时返回 False"""
+        if self.running:
+            return False
+        self.samples = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(seconds, output_path), daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """提前结束采样 (仍会写出已采集的结果)"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self, seconds, output_path):
+        counts = Counter()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline and not self._stop.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                counts[collapse_stack(frame)] += 1
+                self.samples += 1
+            del frame
+            time.sleep(self.interval)
+
+        try:
+            with open(output_path, "w", encoding="utf-8") as f:
+                for stack, count in counts.most_common():
+                    f.write(f"{stack} {count}\n")
+            logger.info(f"Profile written: {output_path} ({self.samples} samples)")
+        except Exception as e:
+            logger.error(f"Failed to write profile: {e}")
+
+
+class MemoryProfiler:
+    """
+    基于 tracemalloc 的内存快照。
+    第一次 snapshot() 时才开始追踪 (追踪期间所有分配都有额外开销)，
+    之后每次快照都与上一次比较，输出增长最多的分配位置，用于排查长时间运行的内存增长。
+    """
+
+    def __init__(self, frames=10):
+        self.frames = frames
+        self.previous = None
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def snapshot(self, output_path, top=20):
+        """拍摄快照并把 (相对上次快照的) 差异写入 output_path，返回前几行摘要"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        if self.previous is None:
+            stats = snapshot.statistics("lineno")
+            title = "Top allocations (baseline snapshot)"
+        else:
+            stats = snapshot.compare_to(self.previous, "lineno")
+            title = "Top allocation growth since previous snapshot"
+        self.previous = snapshot
+
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [str(stat) for stat in stats[:top]]
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(f"{title}\n")
+            f.write(f"traced current={current / 1024:.1f} KiB peak={peak / 1024:.1f} KiB\n\n")
+            f.write("\n".join(lines) + "\n")
+        logger.info(f"Memory snapshot written: {output_path}")
+        return lines[:5]
+
+    def stop(self):
+        """停止追踪并丢弃基准快照"""
+        self.previous = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class ProfilerControl:
+    """
+    分析器的控制入口，处理来自 Bridge Socket 或信号的指令 (dict)，返回可序列化的结果：
+      {"cmd": "profile", "seconds": 10, "interval_ms": 5}  限时 CPU 采样
+      {"cmd": "profile_stop"}                              提前结束采样
+      {"cmd": "mem_snapshot", "top": 20}                   内存快照 (与上次快照比较)
+      {"cmd": "mem_stop"}                                  停止内存追踪
+      {"cmd": "flight_dump"}                               转储飞行记录器缓冲区 (见 src/utils/flight_recorder.py)
+    """
+
+    def __init__(self, output_dir, thread_id=None, flight_recorder=None):
+        self.output_dir = output_dir
+        self.cpu = SamplingProfiler(thread_id)
+        self.memory = MemoryProfiler()
+        self.flight_recorder = flight_recorder
+
+    def _output_path(self, prefix, ext):
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.output_dir, f"{prefix}-{stamp}.{ext}")
+
+    def handle_command(self, command):
+        # 控制连接发来的任意 JSON 都会交给这里 ([]、"x"、1 等)，不是对象时直接回复错误
+        if not isinstance(command, dict):
+            return {"ok": False, "error": "expected a JSON object"}
+        cmd = command.get("cmd")
+        try:
+            if cmd == "profile":
+                seconds = float(command.get("seconds", 10))
+                self.cpu.interval = float(command.get("interval_ms", 5)) / 1000
+                path = self._output_path("profile", "collapsed")
+                if not self.cpu.start(seconds, path):
+                    return {"ok": False, "error": "profile already running"}
+                return {"ok": True, "output": path, "seconds": seconds}
+            if cmd == "profile_stop":
+                self.cpu.stop()
+                return {"ok": True, "samples": self.cpu.samples}
+            if cmd == "mem_snapshot":
+                path = self._output_path("memory", "txt")
+                top = self.memory.snapshot(path, top=int(command.get("top", 20)))
+                return {"ok": True, "output": path, "top": top}
+            if cmd == "mem_stop":
+                self.memory.stop()
+                return {"ok": True}
+            if cmd == "flight_dump" and self.flight_recorder:
+                path = self._output_path("flight", "log")
+                events = self.flight_recorder.dump(path, reason="manual", only_new=False)
+                return {"ok": True, "output": path, "events": events}
+        except Exception as e:
+            logger.error(f"Profiler command failed: {e}")
+            return {"ok": False, "error": str(e)}
+        return {"ok": False, "error": f"unknown command: {cmd}"}
@@ -0,0 +1,67 @@
+"""
+启动耗时分析。
+
+用法:
+    python -m src.utils.startup src.main                 # 后端导入耗时排行 (-X importtime)
+    python -m src.utils.startup src.ui.overlay_ui --top 30
+"""
+import argparse
+import logging
+import os
+import re
+import subprocess
+import sys
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ImportTime = namedtuple("ImportTime", ["module", "self_us", "cumulative_us", "depth"])
+
+# -X importtime 的输出行: "import time:       123 |       4567 |   package.module"
+IMPORT_TIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$")
+
+
+def parse_import_times(stderr_text):
+    """解析 -X importtime 的 stderr 输出"""
+    rows = []
+    for line in stderr_text.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append(ImportTime(module.strip(), int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def import_time_report(module, python=sys.executable, cwd=ROOT_DIR, env=None):
+    """在独立子进程中导入 module 并返回各模块导入耗时 (子进程保证不受当前进程已导入模块的影响)"""
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_import_times(result.stderr)
+
+
+def format_report(rows, top=20):
+    """按累计耗时排序输出前 top 项"""
+    lines = [f"{'cumulative':>12} {'self':>10}  module"]
+    for row in sorted(rows, key=lambda r: r.cumulative_us, reverse=True)[:top]:
+        lines.append(f"{row.cumulative_us / 1000:>10.1f}ms {row.self_us / 1000:>8.1f}ms  {row.module}")
+    total = sum(r.cumulative_us for r in rows if r.depth == 0)
+    lines.append(f"total import time: {total / 1000:.1f} ms")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("module", help="要分析的模块，如 src.main 或 src.ui.overlay_ui")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    print(format_report(import_time_report(args.module), args.top))
+
+
+if __name__ == "__main__":
+    main()
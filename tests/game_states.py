@@ -0,0 +1,366 @@
+"""
+构造 CommunicationMod 协议格式的测试消息。
+字段与游戏实际发送的 JSON 一致，可直接交给 Game.from_json 或 Coordinator 解析。
+"""
+import copy
+
+from src.core.state_view import LazyGameState
+
+
+def card_json(card_id, card_type, uuid, cost=1, name=None, rarity="BASIC", upgrades=0, has_target=None):
+    return {
+        "id": card_id,
+        "name": name or card_id,
+        "type": card_type,
+        "rarity": rarity,
+        "upgrades": upgrades,
+        "has_target": card_type == "ATTACK" if has_target is None else has_target,
+        "cost": cost,
+        "uuid": uuid,
+        "misc": 0,
+        "price": 0,
+        "is_playable": True,
+        "exhausts": False,
+    }
+
+
+def strike(uuid):
+    return card_json("Strike_R", "ATTACK", uuid, name="Strike")
+
+
+def defend(uuid):
+    return card_json("Defend_R", "SKILL", uuid, name="Defend")
+
+
+def bash(uuid):
+    return card_json("Bash", "ATTACK", uuid, cost=2, name="Bash")
+
+
+def monster_json(monster_id="Cultist", hp=48, max_hp=48, intent="ATTACK", damage=6, hits=1,
+                 move_id=1, last_move_id=3, block=0, powers=None):
+    return {
+        "name": monster_id,
+        "id": monster_id,
+        "max_hp": max_hp,
+        "current_hp": hp,
+        "block": block,
+        "intent": intent,
+        "half_dead": False,
+        "is_gone": False,
+        "move_id": move_id,
+        "last_move_id": last_move_id,
+        "second_last_move_id": None,
+        "move_base_damage": damage,
+        "move_adjusted_damage": damage if intent.startswith("ATTACK") else -1,
+        "move_hits": hits,
+        "powers": powers or [],
+    }
+
+
+STARTER_DECK = [strike(f"deck_s{i}") for i in range(5)] + [defend(f"deck_d{i}") for i in range(4)] + [bash("deck_b0")]
+
+
+def base_game_state(screen_type="NONE", screen_state=None, floor=1, hp=80, max_hp=80, gold=99):
+    return {
+        "current_action": None,
+        "current_hp": hp,
+        "max_hp": max_hp,
+        "floor": floor,
+        "act": 1,
+        "gold": gold,
+        "seed": 123456789,
+        "class": "IRONCLAD",
+        "ascension_level": 0,
+        "relics": [{"id": "Burning Blood", "name": "Burning Blood", "counter": -1}],
+        "deck": copy.deepcopy(STARTER_DECK),
+        "potions": [],
+        "map": [],
+        "screen_type": screen_type,
+        "screen_state": screen_state or {},
+        "is_screen_up": False,
+        "room_phase": "COMBAT" if screen_type == "NONE" else "COMPLETE",
+        "room_type": "MonsterRoom",
+    }
+
+
+def combat_message(hand=None, monsters=None, energy=3, hp=80, max_hp=80, block=0, turn=1, floor=1,
+                   draw_pile=None, discard_pile=None, player_powers=None, ready=True):
+    """一条战斗中的 CommunicationMod 消息"""
+    game_state = base_game_state(floor=floor, hp=hp, max_hp=max_hp)
+    game_state["combat_state"] = {
+        "player": {
+            "max_hp": max_hp,
+            "current_hp": hp,
+            "block": block,
+            "energy": energy,
+            "powers": player_powers or [],
+            "orbs": [],
+        },
+        "monsters": monsters if monsters is not None else [monster_json()],
+        "draw_pile": draw_pile or [],
+        "discard_pile": discard_pile or [],
+        "exhaust_pile": [],
+        "hand": hand if hand is not None else [strike("s1"), strike("s2"), defend("d1"), defend("d2"), bash("b1")],
+        "limbo": [],
+        "card_in_play": None,
+        "turn": turn,
+        "cards_discarded_this_turn": 0,
+    }
+    return {
+        "in_game": True,
+        "ready_for_command": ready,
+        "available_commands": ["play", "end", "key", "click", "wait", "state"],
+        "game_state": game_state,
+    }
+
+
+def map_node(x, y, symbol, children=()):
+    return {"x": x, "y": y, "symbol": symbol,
+            "children": [{"x": cx, "y": cy} for cx, cy in children], "parents": []}
+
+
+def map_message(floor=1, hp=80, max_hp=80):
+    """地图界面：当前在 (0,0)，可选精英 (0,1) 或篝火 (1,1)"""
+    nodes = [
+        map_node(0, 0, "M", [(0, 1), (1, 1)]),
+        map_node(0, 1, "E", [(0, 2)]),
+        map_node(1, 1, "R", [(0, 2)]),
+        map_node(0, 2, "M"),
+    ]
+    screen_state = {
+        "current_node": {"x": 0, "y": 0, "symbol": "M"},
+        "next_nodes": [{"x": 0, "y": 1, "symbol": "E"}, {"x": 1, "y": 1, "symbol": "R"}],
+        "first_node_chosen": True,
+        "boss_available": False,
+    }
+    game_state = base_game_state("MAP", screen_state, floor=floor, hp=hp, max_hp=max_hp)
+    game_state["map"] = nodes
+    game_state["choice_list"] = ["x=0", "x=1"]
+    return {
+        "in_game": True,
+        "ready_for_command": True,
+        "available_commands": ["choose", "key", "click", "wait", "state"],
+        "game_state": game_state,
+    }
+
+
+def card_reward_message(cards=None):
+    screen_state = {
+        "cards": cards or [
+            card_json("Inflame", "POWER", "r1", rarity="UNCOMMON"),
+            card_json("Pommel Strike", "ATTACK", "r2", rarity="COMMON"),
+            card_json("Shrug It Off", "SKILL", "r3", rarity="COMMON"),
+        ],
+        "bowl_available": False,
+        "skip_available": True,
+    }
+    game_state = base_game_state("CARD_REWARD", screen_state)
+    game_state["choice_list"] = [card["name"].lower() for card in screen_state["cards"]]
+    return {
+        "in_game": True,
+        "ready_for_command": True,
+        "available_commands": ["choose", "skip", "key", "click", "wait", "state"],
+        "game_state": game_state,
+    }
+
+
+def rest_message(hp=80, max_hp=80, options=("rest", "smith"), has_rested=False):
+    """篝火界面"""
+    game_state = base_game_state("REST", {"has_rested": has_rested, "rest_options": list(options)},
+                                 hp=hp, max_hp=max_hp)
+    commands = ["proceed", "key", "click", "wait", "state"] if has_rested else ["choose", "key", "click", "wait", "state"]
+    if not has_rested:
+        game_state["choice_list"] = list(options)
+    return {
+        "in_game": True,
+        "ready_for_command": True,
+        "available_commands": commands,
+        "game_state": game_state,
+    }
+
+
+def shop_message(cards=None, relics=None, potions=None, purge_cost=75, gold=200, deck=None, act=1):
+    """商店界面 (商品价格在 price 字段)"""
+    screen_state = {
+        "cards": cards if cards is not None else [
+            dict(card_json("Pommel Strike", "ATTACK", "shop_c1", rarity="COMMON"), price=50),
+            dict(card_json("Demon Form", "POWER", "shop_c2", cost=3, rarity="RARE"), price=150),
+        ],
+        "relics": relics if relics is not None else [
+            {"id": "Vajra", "name": "Vajra", "counter": -1, "price": 150},
+        ],
+        "potions": potions if potions is not None else [
+            {"id": "Fairy Potion", "name": "Fairy in a Bottle", "can_use": False, "can_discard": True,
+             "requires_target": False, "price": 60},
+        ],
+        "purge_available": purge_cost is not None,
+        "purge_cost": purge_cost or 0,
+    }
+    game_state = base_game_state("SHOP_SCREEN", screen_state, gold=gold)
+    game_state["act"] = act
+    if deck is not None:
+        game_state["deck"] = deck
+    game_state["choice_list"] = [card["name"].lower() for card in screen_state["cards"]] + \
+        [relic["name"].lower() for relic in screen_state["relics"]] + ["purge"]
+    return {
+        "in_game": True,
+        "ready_for_command": True,
+        "available_commands": ["choose", "leave", "key", "click", "wait", "state"],
+        "game_state": game_state,
+    }
+
+
+def event_message(event_id="Big Fish", options=None, hp=80, max_hp=80):
+    """事件界面，options 为 [(label, disabled)]"""
+    options = options or [("Banana", False), ("Donut", False), ("Box", False)]
+    screen_state = {
+        "event_name": event_id,
+        "event_id": event_id,
+        "body_text": "",
+        "options": [{"text": f"[{label}]", "label": label, "disabled": disabled,
+                     "choice_index": None if disabled else i}
+                    for i, (label, disabled) in enumerate(options)],
+    }
+    game_state = base_game_state("EVENT", screen_state, hp=hp, max_hp=max_hp)
+    game_state["room_type"] = "EventRoom"
+    game_state["choice_list"] = [label.lower() for label, disabled in options if not disabled]
+    return {
+        "in_game": True,
+        "ready_for_command": True,
+        "available_commands": ["choose", "key", "click", "wait", "state"],
+        "game_state": game_state,
+    }
+
+
+def potion_json(potion_id="Fire Potion"):
+    return {"id": potion_id, "name": potion_id, "can_use": False, "can_discard": potion_id != "Potion Slot",
+            "requires_target": False}
+
+
+def combat_reward_message(rewards=None, potions=None):
+    """战斗奖励界面，potions 为药水栏 (空位为 "Potion Slot")"""
+    rewards = rewards if rewards is not None else [
+        {"type": "GOLD", "gold": 15},
+        {"type": "POTION", "potion": potion_json("Fire Potion")},
+        {"type": "CARD"},
+    ]
+    game_state = base_game_state("COMBAT_REWARD", {"rewards": rewards})
+    game_state["potions"] = [potion_json(p) for p in (potions or ["Potion Slot"] * 3)]
+    commands = ["proceed", "key", "click", "wait", "state"]
+    if rewards:
+        game_state["choice_list"] = [reward["type"].lower() for reward in rewards]
+        commands.insert(0, "choose")
+    return {
+        "in_game": True,
+        "ready_for_command": True,
+        "available_commands": commands,
+        "game_state": game_state,
+    }
+
+
+def game_over_message(floor=3, victory=False):
+    hp = 30 if victory else 0
+    game_state = base_game_state("GAME_OVER", {"score": 42, "victory": victory}, floor=floor, hp=hp)
+    return {
+        "in_game": True,
+        "ready_for_command": True,
+        "available_commands": ["proceed", "key", "click", "wait", "state"],
+        "game_state": game_state,
+    }
+
+
+def view(message):
+    """把协议消息包装成 LazyGameState (与 Coordinator 收到消息后的解析方式相同)"""
+    return LazyGameState(message["game_state"], message["available_commands"])
+
+
+# 随机状态生成用的卡池：覆盖评分引擎的各个分支 (易伤源、0 费、高费、能力、状态牌、中文名)
+RANDOM_CARD_POOL = [
+    ("Strike_R", "ATTACK", 1, "Strike"),
+    ("Strike_R", "ATTACK", 1, "打击"),
+    ("Defend_R", "SKILL", 1, "Defend"),
+    ("Defend_R", "SKILL", 1, "防御"),
+    ("Bash", "ATTACK", 2, "Bash"),
+    ("Uppercut", "ATTACK", 2, "Uppercut"),
+    ("Thunderclap", "ATTACK", 1, "Thunderclap"),
+    ("Anger", "ATTACK", 0, "Anger"),
+    ("Clothesline", "ATTACK", 2, "Clothesline"),
+    ("Shrug It Off", "SKILL", 1, "Shrug It Off"),
+    ("Flame Barrier", "SKILL", 2, "Flame Barrier"),
+    ("Impervious", "SKILL", 2, "Impervious Wall"),
+    ("Inflame", "POWER", 1, "Inflame"),
+    ("Demon Form", "POWER", 3, "Demon Form"),
+    ("Wound", "STATUS", -2, "Wound"),
+]
+
+
+def random_combat_message(rng, turn=1):
+    """随机战斗状态 (rng 为 random.Random)，用于一致性测试和基准测试"""
+    hand = []
+    for i in range(rng.randint(0, 10)):
+        card_id, card_type, cost, name = rng.choice(RANDOM_CARD_POOL)
+        hand.append(card_json(card_id, card_type, f"h{i}", cost=cost, name=name))
+    monsters = []
+    for i in range(rng.randint(1, 3)):
+        max_hp = rng.randint(8, 60)
+        powers = []
+        if rng.random() < 0.2:
+            powers.append({"id": "Curl Up", "name": "Curl Up", "amount": rng.randint(3, 7)})
+        monster = monster_json(
+            monster_id=rng.choice(["Cultist", "JawWorm", "FuzzyLouseNormal", "AcidSlime_M"]),
+            hp=rng.randint(1, max_hp), max_hp=max_hp,
+            intent=rng.choice(["ATTACK", "ATTACK_BUFF", "BUFF", "DEFEND", "DEBUFF"]),
+            damage=rng.randint(3, 25), hits=rng.choice([1, 1, 1, 2, 3]),
+            move_id=rng.randint(1, 4), powers=powers
+        )
+        monster["half_dead"] = rng.random() < 0.05
+        monster["is_gone"] = rng.random() < 0.05
+        monsters.append(monster)
+    player_powers = []
+    if rng.random() < 0.3:
+        player_powers.append({"id": "Strength", "name": "Strength", "amount": rng.randint(-2, 5)})
+    draw_pile = [card_json(*RANDOM_CARD_POOL[k][:2], f"dp{k}", cost=RANDOM_CARD_POOL[k][2])
+                 for k in rng.sample(range(len(RANDOM_CARD_POOL)), rng.randint(0, 8))]
+    return combat_message(
+        hand=hand, monsters=monsters, energy=rng.randint(0, 4),
+        hp=rng.randint(1, 80), block=rng.choice([0, 0, 5, 12]), turn=turn,
+        draw_pile=draw_pile, player_powers=player_powers
+    )
+
+
+def random_turn_session(rng, turns=3):
+    """
+    随机模拟几个回合的战斗消息序列：每回合从随机状态开始，逐张打出可负担的手牌
+    (扣能量、攻击牌扣怪物血量、Inflame 加力量)，偶尔抽一张新牌。用于协议回放测试和吞吐量基准。
+    """
+    messages = []
+    for turn in range(1, turns + 1):
+        message = random_combat_message(rng, turn=turn)
+        messages.append(copy.deepcopy(message))
+        combat = message["game_state"]["combat_state"]
+        player = combat["player"]
+        drawn = 0
+        while True:
+            playable = [c for c in combat["hand"] if 0 <= c["cost"] <= player["energy"]]
+            if not playable:
+                break
+            card = rng.choice(playable)
+            combat["hand"].remove(card)
+            player["energy"] -= card["cost"]
+            alive = [m for m in combat["monsters"] if not m["is_gone"]]
+            if card["type"] == "ATTACK" and alive:
+                target = rng.choice(alive)
+                target["current_hp"] = max(0, target["current_hp"] - 6)
+                target["is_gone"] = target["current_hp"] == 0
+            elif card["id"] == "Inflame":
+                powers = player["powers"]
+                if powers and powers[0]["id"] == "Strength":
+                    powers[0]["amount"] += 2
+                else:
+                    powers.insert(0, {"id": "Strength", "name": "Strength", "amount": 2})
+            if rng.random() < 0.15:
+                card_id, card_type, cost, name = rng.choice(RANDOM_CARD_POOL)
+                drawn += 1
+                combat["hand"].append(card_json(card_id, card_type, f"t{turn}d{drawn}", cost=cost, name=name))
+            messages.append(copy.deepcopy(message))
+    return messages
@@ -0,0 +1,119 @@
+"""
+进程内协议测试工具：不监听端口、不启动线程，把 CommunicationMod 消息直接交给 Bridge 回调。
+
+ProtocolHarness 使用与 AsyncRuntime 相同的处理循环 (BridgeCoordinator 协议解析 + GameBridge 回调)，
+发给游戏的指令和发给 UI 的广播都记录在内存中；决策时间戳和规则热加载检查使用 VirtualClock，
+数据文件写在临时目录。因此场景测试互不干扰，可以并行运行，也可以用来测量处理吞吐量
+(见 scripts/bench_protocol.py)。
+"""
+import json
+import os
+import shutil
+import tempfile
+
+from src.connector.coordinator import BridgeCoordinator
+from src.connector.game_bridge import GameBridge
+
+
+class VirtualClock:
+    """手动推进的时钟：time() / monotonic() 只在 advance / sleep 时变化"""
+
+    def __init__(self, start=1700000000.0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    sleep = advance
+
+
+def isolated_bridge(data_dir, collect_data=False, initialize=True):
+    """
+    构造不监听端口的 GameBridge，所有数据文件 (含权重、规则、怪物行动表等覆盖文件) 指向 data_dir，
+    评分结果不受本机 data/ 影响，也不会往其中写入采集文件、对局历史或缓存。
+    initialize=False 时保留延迟初始化，由调用方决定何时 ensure_initialized()。
+    """
+    bridge = GameBridge(deferred_init=True, listen=False)
+    bridge.collect_data = collect_data
+    for attr in ("data_file", "log_file", "move_table_file", "weights_file", "rules_file", "history_file",
+                 "labels_file", "outcomes_file", "value_tables_file"):
+        setattr(bridge, attr, os.path.join(data_dir, os.path.basename(getattr(bridge, attr))))
+    bridge.data_dir = data_dir
+    bridge.profiler.output_dir = os.path.join(data_dir, "profiles")
+    bridge.flight.path = bridge.log_file
+    bridge.cache_file = ":memory:"
+    bridge.policy_file = None
+    bridge.book_file = None
+    if initialize:
+        bridge.ensure_initialized()
+    return bridge
+
+
+class ProtocolHarness:
+    """
+    feed(message) 交给 Bridge 一条消息 (dict 或 JSON 字符串)，执行到没有可立即执行的动作为止，
+    返回本次发给游戏的指令。sent / broadcasts 保存全部指令和 UI 快照 (已解析的 dict)。
+    collect_data=True 时采集文件、对局历史写在临时目录 (data_dir)，close() 时删除。
+    """
+
+    def __init__(self, auto_play=False, collect_data=False, clock=None):
+        self.clock = clock or VirtualClock()
+        self.sent = []
+        self.broadcasts = []
+        self.data_dir = tempfile.mkdtemp(prefix="harness-")
+
+        self.coordinator = BridgeCoordinator(io_threads=False)
+        self.coordinator.send_message = self.sent.append
+
+        bridge = isolated_bridge(self.data_dir, collect_data)
+        bridge.clock = self.clock.time
+        bridge.flight.clock = self.clock.time
+        bridge.rules_engine.clock = self.clock.monotonic
+        bridge.cancel_token = self.coordinator.mailbox
+        bridge.publisher = lambda data: self.broadcasts.append(json.loads(data))
+        bridge.auto_play = auto_play
+        self.bridge = bridge
+
+        self.coordinator.register_command_error_callback(bridge.handle_error)
+        self.coordinator.register_state_change_callback(bridge.get_next_action_in_game)
+        self.coordinator.register_out_of_game_callback(bridge.get_next_action_out_of_game)
+
+    def feed(self, message):
+        if not isinstance(message, str):
+            message = json.dumps(message)
+        start = len(self.sent)
+        self.coordinator.input_queue.put(message)
+        self.run_until_idle()
+        return self.sent[start:]
+
+    def feed_burst(self, messages):
+        """一次放入多条消息再处理 (模拟评分期间游戏连续发来状态，旧状态会被合并)"""
+        start = len(self.sent)
+        for message in messages:
+            self.coordinator.input_queue.put(message if isinstance(message, str) else json.dumps(message))
+        self.run_until_idle()
+        return self.sent[start:]
+
+    def run_until_idle(self):
+        while self.coordinator.has_work():
+            self.coordinator.step()
+
+    @property
+    def last_broadcast(self):
+        return self.broadcasts[-1] if self.broadcasts else None
+
+    def close(self):
+        self.bridge.shutdown()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+import csv
+import shutil
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.core.action_labeler import ActionLabeler, Decision, infer_played_card, snapshot
+from src.core.run_history import RunHistory, RunRecorder
+from tests.game_states import combat_message, map_message, monster_json, strike, defend, bash, card_json, view
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+class TestInferPlayedCard(unittest.TestCase):
+    def test_attack_with_target(self):
+        prev = snapshot(view(combat_message(
+            hand=[strike("s1"), bash("b1")],
+            monsters=[monster_json(hp=20), monster_json(hp=30)])))
+        curr = snapshot(view(combat_message(
+            hand=[strike("s1")], energy=1,
+            monsters=[monster_json(hp=20), monster_json(hp=22)])))
+        played = infer_played_card(prev, curr)
+        self.assertEqual(played.card.uuid, "b1")
+        self.assertEqual((played.target_index, played.energy_spent, played.damage_dealt), (1, 2, 8))
+
+    def test_skill_without_target(self):
+        prev = snapshot(view(combat_message(hand=[strike("s1"), defend("d1")])))
+        curr = snapshot(view(combat_message(hand=[strike("s1")], energy=2, block=5)))
+        played = infer_played_card(prev, curr)
+        self.assertEqual(played.card.uuid, "d1")
+        self.assertIsNone(played.target_index)
+
+    def test_exhausted_extra_card_resolved_by_energy(self):
+        true_grit = card_json("True Grit", "SKILL", "t1", cost=1)
+        prev = snapshot(view(combat_message(hand=[true_grit, bash("b1"), defend("d1")])))
+        curr = snapshot(view(combat_message(hand=[defend("d1")], energy=2)))
+        self.assertEqual(infer_played_card(prev, curr).card.uuid, "t1")
+
+    def test_end_of_turn_is_not_a_play(self):
+        prev = snapshot(view(combat_message(hand=[strike("s1")], turn=1)))
+        curr = snapshot(view(combat_message(hand=[defend("d9")], turn=2)))
+        self.assertIsNone(infer_played_card(prev, curr))
+
+
+class TestActionLabeler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.history = RunHistory(os.path.join(self.tmp_dir, "run_history.sqlite3"))
+        self.recorder = RunRecorder(self.history)
+        self.labels_path = os.path.join(self.tmp_dir, "action_labels.csv")
+        self.outcomes_path = os.path.join(self.tmp_dir, "combat_outcomes.csv")
+        self.labeler = ActionLabeler(self.labels_path, self.outcomes_path, self.history)
+
+    def tearDown(self):
+        self.labeler.close()
+        self.history.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def step(self, message, recommended=None, decision=None):
+        """模拟 Bridge 的处理顺序：先推断上一状态后的出牌，再记录本状态的推荐"""
+        game = view(message)
+        self.recorder.observe(game)
+        self.labeler.observe(game, decision)
+        if recommended is None:
+            return None
+        timestamp = len(self.labeler.decisions) + 1.0
+        decision_id = self.recorder.record_decision(game, 0, recommended, recommended, 80, timestamp)
+        new_decision = Decision(timestamp, decision_id, recommended, recommended)
+        self.labeler.add_decision(new_decision, game.turn)
+        return new_decision
+
+    def test_labels_and_outcomes(self):
+        hand = [strike("s1"), bash("b1"), defend("d1")]
+        d1 = self.step(combat_message(hand=hand, monsters=[monster_json(hp=20)]), recommended="b1")
+        # 玩家听从推荐打出痛击
+        d2 = self.step(combat_message(hand=hand[::2], energy=1, monsters=[monster_json(hp=12)]),
+                       recommended="s1", decision=d1)
+        # 玩家没有听从推荐，打出防御
+        self.step(combat_message(hand=hand[:1], energy=0, block=5, monsters=[monster_json(hp=12)]), decision=d2)
+        # 第 2 回合：怪物攻击造成 6 点伤害
+        d3 = self.step(combat_message(hand=[strike("s2")], turn=2, hp=74, monsters=[monster_json(hp=12)]),
+                       recommended="s2")
+        self.step(map_message(hp=74), decision=d3)
+
+        labels = read_csv(self.labels_path)
+        self.assertEqual([(r["played_uuid"], r["followed"]) for r in labels], [("b1", "1"), ("d1", "0")])
+        self.assertEqual(labels[0]["damage_dealt"], "8")
+
+        outcomes = read_csv(self.outcomes_path)
+        self.assertEqual(len(outcomes), 3)
+        self.assertEqual([(r["turn"], r["turn_damage_dealt"], r["turn_damage_taken"]) for r in outcomes],
+                         [("1", "8", "6"), ("1", "8", "6"), ("2", "0", "0")])
+        self.assertTrue(all(r["combat_won"] == "1" and r["combat_hp_lost"] == "6" for r in outcomes))
+
+        played = self.history.conn.execute("SELECT played_uuid FROM decisions ORDER BY decision_id").fetchall()
+        self.assertEqual(played, [("b1",), ("d1",), (None,)])
+
+if __name__ == '__main__':
+    unittest.main()
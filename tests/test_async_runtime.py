@@ -0,0 +1,129 @@
+import unittest
+import sys
+import os
+import json
+import asyncio
+import shutil
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.connector.async_runtime import AsyncRuntime, ui_client
+from src.connector.coordinator import BridgeCoordinator
+from tests.game_states import combat_message, strike, defend, monster_json
+from tests.protocol_harness import isolated_bridge
+
+
+def state_line(hp=40):
+    message = combat_message(hand=[strike("s1"), defend("d1")], monsters=[monster_json(hp=hp, intent="BUFF")])
+    return json.dumps(message).encode("utf-8") + b"\n"
+
+
+class TestAsyncRuntime(unittest.TestCase):
+    def setUp(self):
+        # 不启动 stdin / stdout 线程和 Socket 监听线程，全部交给运行时
+        self.coordinator = BridgeCoordinator(io_threads=False)
+        self.sent = []
+        self.coordinator.send_message = self.sent.append
+        self.data_dir = tempfile.mkdtemp()
+        self.bridge = isolated_bridge(self.data_dir)
+        self.bridge.cancel_token = self.coordinator.mailbox
+        self.coordinator.register_command_error_callback(self.bridge.handle_error)
+        self.coordinator.register_state_change_callback(self.bridge.get_next_action_in_game)
+        self.coordinator.register_out_of_game_callback(self.bridge.get_next_action_out_of_game)
+
+    def tearDown(self):
+        self.bridge.shutdown()
+        shutil.rmtree(self.data_dir)
+
+    def run_scenario(self, scenario):
+        async def main():
+            stdin = asyncio.StreamReader()
+            runtime = AsyncRuntime(self.coordinator, self.bridge, port=0, stdin=stdin)
+            serving = asyncio.create_task(runtime.serve())
+            while runtime.server is None or self.bridge.publisher is None:
+                await asyncio.sleep(0.01)
+            port = runtime.server.sockets[0].getsockname()[1]
+            await asyncio.wait_for(scenario(runtime, stdin, port), 10)
+            await asyncio.wait_for(serving, 10)
+        asyncio.run(main())
+
+    def test_state_broadcast_and_command_sent(self):
+        self.bridge.auto_play = True
+
+        async def scenario(runtime, stdin, port):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            while not runtime.clients:
+                await asyncio.sleep(0.01)
+            stdin.feed_data(state_line(hp=6))
+            snapshot = json.loads(await reader.readline())
+            self.assertEqual(snapshot["status"], "Combat")
+            self.assertEqual([card["uuid"] for card in snapshot["hand"]], ["s1", "d1"])
+            while not self.sent:
+                await asyncio.sleep(0.01)
+
+            # 游戏关闭 stdin：运行时结束并关闭 UI 连接
+            stdin.feed_eof()
+            self.assertEqual(await reader.read(), b"")
+            writer.close()
+
+        self.run_scenario(scenario)
+        # 自动模式下斩杀：打出打击
+        self.assertEqual(self.sent, ["play 1 0"])
+        self.assertEqual(self.coordinator.mailbox.received, 1)
+
+    def test_control_command_and_stop(self):
+        async def scenario(runtime, stdin, port):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(json.dumps({"cmd": "no_such_command"}).encode("utf-8") + b"\n")
+            reply = json.loads(await reader.readline())
+            self.assertEqual(reply["control"], {"ok": False, "error": "unknown command: no_such_command"})
+            # 不是 JSON 对象的指令得到错误回复，连接保持可用
+            writer.write(b"[]\n")
+            reply = json.loads(await reader.readline())
+            self.assertEqual(reply["control"], {"ok": False, "error": "expected a JSON object"})
+            # 控制连接不再接收状态广播
+            self.assertFalse(runtime.clients)
+            writer.close()
+            runtime.stop()
+
+        self.run_scenario(scenario)
+
+
+class TestUiClient(unittest.TestCase):
+    def test_reconnect_and_immediate_stop(self):
+        messages, statuses = [], []
+
+        async def main():
+            connections = []
+
+            async def handle(reader, writer):
+                connections.append(writer)
+                writer.write(json.dumps({"status": "Combat", "n": len(connections)}).encode("utf-8") + b"\n")
+                await writer.drain()
+                writer.close()
+
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            stop_event = asyncio.Event()
+            client = asyncio.create_task(
+                ui_client("127.0.0.1", port, messages.append, statuses.append, stop_event, retry_delay=0.01))
+            while len(messages) < 2:
+                await asyncio.sleep(0.01)
+            server.close()
+            await server.wait_closed()
+
+            # 设置 stop_event 后立即返回，不等待下一次重连
+            stop_event.set()
+            await asyncio.wait_for(client, 1)
+
+        asyncio.run(main())
+        self.assertEqual([m["n"] for m in messages[:2]], [1, 2])
+        self.assertEqual(statuses[:2], ["Connecting...", "Connected"])
+        self.assertIn("Waiting for Game...", statuses)
+
+if __name__ == '__main__':
+    unittest.main()
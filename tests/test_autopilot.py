@@ -0,0 +1,106 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from spirecomm.spire.screen import RestOption
+from spirecomm.communication.action import (
+    PlayCardAction, EndTurnAction, ProceedAction, CardRewardAction, ChooseMapNodeAction, RestAction,
+)
+
+from src.agents import autopilot
+from tests.game_states import (
+    combat_message, map_message, card_reward_message, rest_message, combat_reward_message, potion_json,
+    base_game_state, monster_json, strike, defend, bash, view,
+)
+from tests.protocol_harness import ProtocolHarness, isolated_bridge
+
+
+class TestAutopilotChoices(unittest.TestCase):
+    def test_plays_best_card_on_killable_target(self):
+        game = view(combat_message(hand=[strike("s1"), defend("d1")],
+                                   monsters=[monster_json(hp=20), monster_json(hp=5), monster_json(hp=3)]))
+        action = autopilot.choose_combat_action(game, {"s1": 90, "d1": 40})
+        self.assertIsInstance(action, PlayCardAction)
+        self.assertEqual(action.card.uuid, "s1")
+        # 两个怪物都能被打击击杀：打剩余生命更高的那个
+        self.assertEqual(action.target_index, 1)
+
+    def test_skips_unaffordable_and_ends_turn(self):
+        game = view(combat_message(hand=[bash("b1"), defend("d1")], energy=1))
+        action = autopilot.choose_combat_action(game, {"b1": 95, "d1": 30})
+        self.assertEqual(action.card.uuid, "d1")
+        self.assertIsNone(action.target_index)
+        self.assertIsInstance(autopilot.choose_combat_action(game, {"b1": 95, "d1": 0}), EndTurnAction)
+
+    def test_screens(self):
+        reward = autopilot.choose_reward_action(view(card_reward_message()), {"Inflame": 70, "Pommel Strike": 50})
+        self.assertIsInstance(reward, CardRewardAction)
+        self.assertEqual(reward.card.card_id, "Inflame")
+
+        node = autopilot.choose_map_action(view(map_message()), {"0,1": 20, "1,1": 100})
+        self.assertIsInstance(node, ChooseMapNodeAction)
+        self.assertEqual((node.node.x, node.node.y), (1, 1))
+
+        self.assertEqual(autopilot.choose_rest_action(view(rest_message(hp=30))).rest_option, RestOption.REST)
+        self.assertEqual(autopilot.choose_rest_action(view(rest_message(hp=70))).rest_option, RestOption.SMITH)
+        self.assertIsInstance(autopilot.choose_rest_action(view(rest_message(has_rested=True))), ProceedAction)
+
+
+class TestBridgeAutoPlay(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.bridge = isolated_bridge(self.data_dir)
+        self.bridge.auto_play = True
+
+    def tearDown(self):
+        self.bridge.shutdown()
+        shutil.rmtree(self.data_dir)
+
+    def test_engine_drives_combat_and_screens(self):
+        action = self.bridge.get_next_action_in_game(view(combat_message(
+            hand=[strike("s1"), defend("d1")], monsters=[monster_json(hp=5, intent="BUFF")])))
+        self.assertIsInstance(action, PlayCardAction)
+        self.assertEqual((action.card.uuid, action.target_index), ("s1", 0))
+
+        action = self.bridge.get_next_action_in_game(view(map_message()))
+        self.assertIsInstance(action, ChooseMapNodeAction)
+
+        action = self.bridge.get_next_action_in_game(view(rest_message(hp=20)))
+        self.assertIsInstance(action, RestAction)
+
+
+class TestRewardScreens(unittest.TestCase):
+    def setUp(self):
+        self.harness = ProtocolHarness(auto_play=True)
+
+    def tearDown(self):
+        self.harness.close()
+
+    def test_potion_reward_skipped_when_potions_full(self):
+        rewards = [{"type": "POTION", "potion": potion_json("Fire Potion")}]
+        self.assertEqual(self.harness.feed(combat_reward_message(rewards, potions=["Block Potion"] * 3)), ["proceed"])
+        self.assertEqual(self.harness.feed(combat_reward_message(rewards, potions=["Block Potion", "Potion Slot"])),
+                         ["choose 0"])
+
+    def test_rewards_taken_in_order(self):
+        rewards = [{"type": "POTION", "potion": potion_json()}, {"type": "GOLD", "gold": 20}, {"type": "CARD"}]
+        self.assertEqual(self.harness.feed(combat_reward_message(rewards, potions=["Fire Potion"] * 3)), ["choose 1"])
+        self.assertEqual(self.harness.feed(combat_reward_message([], potions=["Fire Potion"] * 3)), ["proceed"])
+
+    def test_simple_agent_fallback_gets_legal_command(self):
+        # 宝箱界面交给 SimpleAgent (使用同一个惰性视图)
+        message = {"in_game": True, "ready_for_command": True,
+                   "available_commands": ["choose", "proceed", "key", "click", "wait", "state"],
+                   "game_state": base_game_state("CHEST", {"chest_type": "SmallChest", "chest_open": False})}
+        message["game_state"]["choice_list"] = ["open"]
+        self.assertEqual(self.harness.feed(message), ["choose open"])
+
+if __name__ == '__main__':
+    unittest.main()
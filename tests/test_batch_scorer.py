@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import random
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.agents.batch_scorer import encode_states, score_batch, scores_to_dicts
+from src.agents.heuristic import DEFAULT_WEIGHTS, score_hand
+from src.agents.move_predictor import MovePredictor
+from src.core.deck_tracker import DeckTracker
+from spirecomm.spire.game import Game
+from tests.game_states import random_combat_message, combat_message, card_json
+
+
+def random_games(seed, count):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        message = random_combat_message(rng)
+        games.append(Game.from_json(message["game_state"], message["available_commands"]))
+    return games
+
+
+class TestBatchScorer(unittest.TestCase):
+    def test_parity_with_scalar_scorer(self):
+        games = random_games(seed=7, count=500)
+        batch = encode_states(games)
+        results = scores_to_dicts(batch, score_batch(batch))
+        for game, result in zip(games, results):
+            self.assertEqual(result, score_hand(game))
+
+    def test_parity_with_race_and_custom_weights(self):
+        games = random_games(seed=11, count=500)
+        predictor = MovePredictor.default()
+        forecasts = []
+        for game in games:
+            tracker = DeckTracker()
+            tracker.update(game)
+            forecasts.append(tracker.forecast())
+        weights = dict(DEFAULT_WEIGHTS, combo_lethal=35, defend_danger=45, race_attack=25)
+
+        batch = encode_states(games, forecasts, predictor)
+        results = scores_to_dicts(batch, score_batch(batch, weights))
+        for game, forecast, result in zip(games, forecasts, results):
+            self.assertEqual(result, score_hand(game, weights, forecast, predictor))
+
+    def test_card_features_keyed_by_id_name_and_type(self):
+        # 同一 card_id 的不同名称 / 类型各自查表，不共用第一次遇到的特征
+        messages = [
+            combat_message(hand=[card_json("Mystery", "SKILL", "a", name="Iron Wall")]),
+            combat_message(hand=[card_json("Mystery", "SKILL", "b", name="Mystery")]),
+            combat_message(hand=[card_json("Mystery", "ATTACK", "c", name="Mystery")]),
+        ]
+        games = [Game.from_json(m["game_state"], m["available_commands"]) for m in messages]
+        batch = encode_states(games)
+        self.assertEqual(batch.is_block[:, 0].tolist(), [True, False, False])
+        self.assertEqual(batch.card_type[:, 0].tolist(), [2, 2, 1])
+        results = scores_to_dicts(batch, score_batch(batch))
+        for game, result in zip(games, results):
+            self.assertEqual(result, score_hand(game))
+        self.assertEqual(score_batch(encode_states([])).shape[0], 0)
+
+if __name__ == '__main__':
+    unittest.main()
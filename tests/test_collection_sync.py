@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+import csv
+import shutil
+import tempfile
+import threading
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.collection_sync import Aggregator, CollectionShipper, make_server, read_complete_lines
+
+
+def append_rows(path, rows, header=("timestamp", "floor", "best_card_name")):
+    is_new = not os.path.exists(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if is_new:
+            writer.writerow(header)
+        writer.writerows(rows)
+
+
+class TestCollectionSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.tmp_dir, "training_data.csv")
+        self.aggregator = Aggregator(os.path.join(self.tmp_dir, "aggregate.sqlite3"))
+        self.server = None
+        self.port = None
+
+    def tearDown(self):
+        self.stop_server()
+        self.aggregator.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def start_server(self):
+        self.server = make_server(self.aggregator, "127.0.0.1", self.port or 0)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop_server(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def shipper(self, source="machine-a", batch_rows=3):
+        return CollectionShipper(f"http://127.0.0.1:{self.port}", [self.data_file], source,
+                                 batch_rows=batch_rows, timeout=2.0)
+
+    def stored_rows(self):
+        return self.aggregator.conn.execute("SELECT source, line FROM rows ORDER BY source, offset").fetchall()
+
+    def test_batches_partial_lines_and_restart(self):
+        self.start_server()
+        append_rows(self.data_file, [[i, 1, "Strike"] for i in range(7)])
+        with open(self.data_file, "a", encoding="utf-8") as f:
+            f.write("7,1,Ba")  # 仍在写入中的半行
+
+        first = self.shipper()
+        self.assertEqual(first.ship_once(), 7)  # 3 + 3 + 1 三批
+        self.assertEqual(len(self.stored_rows()), 7)
+
+        with open(self.data_file, "a", encoding="utf-8") as f:
+            f.write("sh\r\n")
+        # 新进程 (没有本地状态) 从服务端已提交的偏移继续
+        self.assertEqual(self.shipper().ship_once(), 1)
+        self.assertEqual([line for _, line in self.stored_rows()][-1], "7,1,Bash")
+
+    def test_resume_after_disconnect(self):
+        append_rows(self.data_file, [[1, 1, "Strike"]])
+        self.start_server()
+        shipper = self.shipper()
+        self.assertEqual(shipper.ship_once(), 1)
+        self.stop_server()
+
+        append_rows(self.data_file, [[2, 1, "Bash"], [3, 2, "Defend"]])
+        self.assertEqual(shipper.ship_once(), 0)  # 服务端不可达：不抛异常，等待下次
+
+        self.start_server()
+        self.assertEqual(shipper.ship_once(), 2)
+        self.assertEqual(len(self.stored_rows()), 3)
+
+    def test_duplicate_batches_are_ignored(self):
+        append_rows(self.data_file, [[1, 1, "Strike"], [2, 1, "Bash"]])
+        rows, end = read_complete_lines(self.data_file, len("timestamp,floor,best_card_name\r\n"), 10, 4096)
+        batch = {"source": "machine-a", "stream": "training_data.csv:x", "name": "training_data.csv",
+                 "header": "timestamp,floor,best_card_name", "end_offset": end, "rows": rows}
+        self.assertEqual(self.aggregator.ingest(batch), (2, 0, end))
+        # 确认回包丢失后整批重发
+        self.assertEqual(self.aggregator.ingest(batch), (0, 2, end))
+
+    def test_export_merges_sources(self):
+        self.start_server()
+        append_rows(self.data_file, [[1, 1, "Strike"]])
+        self.shipper("machine-a").ship_once()
+        self.shipper("machine-b").ship_once()
+
+        output = os.path.join(self.tmp_dir, "merged")
+        self.assertEqual(self.aggregator.export(output), {"training_data.csv": 2})
+        with open(os.path.join(output, "training_data.csv"), encoding="utf-8") as f:
+            merged = list(csv.reader(f))
+        self.assertEqual(merged[0], ["source", "timestamp", "floor", "best_card_name"])
+        self.assertEqual([r[0] for r in merged[1:]], ["machine-a", "machine-b"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import sys
+import os
+import csv
+import glob
+import hashlib
+import shutil
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.compact_data import BloomFilter, compact
+
+HEADER = ["timestamp", "floor", "hp_ratio", "energy", "best_card_name", "best_card_score"]
+DAY = 86400
+T0 = 1700006400.0  # 2023-11-15 00:00 UTC
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def read_parts(output_dir):
+    """{分片: [行]}，同时检查每个 part 文件都有表头"""
+    shards = {}
+    for path in sorted(glob.glob(os.path.join(output_dir, "*", "part-*.csv"))):
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            shards.setdefault(os.path.basename(os.path.dirname(path)), []).extend(
+                dict(zip(header, row)) for row in reader)
+    return shards
+
+
+class TestCompactData(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmp_dir, "out")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def test_global_dedup_sorted_date_shards(self):
+        # 第二个文件是重启后的会话：同样的状态只有时间戳不同
+        rows_a = [[T0 + 50, 1, 0.9, 3, "Strike", 90], [T0 + 10, 2, 0.8, 2, "Bash", 80],
+                  [T0 + DAY + 5, 3, 0.7, 3, "Defend", 70], [T0 + 20, 1, 0.9, 3, "Strike", 90]]
+        rows_b = [[T0 + DAY + 99, 2, 0.8, 2, "Bash", 80], [T0 + 30, 4, 0.5, 1, "Strike", 60],
+                  [T0 + DAY + 1, 5, 0.4, 0, "None", 0]]
+        write_csv(self.path("a.csv"), HEADER, rows_a)
+        write_csv(self.path("b.csv"), HEADER, rows_b)
+
+        stats = compact([self.path("a.csv"), self.path("b.csv")], self.output, chunk_rows=2, max_shard_bytes=100)
+        self.assertEqual((stats.input_rows, stats.unique_rows, stats.duplicates), (7, 5, 2))
+        self.assertEqual(stats.shards, 2)
+        self.assertGreater(stats.parts, stats.shards)
+
+        shards = read_parts(self.output)
+        self.assertEqual(sorted(shards), ["2023-11-15", "2023-11-16"])
+        # 分片内按时间排序，重复状态保留最先读到的一行
+        self.assertEqual([r["floor"] for r in shards["2023-11-15"]], ["2", "4", "1"])
+        self.assertEqual(shards["2023-11-15"][2]["timestamp"], str(T0 + 50))
+        self.assertEqual([r["floor"] for r in shards["2023-11-16"]], ["5", "3"])
+        for path in glob.glob(os.path.join(self.output, "*", "part-*.csv")):
+            self.assertLess(os.path.getsize(path), 100 + 40)
+
+    def test_merged_export_aligned_and_sharded_by_source(self):
+        write_csv(self.path("local.csv"), HEADER, [[T0, 1, 0.9, 3, "Strike", 90], [T0 + 1, 2, 0.8, 2, "Bash", 80]])
+        write_csv(self.path("merged.csv"), ["source"] + HEADER,
+                  [["pc-a", T0 + 5, 1, 0.9, 3, "Strike", 90], ["pc-b", T0 + 6, 3, 0.7, 1, "Defend", 40]])
+
+        stats = compact([self.path("local.csv"), self.path("merged.csv")], self.output, shard_by="source")
+        self.assertEqual(stats.duplicates, 1)
+        shards = read_parts(self.output)
+        self.assertEqual({k: [r["floor"] for r in v] for k, v in shards.items()},
+                         {"local": ["1", "2"], "pc-b": ["3"]})
+        self.assertEqual(list(shards["pc-b"][0]), HEADER + ["source"])
+
+        with self.assertRaises(FileExistsError):
+            compact([self.path("local.csv")], self.output)
+
+    def test_bloom_index_matches_exact_on_small_input(self):
+        rows = [[T0 + i, i % 40, 0.5, i % 4, "Strike", i % 40] for i in range(400)]
+        write_csv(self.path("big.csv"), HEADER, rows)
+        exact = compact([self.path("big.csv")], os.path.join(self.tmp_dir, "exact"), index="exact")
+        bloom = compact([self.path("big.csv")], os.path.join(self.tmp_dir, "bloom"), index="bloom", fp_rate=1e-6)
+        self.assertEqual((exact.unique_rows, exact.index), (40, "exact"))
+        self.assertEqual((bloom.unique_rows, bloom.index), (40, "bloom"))
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives_and_low_false_positives(self):
+        bloom = BloomFilter(1000, fp_rate=1e-3)
+        digests = [hashlib.blake2b(str(i).encode(), digest_size=16).digest() for i in range(2000)]
+        self.assertTrue(all(bloom.add(d) for d in digests[:1000]))
+        self.assertFalse(any(bloom.add(d) for d in digests[:1000]))
+        false_positives = sum(d in bloom for d in digests[1000:])
+        self.assertLess(false_positives, 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,23 +8,18 @@ import csv
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm')))
 
-from src.connector.game_bridge import GameBridge
 from spirecomm.spire.card import Card, CardType
 from spirecomm.spire.character import Intent
+from tests.protocol_harness import ProtocolHarness
 
 class TestDataCollection(unittest.TestCase):
     def setUp(self):
-        self.bridge = GameBridge(port=9998) # Use different port
-        self.bridge.collect_data = True
-        self.bridge.data_file = "tests/test_data.csv" # Use test file
-        self.bridge._init_data_collection()
+        # 采集文件、对局历史、标注文件都写在 harness 的临时目录，close() 时删除
+        self.harness = ProtocolHarness(collect_data=True)
+        self.bridge = self.harness.bridge
 
     def tearDown(self):
-        self.bridge.running = False
-        if self.bridge.server_socket:
-            self.bridge.server_socket.close()
-        if os.path.exists("tests/test_data.csv"):
-            os.remove("tests/test_data.csv")
+        self.harness.close()
 
     def test_record_decision(self):
         # Mock Game State
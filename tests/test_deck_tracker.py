@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+from math import comb
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.core.deck_tracker import DeckTracker, hypergeometric_at_least_one
+from spirecomm.spire.game import Game
+from spirecomm.spire.card import Card, CardType, CardRarity
+from spirecomm.spire.character import Player
+
+
+def make_card(card_id, card_type, uuid, cost=1):
+    return Card(card_id=card_id, name=card_id, card_type=card_type,
+                rarity=CardRarity.BASIC, cost=cost, uuid=uuid, is_playable=True)
+
+
+class TestDeckTracker(unittest.TestCase):
+    def setUp(self):
+        self.game = Game()
+        self.game.in_combat = True
+        self.game.player = Player(max_hp=80, current_hp=80, block=0, energy=3)
+        self.strikes = [make_card("Strike_R", CardType.ATTACK, f"s{i}") for i in range(5)]
+        self.defends = [make_card("Defend_R", CardType.SKILL, f"d{i}") for i in range(4)]
+        self.bash = make_card("Bash", CardType.ATTACK, "b0", cost=2)
+        self.game.draw_pile = self.strikes + self.defends + [self.bash]
+        self.game.discard_pile = []
+        self.tracker = DeckTracker()
+
+    def test_hypergeometric_matches_closed_form(self):
+        probs = hypergeometric_at_least_one(10, [5, 4, 1], 5)
+        for k, p in zip([5, 4, 1], probs):
+            expected = 1 - comb(10 - k, 5) / comb(10, 5)
+            self.assertAlmostEqual(p, expected)
+
+    def test_forecast_full_draw_pile(self):
+        self.tracker.update(self.game)
+        forecast = self.tracker.forecast()
+        self.assertAlmostEqual(forecast.draw_probs["Bash"], 0.5)
+        self.assertGreater(forecast.expected_damage, 0)
+        self.assertGreater(forecast.expected_block, 0)
+
+    def test_incremental_update_and_reshuffle(self):
+        self.tracker.update(self.game)
+        first = self.tracker.forecast()
+        # 无变化时直接复用缓存
+        self.tracker.update(self.game)
+        self.assertIs(self.tracker.forecast(), first)
+
+        # 抽走 8 张牌，只剩 2 张，下回合需要洗回弃牌堆
+        self.game.draw_pile = [self.strikes[0], self.bash]
+        self.game.discard_pile = self.strikes[1:] + self.defends
+        self.tracker.update(self.game)
+        self.assertEqual(self.tracker.draw_counts["Strike_R"], 1)
+        self.assertEqual(self.tracker.discard_counts["Defend_R"], 4)
+        forecast = self.tracker.forecast()
+        self.assertAlmostEqual(forecast.draw_probs["Bash"], 1.0)
+        self.assertAlmostEqual(forecast.draw_probs["Strike_R"], 1.0)
+        self.assertLess(forecast.draw_probs["Defend_R"], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
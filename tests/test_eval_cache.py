@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import multiprocessing
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.eval_cache import EvalCache, fingerprint
+
+
+def write_entries(args):
+    path, worker = args
+    cache = EvalCache(path)
+    for i in range(100):
+        cache.put("map_plan", "v1", fingerprint(worker, i), [worker, i])
+    # 读取其他进程写入的结果
+    seen = sum(cache.get("map_plan", "v1", fingerprint(0, i)) is not None for i in range(100))
+    cache.close()
+    return seen
+
+
+class TestEvalCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "eval_cache.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_fingerprint_is_canonical(self):
+        self.assertEqual(fingerprint({"b": 1, "a": [1, 2]}), fingerprint({"a": [1, 2], "b": 1}))
+        self.assertNotEqual(fingerprint("Strike", 0), fingerprint("Strike", 1))
+
+    def test_persists_across_sessions_with_version_check(self):
+        cache = EvalCache(self.path)
+        self.assertIsNone(cache.get("map_plan", "v1", "k"))
+        cache.put("map_plan", "v1", "k", [50, 70])
+        self.assertEqual(cache.get("map_plan", "v1", "k"), [50, 70])
+        cache.close()
+
+        cache = EvalCache(self.path)
+        self.assertEqual(cache.warm_load(), 1)
+        self.assertEqual(cache.get("map_plan", "v1", "k"), [50, 70])
+        self.assertEqual(cache.disk_hits, 0)
+        # 引擎版本变化后旧结果失效
+        self.assertIsNone(cache.get("map_plan", "v2", "k"))
+        cache.close()
+
+    def test_eviction_keeps_recently_used(self):
+        cache = EvalCache(self.path, max_entries=50, memory_entries=10, evict_every=1000)
+        for i in range(80):
+            cache.put("map_plan", "v1", str(i), i)
+        cache.get("map_plan", "v1", "0")  # 最早写入但最近被使用
+        self.assertEqual(cache.evict(), 35)
+        self.assertEqual(cache.count(), 45)
+        self.assertEqual(cache.get("map_plan", "v1", "0"), 0)
+        cache._memory.clear()
+        self.assertIsNone(cache.get("map_plan", "v1", "1"))
+        cache.close()
+
+    def test_concurrent_processes(self):
+        with multiprocessing.Pool(4) as pool:
+            pool.map(write_entries, [(self.path, w) for w in range(4)])
+        cache = EvalCache(self.path)
+        self.assertEqual(cache.count(), 400)
+        self.assertEqual(cache.get("map_plan", "v1", fingerprint(3, 99)), [3, 99])
+        cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+import csv
+import json
+import shutil
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.agents.policy_trainer import featurize_lines
+from src.agents.weight_tuner import load_corpus
+from src.core.action_labeler import LABEL_HEADER
+from src.core.export_decisions import export_decisions
+from tests.game_states import combat_message, map_message, monster_json, strike, defend, bash
+
+
+class TestExportDecisions(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.raw_path = os.path.join(self.tmp_dir, "raw.jsonl")
+        self.output_path = os.path.join(self.tmp_dir, "decisions.jsonl")
+        messages = [
+            combat_message(hand=[strike("s1"), bash("b1"), defend("d1")], monsters=[monster_json(hp=30)]),
+            {"error": "Invalid command", "ready_for_command": True},
+            combat_message(hand=[strike("s1"), defend("d1")], energy=1, monsters=[monster_json(hp=22)]),
+            combat_message(hand=[strike("s1"), defend("d1")], energy=1, monsters=[monster_json(hp=22)]),
+            combat_message(hand=[strike("s1")], energy=0, block=5, monsters=[monster_json(hp=22)]),
+            # 回合结束弃牌、离开战斗都不是出牌
+            combat_message(hand=[defend("d2")], turn=2, monsters=[monster_json(hp=22)]),
+            map_message(floor=2),
+            combat_message(hand=[strike("s3")], floor=3, monsters=[monster_json(hp=10)]),
+        ]
+        with open(self.raw_path, "w", encoding="utf-8") as f:
+            for message in messages:
+                f.write(json.dumps(message) + "\n")
+            f.write("not json\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def read_output(self):
+        with open(self.output_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_labels_previous_state_with_played_card(self):
+        stats = export_decisions([self.raw_path], self.output_path)
+        self.assertEqual((stats.messages, stats.plays, stats.exported), (7, 2, 2))
+        records = self.read_output()
+        self.assertEqual([r["label"] for r in records], ["b1", "d1"])
+        # 标注的是出牌前的状态
+        hand = [c["uuid"] for c in records[0]["game_state"]["combat_state"]["hand"]]
+        self.assertEqual(hand, ["s1", "b1", "d1"])
+
+        # 导出的语料可以直接交给调参和策略训练
+        self.assertEqual([label for _, _, label in load_corpus(self.output_path)], ["b1", "d1"])
+        with open(self.output_path, encoding="utf-8") as f:
+            features, ptr, labels = featurize_lines(f.readlines())
+        self.assertEqual(labels.tolist(), [1, 1])
+
+    def test_join_with_action_labels(self):
+        labels_path = os.path.join(self.tmp_dir, "action_labels.csv")
+        with open(labels_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(LABEL_HEADER)
+            writer.writerow(["1.0", 1, 1, "b1", "Bash", "b1", "Bash", 0, 2, 8, 1])
+            writer.writerow(["2.0", 1, 1, "s1", "Strike", "d1", "Defend", "", 1, 0, 0])
+        stats = export_decisions([self.raw_path], self.output_path, labels_path)
+        self.assertEqual((stats.plays, stats.exported), (2, 2))
+        stats = export_decisions([self.raw_path], self.output_path, labels_path, followed_only=True)
+        self.assertEqual(stats.exported, 1)
+        self.assertEqual([r["label"] for r in self.read_output()], ["b1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
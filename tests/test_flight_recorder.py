@@ -0,0 +1,109 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.utils.flight_recorder import FlightRecorder
+from tests.game_states import combat_message, strike, defend, monster_json
+from tests.protocol_harness import ProtocolHarness
+
+
+class Probe:
+    """记录被格式化的次数"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "probe"
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+class TestFlightRecorder(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "flight.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_ring_keeps_latest_events(self):
+        recorder = FlightRecorder(self.path, capacity=4)
+        for i in range(10):
+            recorder.record("event %d", i)
+        self.assertEqual(recorder.dump(reason="test"), 4)
+        lines = read_lines(self.path)
+        self.assertIn("4 events, 6 overwritten before dump", lines[0])
+        self.assertEqual([line.split(" - ")[1] for line in lines[1:]], ["event 6", "event 7", "event 8", "event 9"])
+
+        # 追加转储只写出新事件；按需快照写出缓冲区中的全部事件
+        self.assertEqual(recorder.dump(), 0)
+        recorder.record("event %d", 10)
+        self.assertEqual(recorder.dump(), 1)
+        self.assertEqual(recorder.dump(os.path.join(self.tmp_dir, "snapshot.log"), only_new=False), 4)
+
+    def test_formatting_is_lazy(self):
+        recorder = FlightRecorder(self.path)
+        probe = Probe()
+        recorder.record("value %s", probe)
+        self.assertEqual(probe.calls, 0)
+        recorder.dump()
+        self.assertEqual(probe.calls, 1)
+        self.assertTrue(read_lines(self.path)[1].endswith("value probe"))
+
+    def test_error_dumps_traceback_with_rate_limit(self):
+        recorder = FlightRecorder(self.path, error_dump_interval=60)
+        recorder.record("before")
+        try:
+            raise ValueError("boom")
+        except ValueError as e:
+            recorder.error("failed: %s", e, exc=e)
+        text = "\n".join(read_lines(self.path))
+        self.assertIn("before", text)
+        self.assertIn("failed: boom", text)
+        self.assertIn("Traceback", text)
+
+        # 间隔内的第二次错误不立即转储，留到下次转储
+        recorder.error("again")
+        self.assertNotIn("again", "\n".join(read_lines(self.path)))
+        self.assertEqual(recorder.dump(reason="shutdown"), 1)
+
+
+class TestBridgeFlightRecorder(unittest.TestCase):
+    def setUp(self):
+        self.harness = ProtocolHarness(auto_play=True)
+        self.bridge = self.harness.bridge
+        self.bridge.profiler.output_dir = self.harness.data_dir
+
+    def tearDown(self):
+        self.harness.close()
+
+    def test_hot_path_events_dumped_on_demand(self):
+        self.harness.feed(combat_message(hand=[strike("s1"), defend("d1")], monsters=[monster_json(hp=5)]))
+        self.assertFalse(os.path.exists(self.bridge.log_file))
+        reply = self.bridge.profiler.handle_command({"cmd": "flight_dump"})
+        self.assertTrue(reply["ok"])
+        text = "\n".join(read_lines(reply["output"]))
+        self.assertIn("Combat: 2 recommendations in", text)
+        self.assertIn("Auto-play: play", text)
+
+    def test_error_dumped_with_traceback(self):
+        self.bridge.rules_engine = None
+        self.harness.feed(combat_message(hand=[strike("s1")], monsters=[monster_json(hp=30)]))
+        text = "\n".join(read_lines(self.bridge.log_file))
+        self.assertIn("Error in recommendation/broadcast", text)
+        self.assertIn("Traceback", text)
+
+if __name__ == '__main__':
+    unittest.main()
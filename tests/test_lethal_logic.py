@@ -8,14 +8,16 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 # Add external/spirecomm to sys.path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
 
-from src.connector.game_bridge import GameBridge
 from spirecomm.spire.game import Game
 from spirecomm.spire.card import Card, CardType, CardRarity
 from spirecomm.spire.character import Player, Monster, Intent
+from tests.protocol_harness import ProtocolHarness
 
 class TestLethalLogic(unittest.TestCase):
     def setUp(self):
-        self.bridge = GameBridge()
+        # 数据文件指向临时目录：评分不受本机 data/ 下的策略模型、开局库、权重或规则文件影响
+        self.harness = ProtocolHarness()
+        self.bridge = self.harness.bridge
         self.bridge.game = Game()
         
         # Setup Player
@@ -70,6 +72,9 @@ class TestLethalLogic(unittest.TestCase):
         )
         self.bridge.game.hand = [self.strike1, self.strike2, self.defend]
 
+    def tearDown(self):
+        self.harness.close()
+
     def test_strike_should_outscore_defend_when_lethal(self):
         """
         Scenario: Monster has 11 HP and is attacking.
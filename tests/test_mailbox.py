@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import json
+import queue
+import shutil
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.connector.game_bridge import NullAction
+from src.core.mailbox import RawRecorder, StateMailbox
+from tests.game_states import combat_message, strike, defend, view
+from tests.protocol_harness import isolated_bridge
+
+
+def state(floor):
+    message = combat_message(hand=[strike("s1"), defend("d1")])
+    message["game_state"]["floor"] = floor
+    return json.dumps(message)
+
+
+ERROR = json.dumps({"error": "Invalid command", "ready_for_command": True})
+
+
+class TestStateMailbox(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.input_queue = queue.Queue()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_latest_state_wins(self):
+        mailbox = StateMailbox(self.input_queue)
+        self.assertIsNone(mailbox.get())
+        for floor in (1, 2, 3):
+            self.input_queue.put(state(floor))
+        self.assertEqual(json.loads(mailbox.get())["game_state"]["floor"], 3)
+        self.assertIsNone(mailbox.get())
+        self.assertEqual((mailbox.received, mailbox.superseded), (3, 2))
+
+    def test_errors_are_never_dropped(self):
+        mailbox = StateMailbox(self.input_queue)
+        for message in (state(1), ERROR, state(2), state(3)):
+            self.input_queue.put(message)
+        self.assertEqual(mailbox.get(), ERROR)
+        self.assertEqual(json.loads(mailbox.get())["game_state"]["floor"], 3)
+        self.assertEqual(mailbox.superseded, 2)
+
+    def test_superseded_states_still_recorded(self):
+        path = os.path.join(self.tmp_dir, "raw.jsonl")
+        recorder = RawRecorder(path)
+        mailbox = StateMailbox(self.input_queue, recorder)
+        for floor in (1, 2):
+            self.input_queue.put(state(floor) + "\n")
+        mailbox.get()
+        recorder.close()
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)["game_state"]["floor"] for line in f], [1, 2])
+
+    def test_cancelled_when_newer_message_waits(self):
+        mailbox = StateMailbox(self.input_queue)
+        self.input_queue.put(state(1))
+        mailbox.get()
+        self.assertFalse(mailbox.cancelled)
+        self.input_queue.put(state(2))
+        self.assertTrue(mailbox.cancelled)
+
+
+class TestBridgeCancellation(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.bridge = isolated_bridge(self.data_dir)
+        self.input_queue = queue.Queue()
+        self.bridge.cancel_token = StateMailbox(self.input_queue)
+        self.broadcasts = []
+        self.bridge._broadcast_state = lambda recommendation, status="In Game", cards=None: \
+            self.broadcasts.append(status)
+
+    def tearDown(self):
+        self.bridge.shutdown()
+        shutil.rmtree(self.data_dir)
+
+    def game(self, floor):
+        message = json.loads(state(floor))
+        return view(message)
+
+    def test_stale_state_is_not_broadcast(self):
+        self.bridge.get_next_action_in_game(self.game(1))
+        self.assertEqual(self.broadcasts, ["Combat"])
+
+        # 评估期间新状态已到达：旧状态不广播，也不发出动作
+        self.input_queue.put(state(2))
+        action = self.bridge.get_next_action_in_game(self.game(1))
+        self.assertIsInstance(action, NullAction)
+        self.assertEqual(self.broadcasts, ["Combat"])
+        self.assertEqual(self.bridge.cancelled_evaluations, 1)
+
+if __name__ == '__main__':
+    unittest.main()
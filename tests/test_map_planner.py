@@ -0,0 +1,157 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.agents.map_planner import MapPlanner
+from src.core.eval_cache import EvalCache
+from src.core.mailbox import EvaluationCancelled
+from spirecomm.spire.game import Game
+from spirecomm.spire.card import Card, CardType, CardRarity
+from spirecomm.spire.map import Map, Node
+from spirecomm.spire.screen import MapScreen
+
+
+def build_map(node_specs, edges):
+    """node_specs: [(x, y, symbol)], edges: [((x, y), (x, y))]"""
+    dungeon_map = Map()
+    for x, y, symbol in node_specs:
+        dungeon_map.add_node(Node(x, y, symbol))
+    for (px, py), (cx, cy) in edges:
+        parent = dungeon_map.get_node(px, py)
+        child = dungeon_map.get_node(cx, cy)
+        parent.children.append(child)
+        child.parents.append(parent)
+    return dungeon_map
+
+
+class TestMapPlanner(unittest.TestCase):
+    def setUp(self):
+        # 0,0 (M) -> 0,1 (E) -> 0,2 (M)
+        #         -> 1,1 (R) -> 0,2 (M)
+        self.game = Game()
+        self.game.act = 1
+        self.game.gold = 99
+        self.game.map = build_map(
+            [(0, 0, "M"), (0, 1, "E"), (1, 1, "R"), (0, 2, "M")],
+            [((0, 0), (0, 1)), ((0, 0), (1, 1)), ((0, 1), (0, 2)), ((1, 1), (0, 2))]
+        )
+        self.game.screen = MapScreen(
+            current_node=Node(0, 0, "M"),
+            next_nodes=[Node(0, 1, "E"), Node(1, 1, "R")],
+            boss_available=False
+        )
+        self.planner = MapPlanner()
+
+    def test_low_hp_prefers_rest(self):
+        self.game.current_hp = 15
+        self.game.max_hp = 80
+        ranked = self.planner.rank_next_nodes(self.game)
+        self.assertEqual(ranked[0][0].symbol, "R")
+
+    def test_full_hp_strong_deck_prefers_elite(self):
+        self.game.current_hp = 80
+        self.game.max_hp = 80
+        # 全部为升级过的稀有卡，卡组强度视为满值
+        self.game.deck = [
+            Card(card_id="Demon Form", name="Demon Form", card_type=CardType.POWER,
+                 rarity=CardRarity.RARE, upgrades=1, cost=3, uuid=f"demon_{i}")
+            for i in range(10)
+        ]
+        ranked = self.planner.rank_next_nodes(self.game)
+        self.assertEqual(ranked[0][0].symbol, "E")
+
+    def test_values_reused_while_advancing(self):
+        self.game.current_hp = 60
+        self.game.max_hp = 80
+        self.planner.rank_next_nodes(self.game)
+        self.planner.rank_next_nodes(self.game)
+        self.assertEqual(self.planner.full_computations, 1)
+        self.assertEqual(self.planner.partial_computations, 0)
+
+        # 血量分桶变化时只重算可达子图
+        self.game.current_hp = 20
+        self.planner.rank_next_nodes(self.game)
+        self.assertEqual(self.planner.full_computations, 1)
+        self.assertEqual(self.planner.partial_computations, 1)
+
+    def test_recommendations_for_overlay(self):
+        self.game.current_hp = 15
+        self.game.max_hp = 80
+        choices, recommendations = self.planner.get_recommendations(self.game)
+        self.assertEqual(len(choices), 2)
+        self.assertEqual(recommendations["1,1"], 100)
+        self.assertLess(recommendations["0,1"], 100)
+
+    def test_cancelled_computation_is_not_reused(self):
+        class CancelAfter:
+            def __init__(self, checks):
+                self.checks = checks
+
+            @property
+            def cancelled(self):
+                self.checks -= 1
+                return self.checks < 0
+
+        self.game.current_hp = 15
+        self.game.max_hp = 80
+        with self.assertRaises(EvaluationCancelled):
+            self.planner.rank_next_nodes(self.game, CancelAfter(1))
+        # 被取消的半成品不算有效结果：下次完整重算，结果与未取消时相同
+        ranked = self.planner.rank_next_nodes(self.game, CancelAfter(100))
+        self.assertEqual(self.planner.full_computations, 1)
+        self.assertEqual([(n.x, n.y, v) for n, v in ranked],
+                         [(n.x, n.y, v) for n, v in MapPlanner().rank_next_nodes(self.game)])
+
+    def test_plans_shared_through_eval_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            self.game.current_hp = 15
+            self.game.max_hp = 80
+            first = MapPlanner(cache=EvalCache(os.path.join(cache_dir, "cache.sqlite3")))
+            expected = first.rank_next_nodes(self.game)
+            first.cache.close()
+
+            # 新会话：同一张地图、同样的分桶直接读取缓存，不再计算
+            second = MapPlanner(cache=EvalCache(os.path.join(cache_dir, "cache.sqlite3")))
+            ranked = second.rank_next_nodes(self.game)
+            self.assertEqual(second.full_computations, 0)
+            self.assertEqual(second.cache_hits, 1)
+            self.assertEqual([(n.x, n.y, v) for n, v in ranked], [(n.x, n.y, v) for n, v in expected])
+            second.cache.close()
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_repeated_map_states_skip_the_cache(self):
+        # 同一张地图、同样分桶的后续 MAP 状态只比较进程内的地图键，不计算指纹也不读缓存
+        class CountingCache:
+            def __init__(self):
+                self.gets = self.puts = 0
+
+            def get(self, namespace, version, key):
+                self.gets += 1
+                return None
+
+            def put(self, namespace, version, key, value):
+                self.puts += 1
+
+        self.game.current_hp = 15
+        self.game.max_hp = 80
+        planner = MapPlanner(cache=CountingCache())
+        for _ in range(5):
+            planner.rank_next_nodes(self.game)
+        self.assertEqual((planner.cache.gets, planner.cache.puts, planner.full_computations), (1, 1, 1))
+        fingerprint = planner._fingerprint
+        self.game.current_hp = 80  # 分桶变化：查一次缓存，地图指纹复用
+        planner.rank_next_nodes(self.game)
+        self.assertEqual(planner.cache.gets, 2)
+        self.assertIs(planner._fingerprint, fingerprint)
+
+if __name__ == '__main__':
+    unittest.main()
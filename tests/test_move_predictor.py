@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.agents.move_predictor import MovePredictor
+from spirecomm.spire.character import Monster, Intent
+
+
+def make_monster(monster_id, move_id, intent, damage=0, base_damage=None):
+    return Monster(
+        name=monster_id, monster_id=monster_id, max_hp=50, current_hp=50, block=0,
+        intent=intent, half_dead=False, is_gone=False, move_id=move_id,
+        move_base_damage=damage if base_damage is None else base_damage,
+        move_adjusted_damage=damage, move_hits=1
+    )
+
+
+class TestMovePredictor(unittest.TestCase):
+    def setUp(self):
+        self.predictor = MovePredictor.default()
+
+    def test_cultist_attacks_after_incantation(self):
+        cultist = make_monster("Cultist", 3, Intent.BUFF)
+        self.assertEqual(self.predictor.expected_damage(cultist, 0), 0)
+        self.assertAlmostEqual(self.predictor.expected_damage(cultist, 1), 6)
+        self.assertEqual(self.predictor.expected_incoming([cultist], turns=3), [0, 6, 6])
+
+    def test_jaw_worm_markov_expectation(self):
+        jaw_worm = make_monster("JawWorm", 1, Intent.ATTACK, damage=11)
+        # Chomp 之后: 40% Thrash (7), 60% Bellow (0)
+        self.assertAlmostEqual(self.predictor.expected_damage(jaw_worm, 1), 0.4 * 7)
+
+    def test_strength_scales_future_damage(self):
+        cultist = make_monster("Cultist", 1, Intent.ATTACK, damage=9, base_damage=6)
+        self.assertAlmostEqual(self.predictor.expected_damage(cultist, 1), 9)
+
+    def test_unknown_monster_keeps_current_intent(self):
+        slime = make_monster("AcidSlime_M", 1, Intent.ATTACK, damage=7)
+        self.assertEqual(self.predictor.expected_damage(slime, 2), 7)
+
+    def test_fit_and_round_trip(self):
+        states = []
+        # 录制对局：某怪物 (1 点力量) 每回合都重复行动 5，基础伤害 3 x 2
+        for turn in range(1, 6):
+            states.append({"game_state": {"floor": 2, "combat_state": {"turn": turn, "monsters": [
+                {"id": "Mystery", "move_id": 5, "last_move_id": 5 if turn > 1 else None,
+                 "move_base_damage": 3, "move_adjusted_damage": 4, "move_hits": 2}
+            ]}}})
+        with tempfile.TemporaryDirectory() as tmp:
+            session = os.path.join(tmp, "session.jsonl")
+            with open(session, "w", encoding="utf-8") as f:
+                for state in states:
+                    f.write(json.dumps(state) + "\n")
+                    f.write(json.dumps(state) + "\n")  # 同一回合重复发送的状态只计一次
+            self.predictor.fit_sessions([session])
+            table_file = os.path.join(tmp, "moves.json")
+            self.predictor.save(table_file)
+            loaded = MovePredictor.load(table_file)
+
+        self.assertEqual(loaded.tables["Mystery"]["transitions"][5], {5: 4})
+        # 学到的是基础伤害，力量只在预测时按当前意图缩放一次
+        self.assertEqual(loaded.tables["Mystery"]["damage"][5], 6)
+        mystery = make_monster("Mystery", 5, Intent.ATTACK, damage=4, base_damage=3)
+        mystery.move_hits = 2
+        self.assertAlmostEqual(loaded.expected_damage(mystery, 1), 8)
+
+    def test_corrupt_table_file_falls_back_to_defaults(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            table_file = os.path.join(tmp, "moves.json")
+            for content in ("{not json", json.dumps({"Cultist": {"damage": {"x": 1}, "transitions": {}}}), "[]"):
+                with open(table_file, "w", encoding="utf-8") as f:
+                    f.write(content)
+                loaded = MovePredictor.load(table_file)
+                self.assertEqual(loaded.tables, MovePredictor.default().tables)
+
+if __name__ == '__main__':
+    unittest.main()
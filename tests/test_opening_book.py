@@ -0,0 +1,90 @@
+import unittest
+import sys
+import os
+import random
+import shutil
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.agents.opening_book import (
+    BOOK_SHAPE, HANDS, HP_CAP, NEED_CAP, OpeningBook, build_book, position_scores,
+)
+from tests.game_states import combat_message, monster_json, card_json, strike, defend, bash, view
+
+
+def starter_hand(counts):
+    makers = (strike, defend, bash)
+    return [makers[t](f"c{t}_{i}") for t, n in enumerate(counts) for i in range(n)]
+
+
+class TestOpeningBook(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.tmp_dir, "opening_book.npz")
+        OpeningBook(build_book()).save(cls.path)
+        cls.book = OpeningBook.load(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def test_lookup_matches_solver(self):
+        rng = random.Random(4)
+        for _ in range(300):
+            hand = rng.choice(HANDS)
+            energy = rng.randint(0, 3)
+            hp = rng.randint(1, 60)
+            damage = rng.randint(0, 25)
+            block = rng.choice([0, 0, 5])
+            vulnerable = rng.random() < 0.3
+            powers = [{"id": "Vulnerable", "name": "Vulnerable", "amount": 2}] if vulnerable else []
+            monster = monster_json(hp=hp, max_hp=60, damage=damage, intent="ATTACK" if damage else "BUFF",
+                                   powers=powers)
+            game = view(combat_message(hand=starter_hand(hand), monsters=[monster], energy=energy, block=block))
+
+            need = min(NEED_CAP, max(0, damage - block))
+            expected = position_scores(hand, energy, min(hp, HP_CAP), need, vulnerable)
+            scores = self.book.lookup(game)
+            for card in game.hand:
+                index = ("Strike_R", "Defend_R", "Bash").index(card.card_id)
+                self.assertEqual(scores[card.uuid], 0 if expected[index] == 255 else expected[index])
+
+    def test_lethal_and_defensive_lines(self):
+        # 怪物剩 6 血：打击斩杀
+        game = view(combat_message(hand=starter_hand((1, 1, 0)), monsters=[monster_json(hp=6, damage=20)]))
+        self.assertEqual(self.book.lookup(game)["c0_0"], 100)
+        self.assertLess(self.book.lookup(game)["c1_0"], 100)
+        # 打不死且受到大量伤害，能量只够一张：防御
+        game = view(combat_message(hand=starter_hand((1, 1, 0)), monsters=[monster_json(hp=40, damage=12)], energy=1))
+        scores = self.book.lookup(game)
+        self.assertGreater(scores["c1_0"], scores["c0_0"])
+        # 没有伤害：先痛击 (易伤提升后续打击)
+        game = view(combat_message(hand=starter_hand((2, 2, 1)), monsters=[monster_json(hp=40, intent="BUFF")]))
+        scores = self.book.lookup(game)
+        self.assertEqual(scores["c2_0"], 100)
+
+    def test_positions_outside_book(self):
+        other = card_json("Inflame", "POWER", "p1")
+        outside = [
+            combat_message(hand=[strike("s1"), other]),
+            combat_message(hand=[strike("s1")], monsters=[monster_json(), monster_json()]),
+            combat_message(hand=[strike("s1")], monsters=[monster_json(
+                powers=[{"id": "Curl Up", "name": "Curl Up", "amount": 4}])]),
+            combat_message(hand=[strike("s1")], energy=4),
+            combat_message(hand=[strike("s1")], player_powers=[{"id": "Weakened", "name": "Weak", "amount": 1}]),
+        ]
+        for message in outside:
+            self.assertIsNone(self.book.lookup(view(message)))
+        self.assertEqual(self.book.misses, len(outside))
+
+    def test_stale_book_ignored(self):
+        self.assertEqual(self.book.scores.shape, BOOK_SHAPE)
+        self.assertIsNone(OpeningBook.load(os.path.join(self.tmp_dir, "missing.npz")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import json
+import random
+import shutil
+import tempfile
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.agents.heuristic import score_hand
+from src.agents.policy_model import PolicyModel, NUM_FEATURES, group_softmax
+from src.agents.policy_trainer import featurize_lines, featurized_chunks, shuffle_groups, train
+from tests.game_states import random_combat_message, combat_message, strike, defend, bash, view
+
+
+def write_corpus(path, count, seed=0):
+    """以启发式的最佳出牌作为标签生成语料"""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        written = 0
+        while written < count:
+            message = random_combat_message(rng)
+            game = view(message)
+            scores = score_hand(game)
+            if not scores or max(scores.values()) <= 0:
+                continue
+            message["label"] = max(scores, key=scores.get)
+            f.write(json.dumps(message) + "\n")
+            written += 1
+
+
+class TestFeaturize(unittest.TestCase):
+    def test_groups_and_labels(self):
+        first = combat_message(hand=[strike("s1"), bash("b1")])
+        first["label"] = "b1"
+        second = combat_message(hand=[defend("d1"), strike("s2"), strike("s3")])
+        second["label"] = "Strike_R"  # card_id 标签匹配第一张打击
+        unlabeled = combat_message(hand=[strike("s4")])
+        unlabeled["label"] = "missing"
+        lines = [json.dumps(m) for m in (first, second, unlabeled)] + ["not json"]
+
+        features, ptr, labels = featurize_lines(lines)
+        self.assertEqual(features.shape, (5, NUM_FEATURES))
+        self.assertEqual(ptr.tolist(), [0, 2, 5])
+        self.assertEqual(labels.tolist(), [1, 1])
+
+    def test_shuffle_keeps_hands_intact(self):
+        features = np.arange(6, dtype=np.float32)[:, None].repeat(NUM_FEATURES, axis=1)
+        ptr = np.array([0, 1, 4, 6])
+        labels = np.array([0, 2, 1])
+        shuffled, new_ptr, new_labels = shuffle_groups(features, ptr, labels, np.random.default_rng(3))
+        hands = {tuple(shuffled[new_ptr[g]:new_ptr[g + 1], 0]): new_labels[g] for g in range(3)}
+        self.assertEqual(hands, {(0.0,): 0, (1.0, 2.0, 3.0): 2, (4.0, 5.0): 1})
+
+    def test_group_softmax(self):
+        probs = group_softmax(np.array([0.0, 0.0, 1.0, 1.0, 1.0]), np.array([0, 2, 5]))
+        np.testing.assert_allclose(probs, [0.5, 0.5, 1 / 3, 1 / 3, 1 / 3])
+
+
+class TestTraining(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.corpus = os.path.join(self.tmp_dir, "decisions.jsonl")
+        write_corpus(self.corpus, 600)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_prefetching_workers_match_serial(self):
+        serial = list(featurized_chunks([self.corpus], chunk_lines=100, workers=1))
+        parallel = list(featurized_chunks([self.corpus], chunk_lines=100, workers=2, prefetch=2))
+        self.assertEqual(len(serial), 6)
+        for (f1, p1, l1), (f2, p2, l2) in zip(serial, parallel):
+            np.testing.assert_array_equal(f1, f2)
+            np.testing.assert_array_equal(p1, p2)
+            np.testing.assert_array_equal(l1, l2)
+
+    def test_learns_heuristic_policy_and_exports(self):
+        model, stats = train([self.corpus], epochs=8, chunk_lines=100, batch_size=64,
+                             lr=0.02, validation_every=3)
+        self.assertLess(stats[-1]["train_loss"], stats[0]["train_loss"])
+        self.assertGreater(stats[-1]["val_accuracy"], 0.6)
+        self.assertGreater(stats[-1]["samples_per_sec"], 0)
+
+        path = os.path.join(self.tmp_dir, "policy_model.npz")
+        model.save(path, epochs=8)
+        loaded = PolicyModel.load(path)
+        message = combat_message(hand=[strike("s1"), defend("d1"), bash("b1")], energy=1)
+        scores = loaded.score_hand(view(message))
+        self.assertEqual(set(scores), {"s1", "d1", "b1"})
+        self.assertEqual(scores["b1"], 0)  # 能量不足
+        self.assertEqual(max(scores.values()), 100)
+
+    def test_missing_model_file(self):
+        self.assertIsNone(PolicyModel.load(os.path.join(self.tmp_dir, "none.npz")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import threading
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.profiler import ProfilerControl
+
+
+def busy_scoring_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.stop = threading.Event()
+        self.worker = threading.Thread(target=busy_scoring_loop, args=(self.stop,), daemon=True)
+        self.worker.start()
+        self.control = ProfilerControl(self.output_dir, thread_id=self.worker.ident)
+
+    def tearDown(self):
+        self.stop.set()
+        self.worker.join()
+        self.control.memory.stop()
+        shutil.rmtree(self.output_dir)
+
+    def test_profile_writes_collapsed_stacks_of_target_thread(self):
+        reply = self.control.handle_command({"cmd": "profile", "seconds": 0.2, "interval_ms": 1})
+        self.assertTrue(reply["ok"])
+        # 同一时间只允许一次采样
+        self.assertFalse(self.control.handle_command({"cmd": "profile"})["ok"])
+        self.control.cpu._thread.join()
+
+        with open(reply["output"], encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertIn("test_profiler.py:busy_scoring_loop", stack)
+        self.assertGreater(int(count), 0)
+
+    def test_memory_snapshot_diff(self):
+        first = self.control.handle_command({"cmd": "mem_snapshot"})
+        self.assertTrue(first["ok"])
+        self.assertTrue(self.control.memory.tracing)
+        retained = [bytearray(1024) for _ in range(200)]
+        second = self.control.handle_command({"cmd": "mem_snapshot", "top": 5})
+        with open(second["output"], encoding="utf-8") as f:
+            report = f.read()
+        self.assertIn("growth since previous snapshot", report)
+        self.assertIn("test_profiler.py", report)
+        del retained
+
+        self.control.handle_command({"cmd": "mem_stop"})
+        self.assertFalse(self.control.memory.tracing)
+
+    def test_unknown_command(self):
+        self.assertFalse(self.control.handle_command({"cmd": "explode"})["ok"])
+        for command in ([], "profile", 1, None):
+            self.assertEqual(self.control.handle_command(command), {"ok": False, "error": "expected a JSON object"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+import csv
+import random
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from tests.game_states import combat_message, random_turn_session, strike, defend, monster_json
+from tests.protocol_harness import ProtocolHarness
+
+
+class TestProtocolScenarios(unittest.TestCase):
+    def setUp(self):
+        self.harness = ProtocolHarness(auto_play=True)
+
+    def tearDown(self):
+        self.harness.close()
+
+    def assert_valid_command(self, command, message):
+        combat = message["game_state"]["combat_state"]
+        if command == "end":
+            return
+        parts = command.split()
+        self.assertEqual(parts[0], "play")
+        card = combat["hand"][int(parts[1]) - 1]
+        self.assertLessEqual(card["cost"], combat["player"]["energy"])
+        if len(parts) > 2:
+            monster = combat["monsters"][int(parts[2])]
+            self.assertFalse(monster["is_gone"] or monster["half_dead"])
+
+    def test_autopilot_commands_are_legal_in_random_sessions(self):
+        rng = random.Random(17)
+        fed = 0
+        for _ in range(200):
+            for message in random_turn_session(rng):
+                fed += 1
+                for command in self.harness.feed(message):
+                    self.assert_valid_command(command, message)
+        # 每条状态最多发出一条指令，且都广播给了 UI
+        self.assertLessEqual(len(self.harness.sent), fed)
+        self.assertGreater(len(self.harness.sent), fed // 2)
+        self.assertEqual(len(self.harness.broadcasts), fed)
+
+    def test_burst_is_coalesced_to_latest_state(self):
+        messages = [combat_message(hand=[strike("s1"), defend("d1")], monsters=[monster_json(hp=hp)])
+                    for hp in (30, 20, 5)]
+        self.assertEqual(self.harness.feed_burst(messages), ["play 1 0"])
+        self.assertEqual(self.harness.coordinator.mailbox.superseded, 2)
+        self.assertEqual([m["hp"] for m in self.harness.last_broadcast["monsters"]], [5])
+
+    def test_not_ready_action_waits_for_next_state(self):
+        self.assertEqual(self.harness.feed(combat_message(
+            hand=[strike("s1")], monsters=[monster_json(hp=5)], ready=False)), [])
+        self.assertEqual(len(self.harness.coordinator.action_queue), 1)
+        # 下一条 ready 状态到达：先执行排队的动作
+        self.assertEqual(self.harness.feed(combat_message(
+            hand=[strike("s1")], monsters=[monster_json(hp=5)])), ["play 1 0"])
+
+
+class TestVirtualClock(unittest.TestCase):
+    def test_decision_timestamps_follow_virtual_clock(self):
+        with ProtocolHarness(collect_data=True) as harness:
+            start = harness.clock.time()
+            harness.feed(combat_message(hand=[strike("s1"), defend("d1")], monsters=[monster_json(hp=30)]))
+            harness.clock.advance(90)
+            harness.feed(combat_message(hand=[strike("s1")], monsters=[monster_json(hp=24)], energy=2))
+            with open(harness.bridge.data_file, encoding="utf-8") as f:
+                timestamps = [float(row["timestamp"]) for row in csv.DictReader(f)]
+        self.assertEqual(timestamps, [start, start + 90])
+
+if __name__ == '__main__':
+    unittest.main()
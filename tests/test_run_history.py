@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.core.run_history import RunHistory, RunRecorder
+from src.core.run_analytics import RunAnalytics, rebuild
+from tests.game_states import combat_message, map_message, game_over_message, view
+
+
+class TestRunHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "run_history.sqlite3")
+        self.history = RunHistory(self.path)
+        self.recorder = RunRecorder(self.history)
+
+    def tearDown(self):
+        self.history.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def observe(self, message, seed):
+        message["game_state"]["seed"] = seed
+        game = view(message)
+        self.recorder.observe(game)
+        return game
+
+    def play_losing_run(self, seed=123456789):
+        # 第 1 层战斗 (2 回合) → 地图 → 第 3 层战斗中阵亡
+        for turn in (1, 2):
+            game = self.observe(combat_message(turn=turn, hp=70), seed)
+            self.recorder.record_decision(game, 6, "s1", "Strike", 60)
+        self.observe(map_message(floor=1, hp=70), seed)
+        self.observe(combat_message(floor=3, hp=10), seed)
+        self.observe(game_over_message(floor=3), seed)
+
+    def test_transitions_recorded(self):
+        self.play_losing_run()
+        conn = self.history.conn
+        self.assertEqual(conn.execute("SELECT final_floor, victory FROM runs").fetchall(), [(3, 0)])
+        combats = conn.execute("SELECT floor, turns, won FROM combats ORDER BY combat_id").fetchall()
+        self.assertEqual(combats, [(1, 2, 1), (3, 1, 0)])
+        decisions = conn.execute("SELECT combat_id, turn, recommended_card FROM decisions").fetchall()
+        self.assertEqual(decisions, [(1, 1, "Strike"), (1, 2, "Strike")])
+
+    def test_aggregates_updated_per_run(self):
+        self.play_losing_run()
+        self.play_losing_run(seed=987654321)  # 新种子：开始新的一局
+
+        analytics = RunAnalytics(self.path)
+        self.assertEqual(analytics.death_floors(), [(3, 2)])
+        character, runs, victories, deaths, avg_floor = analytics.run_summary()[0]
+        self.assertEqual((character, runs, victories, deaths, avg_floor), ("IRONCLAD", 2, 0, 2, 3.0))
+        self.assertEqual(analytics.recommendation_agreement(), (4, 0, 0, 0.0))
+        floor_1 = analytics.floor_stats()[0]
+        self.assertEqual(floor_1[:3], (1, 2, 1.0))
+
+        # 从明细重建得到同样的结果，重复合并不会重复计数
+        self.assertEqual(rebuild(analytics.conn), 2)
+        self.assertEqual(analytics.death_floors(), [(3, 2)])
+        analytics.close()
+
+    def test_repeated_game_over_counted_once(self):
+        # GAME_OVER 界面在玩家离开前会重复发送
+        self.observe(combat_message(hp=5), 1)
+        for _ in range(3):
+            self.observe(game_over_message(floor=1), 1)
+        self.assertEqual(self.history.conn.execute("SELECT COUNT(*) FROM runs").fetchone(), (1,))
+        analytics = RunAnalytics(self.path)
+        self.assertEqual(analytics.run_summary()[0][1:4], (1, 0, 1))
+        analytics.close()
+
+        # 同一种子的其他状态也不会开始新的一局，新种子才会
+        self.observe(map_message(), 1)
+        self.assertIsNone(self.recorder.run_id)
+        self.observe(combat_message(), 2)
+        self.assertIsNotNone(self.recorder.run_id)
+
+    def test_same_seed_after_menu_is_a_new_run(self):
+        # GAME_OVER → 主菜单 (Bridge 调用 finish()) → 用同一种子重开
+        self.play_losing_run()
+        self.recorder.finish()
+        self.play_losing_run()
+        self.assertEqual(self.history.conn.execute("SELECT COUNT(*) FROM runs").fetchone(), (2,))
+        self.assertIsNone(self.recorder.run_id)
+        self.observe(combat_message(), 123456789)
+        self.assertIsNone(self.recorder.run_id)  # 仍在 GAME_OVER 之后，未回到主菜单
+
+    def test_abandoned_run_is_not_a_death(self):
+        self.recorder.observe(view(combat_message(hp=50)))
+        self.recorder.finish()
+        self.assertEqual(self.history.conn.execute("SELECT victory FROM runs").fetchone(), (None,))
+        analytics = RunAnalytics(self.path)
+        self.assertEqual(analytics.death_floors(), [])
+        analytics.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+import json
+import random
+import shutil
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.agents.heuristic import DEFAULT_WEIGHTS, score_hand
+from src.agents.move_predictor import MovePredictor
+from src.agents.scoring_rules import CompiledRules, DEFAULT_RULES, RuleError, RulesEngine
+from src.core.deck_tracker import DeckTracker
+from src.core.state_view import LazyGameState
+from tests.game_states import random_combat_message, combat_message, monster_json, strike, defend
+
+
+def random_games(seed, count):
+    rng = random.Random(seed)
+    return [LazyGameState(m["game_state"], m["available_commands"])
+            for m in (random_combat_message(rng) for _ in range(count))]
+
+
+class TestCompiledRules(unittest.TestCase):
+    def test_parity_with_branch_chain(self):
+        rules = CompiledRules(DEFAULT_RULES)
+        for game in random_games(seed=3, count=500):
+            self.assertEqual(rules.score_hand(game), score_hand(game))
+
+    def test_parity_with_race_and_custom_weights(self):
+        weights = dict(DEFAULT_WEIGHTS, combo_lethal=35, defend_danger=45, race_attack=25)
+        rules = CompiledRules(DEFAULT_RULES, weights)
+        predictor = MovePredictor.default()
+        for game in random_games(seed=5, count=500):
+            tracker = DeckTracker()
+            tracker.update(game)
+            forecast = tracker.forecast()
+            self.assertEqual(rules.score_hand(game, forecast, predictor),
+                             score_hand(game, weights, forecast, predictor))
+
+    def test_invalid_rules_rejected(self):
+        with self.assertRaises(RuleError):
+            CompiledRules({"rules": [{"name": "x", "when": {"no_such_feature": True}, "add": 5}]})
+        with self.assertRaises(RuleError):
+            CompiledRules({"rules": [{"name": "x", "add": "no_such_weight"}]})
+        # 结构错误同样报 RuleError
+        for spec in ([], {"rules": {}}, {"rules": ["x"]}, {"rules": [{"card": "ATTACK", "add": 1}]},
+                     {"rules": [{"when": ["attacked"], "add": 1}]}, {"rules": [], "tags": {"t": "x"}}):
+            with self.assertRaises(RuleError, msg=spec):
+                CompiledRules(spec)
+
+
+class TestHotReload(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "scoring_rules.json")
+        self.game = LazyGameState(*(lambda m: (m["game_state"], m["available_commands"]))(
+            combat_message(hand=[strike("s1"), defend("d1")], monsters=[monster_json(hp=40, intent="BUFF")])))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_rules(self, rules, mtime):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(rules, f)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_reload_on_change_and_keep_old_on_error(self):
+        engine = RulesEngine(self.path, check_interval=0)
+        self.assertEqual(engine.score_hand(self.game), {"s1": 60, "d1": 0})
+
+        self.write_rules({"rules": [{"name": "attack", "card": {"type": "ATTACK"}, "add": 30}]}, 1000)
+        self.assertEqual(engine.score_hand(self.game), {"s1": 80, "d1": 50})
+
+        # 写坏的规则文件：继续使用上一版规则
+        self.write_rules({"rules": [{"name": "broken", "when": {"typo": True}, "add": 1}]}, 2000)
+        self.assertEqual(engine.score_hand(self.game), {"s1": 80, "d1": 50})
+
+        # 结构错误的规则文件：同样保留上一版规则，且不会每次检查都重新编译
+        for mtime, broken in enumerate(([{"name": "list"}], {"rules": [{"card": "ATTACK", "add": 1}]},
+                                        {"rules": [{"when": ["attacked"], "add": 1}]}), start=3000):
+            self.write_rules(broken, mtime)
+            self.assertEqual(engine.score_hand(self.game), {"s1": 80, "d1": 50})
+            reloads = engine.reloads
+            self.assertFalse(engine.maybe_reload())
+            self.assertEqual(engine.reloads, reloads)
+
+        # 删除规则文件：恢复默认规则
+        os.remove(self.path)
+        self.assertEqual(engine.score_hand(self.game), {"s1": 60, "d1": 0})
+
+if __name__ == '__main__':
+    unittest.main()
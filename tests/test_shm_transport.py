@@ -0,0 +1,41 @@
+import unittest
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.connector.shm_transport import SharedStateWriter, SharedStateReader
+
+
+class TestSharedMemoryTransport(unittest.TestCase):
+    def setUp(self):
+        self.name = f"spire_ai_test_{os.getpid()}"
+        self.writer = SharedStateWriter(self.name, size=4096)
+        self.reader = SharedStateReader(self.name)
+
+    def tearDown(self):
+        self.reader.close()
+        if self.writer.buf is not None:
+            self.writer.close()
+
+    def test_latest_snapshot_wins(self):
+        self.assertIsNone(self.reader.read_latest())
+        self.writer.write(b'{"status": "Combat"}')
+        self.writer.write(b'{"status": "Map Select"}')
+        self.assertEqual(self.reader.read_latest(), b'{"status": "Map Select"}')
+        # 没有新数据时不重复返回
+        self.assertIsNone(self.reader.read_latest())
+
+    def test_oversized_snapshot_rejected(self):
+        self.assertFalse(self.writer.write(b"x" * 5000))
+        self.assertIsNone(self.reader.read_latest())
+
+    def test_close_signals_reader(self):
+        self.writer.write(b"{}")
+        self.writer.close()
+        self.assertIsNone(self.reader.read_latest())
+        self.assertTrue(self.reader.closed)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add project root and external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.utils.startup import parse_import_times, format_report
+from tests.protocol_harness import isolated_bridge
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 | _io
+import time:       300 |        900 |   numpy.core
+import time:      1500 |      96000 | numpy
+import time:       800 |       2000 | src.connector.coordinator
+"""
+
+
+class TestStartup(unittest.TestCase):
+    def test_parse_import_times(self):
+        rows = parse_import_times(IMPORTTIME_OUTPUT)
+        self.assertEqual([r.module for r in rows], ["_io", "numpy.core", "numpy", "src.connector.coordinator"])
+        self.assertEqual(rows[1].depth, 1)
+        self.assertEqual(rows[2].cumulative_us, 96000)
+
+        report = format_report(rows, top=2)
+        self.assertIn("numpy", report.splitlines()[1])
+        self.assertIn("total import time: 98.1 ms", report)
+
+    def test_deferred_bridge_initializes_on_demand(self):
+        data_dir = tempfile.mkdtemp()
+        bridge = isolated_bridge(data_dir, collect_data=True, initialize=False)
+        try:
+            self.assertFalse(bridge.initialized)
+            self.assertFalse(hasattr(bridge, "deck_tracker"))
+            bridge.ensure_initialized()
+            self.assertTrue(bridge.initialized)
+            self.assertIsNotNone(bridge.move_predictor)
+        finally:
+            bridge.shutdown()
+            shutil.rmtree(data_dir)
+
+if __name__ == '__main__':
+    unittest.main()
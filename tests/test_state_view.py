@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+import random
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.agents.heuristic import score_hand
+from src.core.state_view import LazyGameState
+from spirecomm.spire.game import Game
+from spirecomm.spire.screen import ScreenType
+from tests.game_states import (
+    combat_message, map_message, card_reward_message, combat_reward_message, random_combat_message,
+)
+
+
+def both(message):
+    game = Game.from_json(message["game_state"], message["available_commands"])
+    view = LazyGameState(message["game_state"], message["available_commands"])
+    return game, view
+
+
+class TestLazyGameState(unittest.TestCase):
+    def test_sub_objects_built_on_access(self):
+        _, view = both(combat_message())
+        self.assertEqual(view.floor, 1)
+        self.assertTrue(view.in_combat)
+        self.assertNotIn("hand", view.__dict__)
+        self.assertNotIn("map", view.__dict__)
+
+        hand = view.hand
+        self.assertIn("hand", view.__dict__)
+        self.assertIs(view.hand, hand)  # 缓存
+
+    def test_combat_fields_match_game(self):
+        game, view = both(combat_message())
+        self.assertEqual(view.player.energy, game.player.energy)
+        self.assertEqual([c.uuid for c in view.hand], [c.uuid for c in game.hand])
+        self.assertEqual([m.monster_index for m in view.monsters], [m.monster_index for m in game.monsters])
+        self.assertEqual(view.play_available, game.play_available)
+        self.assertEqual(view.screen_type, game.screen_type)
+
+    def test_scores_match_game(self):
+        rng = random.Random(3)
+        for _ in range(100):
+            game, view = both(random_combat_message(rng))
+            self.assertEqual(score_hand(view), score_hand(game))
+
+    def test_map_and_reward_screens(self):
+        game, view = both(map_message())
+        self.assertEqual(view.screen_type, ScreenType.MAP)
+        self.assertFalse(view.in_combat)
+        self.assertEqual(view.hand, [])
+        self.assertEqual([(n.x, n.y) for n in view.screen.next_nodes], [(n.x, n.y) for n in game.screen.next_nodes])
+        self.assertEqual(sorted(view.map.nodes), sorted(game.map.nodes))
+
+        game, view = both(card_reward_message())
+        self.assertEqual([c.card_id for c in view.screen.cards], [c.card_id for c in game.screen.cards])
+
+    def test_potion_helpers_match_game(self):
+        # SimpleAgent 在战斗奖励和战斗中调用这两个方法
+        for potions in (["Potion Slot"] * 3, ["Fire Potion", "Potion Slot", "Block Potion"], ["Fire Potion"] * 3):
+            game, view = both(combat_reward_message(potions=potions))
+            self.assertEqual(view.are_potions_full(), game.are_potions_full())
+            self.assertEqual([p.potion_id for p in view.get_real_potions()],
+                             [p.potion_id for p in game.get_real_potions()])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from spirecomm.spire.card import Card, CardType, CardRarity
+from spirecomm.spire.screen import RestOption, ScreenType
+from spirecomm.communication.action import (
+    EventOptionAction, BuyCardAction, CancelAction, CardSelectAction,
+)
+
+from src.agents import autopilot
+from src.agents.value_tables import (
+    DEFAULT_TABLES, ScreenAdvisor, TableError, ValueTables, compile_tables, load_spec,
+)
+from tests.game_states import (
+    card_json, shop_message, event_message, rest_message, STARTER_DECK, view,
+)
+from tests.protocol_harness import ProtocolHarness
+
+
+def card(card_id, uuid, upgrades=0, card_type=CardType.ATTACK, rarity=CardRarity.COMMON):
+    return Card(card_id, card_id, card_type, rarity, upgrades=upgrades, uuid=uuid)
+
+
+class TestValueTables(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_compiled_rows_per_act_and_round_trip(self):
+        tables = ValueTables.from_spec()
+        strike_card = card("Strike_R", "s", rarity=CardRarity.BASIC)
+        # 初始牌越往后价值越低，防御类在后期更高
+        self.assertGreater(tables.card_value(strike_card, 0), tables.card_value(strike_card, 2))
+        shrug = card("Shrug It Off", "x", card_type=CardType.SKILL)
+        self.assertLess(tables.card_value(shrug, 0), tables.card_value(shrug, 2))
+        # 表外的牌按稀有度，诅咒为负
+        self.assertAlmostEqual(tables.card_value(card("Unknown", "u", rarity=CardRarity.RARE), 1), 5.5, places=5)
+        self.assertLess(tables.card_value(card("Regret", "c", card_type=CardType.CURSE, rarity=CardRarity.CURSE), 0), 0)
+
+        path = os.path.join(self.tmp_dir, "value_tables.npz")
+        tables.save(path)
+        loaded = ValueTables.load(path)
+        for key, array in tables.arrays.items():
+            self.assertEqual(loaded.arrays[key].tolist(), array.tolist(), key)
+
+    def test_json_overrides_merge_into_defaults(self):
+        path = os.path.join(self.tmp_dir, "value_tables.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"cards": {"Bash": ["basic", 9.0, 2.5]}, "gold_value": 0.01}, f)
+        spec = load_spec(path)
+        self.assertEqual(spec["cards"]["Bash"], ["basic", 9.0, 2.5])
+        self.assertEqual(spec["cards"]["Strike_R"], DEFAULT_TABLES["cards"]["Strike_R"])
+        tables = ValueTables.from_spec(spec)
+        self.assertAlmostEqual(tables.card_value(card("Bash", "b"), 0), 9.0, places=5)
+        for value in tables.gold_value:
+            self.assertAlmostEqual(value, 0.01, places=6)
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"cards": {"Bash": ["no-such-category", 1, 1]}}, f)
+        with self.assertRaises(TableError):
+            compile_tables(load_spec(path))
+
+
+class TestScreenAdvisor(unittest.TestCase):
+    def setUp(self):
+        self.advisor = ScreenAdvisor(ValueTables.from_spec())
+
+    def test_shop_prices_and_affordability(self):
+        cards, scores = self.advisor.get_recommendations(view(shop_message(gold=200)))
+        self.assertEqual(cards[-1].uuid, "leave")
+        self.assertEqual(max(scores.values()), scores["shop_c2"])  # Demon Form
+        self.assertGreater(scores["purge"], 0)
+
+        # 金币不足时只推荐买得起的商品
+        cards, scores = self.advisor.get_recommendations(view(shop_message(gold=60)))
+        self.assertEqual(scores["shop_c2"], 0)
+        self.assertEqual(scores["relic:Vajra"], 0)
+        self.assertEqual(scores["shop_c1"], 100)
+        action = autopilot.choose_shop_action(view(shop_message(gold=60)), scores)
+        self.assertIsInstance(action, BuyCardAction)
+        self.assertEqual(action.card.uuid, "shop_c1")
+
+        # 买不起任何东西：离开
+        game = view(shop_message(gold=10))
+        cards, scores = self.advisor.get_recommendations(game)
+        self.assertIsInstance(autopilot.choose_shop_action(game, scores), CancelAction)
+
+    def test_shop_purge_targets_curse(self):
+        curse = card_json("Regret", "CURSE", "curse1", cost=-2, rarity="CURSE")
+        game = view(shop_message(cards=[], relics=[], potions=[], deck=STARTER_DECK + [curse]))
+        cards, scores = self.advisor.get_recommendations(game)
+        self.assertEqual(cards[0].name, "Remove Regret (75g)")
+        self.assertEqual(scores["purge"], 100)
+
+    def test_rest_or_smith_with_upgrade_target(self):
+        cards, scores = self.advisor.get_recommendations(view(rest_message(hp=25)))
+        self.assertEqual(scores["rest"], 100)
+        cards, scores = self.advisor.get_recommendations(view(rest_message(hp=70)))
+        self.assertEqual(scores["smith"], 100)
+        self.assertEqual(cards[1].name, "Smith: Bash")
+        self.assertEqual(autopilot.choose_rest_action(view(rest_message(hp=70)), scores).rest_option, RestOption.SMITH)
+        self.assertIsNone(self.advisor.get_recommendations(view(rest_message(has_rested=True))))
+
+    def test_events_depend_on_missing_hp(self):
+        cards, scores = self.advisor.get_recommendations(view(event_message(hp=20)))
+        self.assertEqual(scores["event:0"], 100)  # Banana (回血)
+        cards, scores = self.advisor.get_recommendations(view(event_message(hp=80)))
+        self.assertEqual(scores["event:0"], 70)
+
+        game = view(event_message("The Cleric", options=[("Heal", False), ("Purify", True), ("Leave", False)], hp=70))
+        cards, scores = self.advisor.get_recommendations(game)
+        self.assertEqual(scores["event:1"], 0)  # 不可选
+        action = autopilot.choose_event_action(game, scores)
+        self.assertIsInstance(action, EventOptionAction)
+        self.assertEqual(action.option.label, "Heal")
+
+        self.assertIsNone(self.advisor.get_recommendations(view(event_message("Unknown Event"))))
+
+    def test_grid_upgrade_choice(self):
+        deck = [card("Strike_R", "s1", rarity=CardRarity.BASIC), card("Bash", "b1", rarity=CardRarity.BASIC),
+                card("Inflame", "i1", upgrades=1, card_type=CardType.POWER)]
+        game = SimpleNamespace(screen_type=ScreenType.GRID, act=1,
+                               screen=SimpleNamespace(cards=deck, for_upgrade=True, num_cards=1, selected_cards=[]))
+        cards, scores = self.advisor.get_recommendations(game)
+        self.assertEqual(scores["b1"], 100)
+        self.assertEqual(scores["i1"], min(scores.values()))  # 已升级
+        action = autopilot.choose_grid_action(game, scores)
+        self.assertIsInstance(action, CardSelectAction)
+        self.assertEqual(action.cards[0].uuid, "b1")
+
+
+class TestBridgeScreens(unittest.TestCase):
+    def test_non_combat_screens_broadcast_recommendations(self):
+        with ProtocolHarness() as harness:
+            harness.feed(shop_message())
+            shop = harness.last_broadcast
+            self.assertEqual(shop["status"], "SHOP_SCREEN")
+            self.assertIn(100, [item["recommendation_score"] for item in shop["hand"]])
+
+            harness.feed(rest_message(hp=20))
+            rest = {item["name"].split(" ")[0]: item["recommendation_score"] for item in harness.last_broadcast["hand"]}
+            self.assertEqual(rest["Rest"], 100)
+
+    def test_auto_play_rests_by_table(self):
+        with ProtocolHarness(auto_play=True) as harness:
+            self.assertEqual(harness.feed(rest_message(hp=20)), ["choose rest"])
+            self.assertEqual(harness.feed(rest_message(hp=75)), ["choose smith"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# Add external/spirecomm to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'external', 'spirecomm'))
+
+from src.agents.heuristic import DEFAULT_WEIGHTS, load_weights, save_weights
+from src.agents.move_predictor import MovePredictor
+from src.agents.weight_tuner import WeightTuner, evaluate_weights, load_corpus
+from tests.game_states import combat_message, monster_json, strike, defend
+
+
+class TestWeightTuner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.corpus_path = os.path.join(self.tmp.name, "corpus.jsonl")
+        # 11 血怪物：人类打出打击 (组合斩杀)
+        lethal = combat_message(hand=[strike("s1"), strike("s2"), defend("d1")],
+                                monsters=[monster_json(hp=11, max_hp=11, damage=10)])
+        lethal["label"] = "s1"
+        # 20 血怪物，受到 10 点伤害：人类打出防御
+        defensive = combat_message(hand=[strike("s1"), strike("s2"), defend("d1")],
+                                   monsters=[monster_json(hp=20, max_hp=20, damage=10)])
+        defensive["label"] = "Defend_R"
+        with open(self.corpus_path, "w", encoding="utf-8") as f:
+            for record in (lethal, defensive):
+                f.write(json.dumps(record) + "\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_default_weights_match_labels(self):
+        corpus = load_corpus(self.corpus_path)
+        self.assertEqual(len(corpus), 2)
+        score = evaluate_weights(DEFAULT_WEIGHTS, corpus, MovePredictor.default())
+        self.assertAlmostEqual(score, 1.0)
+
+    def test_bad_weights_score_lower(self):
+        corpus = load_corpus(self.corpus_path)
+        weights = dict(DEFAULT_WEIGHTS, defend_danger=-40)
+        self.assertLess(evaluate_weights(weights, corpus, MovePredictor.default()), 1.0)
+
+    def test_checkpoint_and_resume(self):
+        checkpoint = os.path.join(self.tmp.name, "checkpoint.json")
+        tuner = WeightTuner(self.corpus_path, checkpoint, population=4, workers=1)
+        tuner.run(generations=2)
+        self.assertTrue(os.path.exists(checkpoint))
+
+        resumed = WeightTuner(self.corpus_path, checkpoint, workers=1)
+        self.assertTrue(resumed.load_checkpoint())
+        self.assertEqual(resumed.generation, 2)
+        best_weights, best_score = resumed.run(generations=3)
+        self.assertEqual(resumed.generation, 3)
+        self.assertEqual(len(resumed.history), 3)
+        self.assertGreaterEqual(best_score, tuner.best_score)
+
+        output = os.path.join(self.tmp.name, "weights.json")
+        save_weights(best_weights, output, score=best_score)
+        self.assertEqual(load_weights(output), best_weights)
+
+if __name__ == '__main__':
+    unittest.main()